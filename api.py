@@ -1,6 +1,8 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, g, has_app_context
 from flask_cors import CORS
 import mysql.connector
+from contextlib import contextmanager
+from db_pool import pool_from_env
 from datetime import datetime, timedelta
 import bcrypt
 import jwt
@@ -32,11 +34,43 @@ db_config = {
 active_sessions = {}
 
 
+# Pooled connections (sizing via DB_POOL_MIN / DB_POOL_MAX / DB_POOL_TIMEOUT,
+# see db_pool.py); opened lazily, warmed to DB_POOL_MIN at startup
+db_pool = pool_from_env(db_config)
+
+
 # ======================
 # HELPER FUNCTIONS
 # ======================
 def get_db_connection():
-    return mysql.connector.connect(**db_config)
+    """
+    Borrow a pooled connection; conn.close() hands it back to the pool.
+
+    Connections borrowed during a request are also returned when the app
+    context tears down, so an early return or exception cannot leak one.
+    """
+    conn = db_pool.acquire()
+    if has_app_context():
+        g.setdefault('db_connections', []).append(conn)
+    return conn
+
+
+@contextmanager
+def db_connection():
+    """Borrow a pooled connection for the duration of a with-block"""
+    conn = get_db_connection()
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+@app.teardown_appcontext
+def release_db_connections(exc):
+    """Return any connection a request did not close itself"""
+    for conn in g.pop('db_connections', []):
+        if not conn.returned:
+            conn.close()
 
 
 def create_session(token, user_data):
@@ -2459,40 +2493,40 @@ def update_hotel_profile(current_user):
 @token_required
 @admin_required
 def get_support_tickets(current_user):
-    conn = get_db_connection()
-    cur = conn.cursor(dictionary=True)
-    cur.execute("""
-        SELECT t.*, u.hotel_name, u.email 
-        FROM support_tickets t 
-        LEFT JOIN users u ON t.userid = u.id  -- Fixed: userid
-        ORDER BY t.created_at DESC
-    """)
-    tickets = cur.fetchall()
-    cur.close(); conn.close()
+    with db_connection() as conn:
+        cur = conn.cursor(dictionary=True)
+        cur.execute("""
+            SELECT t.*, u.hotel_name, u.email 
+            FROM support_tickets t 
+            LEFT JOIN users u ON t.userid = u.id  -- Fixed: userid
+            ORDER BY t.created_at DESC
+        """)
+        tickets = cur.fetchall()
+        cur.close()
     return jsonify(tickets)
 
 @app.route('/api/admin/support/tickets/<int:ticket_id>', methods=['GET'])
 @token_required
 @admin_required
 def get_support_ticket(current_user, ticket_id):
-    conn = get_db_connection()
-    cur = conn.cursor(dictionary=True)
+    with db_connection() as conn:
+        cur = conn.cursor(dictionary=True)
 
-    cur.execute("SELECT * FROM support_tickets WHERE id=%s", (ticket_id,))
-    ticket = cur.fetchone()
-    if not ticket:
-        cur.close(); conn.close()
-        return jsonify({'error': 'Ticket not found'}), 404
+        cur.execute("SELECT * FROM support_tickets WHERE id=%s", (ticket_id,))
+        ticket = cur.fetchone()
+        if not ticket:
+            cur.close()
+            return jsonify({'error': 'Ticket not found'}), 404
+
+        cur.execute("""
+            SELECT sr.message, sr.isadmin as is_admin, sr.createdat as created_at 
+            FROM supportreplies sr  
+            WHERE sr.ticketid = %s 
+            ORDER BY sr.createdat ASC
+        """, (ticket_id,))
+        ticket['replies'] = cur.fetchall()
+        cur.close()
 
-    cur.execute("""
-        SELECT sr.message, sr.isadmin as is_admin, sr.createdat as created_at 
-        FROM supportreplies sr  
-        WHERE sr.ticketid = %s 
-        ORDER BY sr.createdat ASC
-    """, (ticket_id,))
-    ticket['replies'] = cur.fetchall()
-
-    cur.close(); conn.close()
     return jsonify(ticket)
 
 @app.route('/api/admin/support/tickets', methods=['POST'])
@@ -2503,14 +2537,14 @@ def create_support_ticket(current_user):
     if not data or 'subject' not in data or 'message' not in data:
         return jsonify({'error': 'subject & message required'}), 400
 
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute(
-        "INSERT INTO support_tickets (subject, message, status, created_at, updated_at) VALUES (%s, %s, 'open', NOW(), NOW())",  
-        (data['subject'], data['message'])
-    )
-    ticket_id = cur.lastrowid
-    conn.commit(); cur.close(); conn.close()
+    with db_connection() as conn:
+        cur = conn.cursor()
+        cur.execute(
+            "INSERT INTO support_tickets (subject, message, status, created_at, updated_at) VALUES (%s, %s, 'open', NOW(), NOW())",  
+            (data['subject'], data['message'])
+        )
+        ticket_id = cur.lastrowid
+        conn.commit(); cur.close()
     return jsonify({'id': ticket_id}), 201
 
 @app.route('/api/admin/support/tickets/<int:ticket_id>/reply', methods=['POST'])
@@ -2521,28 +2555,28 @@ def add_reply(current_user, ticket_id):
     if not data or 'message' not in data:
         return jsonify({'error': 'message required'}), 400
 
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute(
-        "INSERT INTO supportreplies (ticketid, message, isadmin) VALUES (%s, %s, 1)", 
-        (ticket_id, data['message'])
-    )
-    # Update ticket timestamp
-    cur.execute("UPDATE support_tickets SET updated_at = NOW() WHERE id = %s", (ticket_id,))
-    conn.commit(); cur.close(); conn.close()
+    with db_connection() as conn:
+        cur = conn.cursor()
+        cur.execute(
+            "INSERT INTO supportreplies (ticketid, message, isadmin) VALUES (%s, %s, 1)", 
+            (ticket_id, data['message'])
+        )
+        # Update ticket timestamp
+        cur.execute("UPDATE support_tickets SET updated_at = NOW() WHERE id = %s", (ticket_id,))
+        conn.commit(); cur.close()
     return jsonify({'message': 'reply added'})
 
 @app.route('/api/admin/support/tickets/<int:ticket_id>/close', methods=['PATCH'])
 @token_required
 @admin_required
 def close_ticket(current_user, ticket_id):
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute("UPDATE support_tickets SET status='closed', updated_at=NOW() WHERE id=%s", (ticket_id,))
-    if cur.rowcount == 0:
-        cur.close(); conn.close()
-        return jsonify({'error': 'Ticket not found'}), 404
-    conn.commit(); cur.close(); conn.close()
+    with db_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("UPDATE support_tickets SET status='closed', updated_at=NOW() WHERE id=%s", (ticket_id,))
+        if cur.rowcount == 0:
+            cur.close()
+            return jsonify({'error': 'Ticket not found'}), 404
+        conn.commit(); cur.close()
     return jsonify({'message': 'ticket closed'})
 
 # Hotel adds reply to their ticket
@@ -2802,13 +2836,13 @@ def get_analytics(current_user):
 @token_required
 @admin_required
 def admin_dashboard(current_user):
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute("SELECT COUNT(*) FROM orders"); total_orders = cur.fetchone()[0]
-    cur.execute("SELECT COALESCE(SUM(total_amount),0) FROM orders WHERE MONTH(created_at)=MONTH(NOW())"); month_revenue = cur.fetchone()[0]
-    cur.execute("SELECT COUNT(*) FROM orders WHERE status='pending'"); pending = cur.fetchone()[0]
-    cur.execute("SELECT COUNT(*) FROM products WHERE stock_quantity < 10"); out_of_stock = cur.fetchone()[0]
-    cur.close(); conn.close()
+    with db_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT COUNT(*) FROM orders"); total_orders = cur.fetchone()[0]
+        cur.execute("SELECT COALESCE(SUM(total_amount),0) FROM orders WHERE MONTH(created_at)=MONTH(NOW())"); month_revenue = cur.fetchone()[0]
+        cur.execute("SELECT COUNT(*) FROM orders WHERE status='pending'"); pending = cur.fetchone()[0]
+        cur.execute("SELECT COUNT(*) FROM products WHERE stock_quantity < 10"); out_of_stock = cur.fetchone()[0]
+        cur.close()
     return jsonify({
         'total_orders': total_orders,
         'month_revenue': float(month_revenue),
@@ -2817,6 +2851,14 @@ def admin_dashboard(current_user):
     })
 
 
+@app.route('/api/admin/db-pool', methods=['GET'])
+@token_required
+@admin_required
+def get_db_pool_stats(current_user):
+    """Connection pool sizing, in-use count and checkout wait statistics"""
+    return jsonify(db_pool.stats()), 200
+
+
 # ======================
 # ERROR HANDLERS
 # ======================
@@ -2840,4 +2882,5 @@ if __name__ == '__main__':
     print("🔐 Authentication: Login, Logout, Session Management")
     print("🏨 Hotel Features: Dashboard, Cart, Order History, Bills")
     print("👑 Admin Features: Full System Control")
+    db_pool.warm()
     app.run(debug=True, port=5000)
\ No newline at end of file
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# ======================
+# CHATBOT TRANSLATION CATALOG BUILD
+# Translates the static chatbot responses into mr/hi/te once
+# ======================
+"""
+Build translations/response_catalog.json for the chatbot in combine_api.py.
+
+Every static response (resp_* functions except the dynamic ones,
+TERMINAL_RESPONSES and menu texts, see static_response_texts()) is
+translated into each catalog language with GoogleTranslator. Entries are
+keyed by the SHA-256 of the English text. combine_api.py loads the file at
+startup and serves these texts without a network call.
+
+Translations already in the catalog for unchanged English text are reused,
+so a rebuild only translates new or edited responses. Map embeds (HTML)
+are kept out of the text sent for translation and put back unchanged.
+
+Usage:
+    python build_translation_catalog.py            # add missing translations
+    python build_translation_catalog.py --force    # retranslate everything
+    python build_translation_catalog.py --check    # exit 1 if the catalog is incomplete
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+from datetime import datetime
+
+from combine_api import (
+    CATALOG_LANGUAGES,
+    TRANSLATION_CATALOG_PATH,
+    TRANSLATION_CATALOG_VERSION,
+    UNTRANSLATED_SEGMENTS,
+    static_response_texts,
+    translation_hash,
+)
+
+
+def load_catalog(path):
+    """Return the existing catalog entries, or {} if the file is missing or outdated"""
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        catalog = json.load(f)
+    if catalog.get('version') != TRANSLATION_CATALOG_VERSION:
+        print(f"[{datetime.now()}] Catalog version {catalog.get('version')} is outdated, rebuilding from scratch")
+        return {}
+    return catalog.get('entries', {})
+
+
+def translate(text, lang):
+    """Translate text, sending only the parts between untranslated segments"""
+    from deep_translator import GoogleTranslator
+
+    translator = GoogleTranslator(source='en', target=lang)
+    pattern = '(' + '|'.join(re.escape(segment) for segment in UNTRANSLATED_SEGMENTS) + ')'
+    parts = []
+    for part in re.split(pattern, text):
+        if part in UNTRANSLATED_SEGMENTS or not part.strip():
+            parts.append(part)
+        else:
+            parts.append(translator.translate(part))
+    return ''.join(parts)
+
+
+def build_catalog(path, force=False):
+    """Translate missing (or, with force, all) static responses and write the catalog"""
+    existing = {} if force else load_catalog(path)
+    entries = {}
+    translated = 0
+    for text in static_response_texts():
+        text_hash = translation_hash(text)
+        entry = {'en': text}
+        for lang in CATALOG_LANGUAGES:
+            previous = existing.get(text_hash, {}).get(lang)
+            if previous:
+                entry[lang] = previous
+                continue
+            entry[lang] = translate(text, lang)
+            translated += 1
+            print(f"[{datetime.now()}] {lang}: {text[:60]!r}")
+        entries[text_hash] = entry
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'version': TRANSLATION_CATALOG_VERSION,
+            'built_at': datetime.now().isoformat(timespec='seconds'),
+            'languages': list(CATALOG_LANGUAGES),
+            'entries': dict(sorted(entries.items()))
+        }, f, ensure_ascii=False, indent=2)
+        f.write('\n')
+    print(f"[{datetime.now()}] Wrote {path}: {len(entries)} texts, {translated} new translations")
+
+
+def check_catalog(path):
+    """Return the number of static responses missing a translation"""
+    entries = load_catalog(path)
+    missing = 0
+    for text in static_response_texts():
+        entry = entries.get(translation_hash(text), {})
+        for lang in CATALOG_LANGUAGES:
+            if not entry.get(lang):
+                missing += 1
+                print(f"missing {lang}: {text[:60]!r}")
+    return missing
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Build the chatbot translation catalog')
+    parser.add_argument('--output', default=TRANSLATION_CATALOG_PATH, help='catalog file to write')
+    parser.add_argument('--force', action='store_true', help='retranslate every entry')
+    parser.add_argument('--check', action='store_true', help='only report missing translations')
+    args = parser.parse_args(argv)
+
+    if args.check:
+        return 1 if check_catalog(args.output) else 0
+    build_catalog(args.output, args.force)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
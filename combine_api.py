@@ -1,17 +1,36 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, g, has_app_context, Response
 from flask_cors import CORS
+import base64
+import hashlib
 import logging
 import json
 import os
 import re
 import sys
+import threading
+import time
 import traceback
 from datetime import datetime
+from collections import OrderedDict
 from typing import Dict, Any, List, Optional
 
 #----------------------------------------------------------------------------------
 
 import mysql.connector
+from contextlib import contextmanager
+from db_pool import config_from_dsn, pool_from_env
+from report_queries import (
+    BILL_TOTAL_SYNC_SQL,
+    DAY_FILLING_HOTELS_SQL,
+    DAY_FILLING_ITEMS_SQL,
+    DAY_HOTEL_ORDERS_HISTORY_SQL,
+    DAY_HOTEL_ORDERS_SQL,
+    DAY_VEGETABLES_SQL,
+    HOTEL_MONTH_TOTAL_SQL,
+    ORDER_ITEM_COLUMNS,
+    ORDER_ITEMS_BATCH_SQL,
+    REVENUE_TRENDS_SQL,
+)
 from datetime import datetime, timedelta
 import bcrypt
 import jwt
@@ -411,32 +430,48 @@ def translate_text_to_english(text: str, source_lang: str = 'auto') -> str:
         return text
 
 def translate_response_from_english(text: str, dest_lang: str) -> str:
-    """Translates the English response back to the user's detected language"""
-    logger.info(f"[TRANSLATE] Called with dest_lang={dest_lang}, translator_available={translator_available}")
-    logger.info(f"[TRANSLATE] Text to translate: '{text[:100]}...'")
-    
-    if not translator_available:
-        logger.warning(f"[TRANSLATE] Translator not available, returning original")
+    """
+    Translates the English response back to the user's detected language.
+    Static responses come from the precomputed catalog; other text (LLM
+    answers, live prices) goes to GoogleTranslator through the LRU cache.
+    """
+    if dest_lang == 'en' or not text.strip():
         return text
     
-    if dest_lang == 'en':
-        logger.info(f"[TRANSLATE] Target is English, returning original")
-        return text
+    text_hash = translation_hash(text)
+    catalog_text = TRANSLATION_CATALOG.get(dest_lang, {}).get(text_hash)
+    if catalog_text is not None:
+        logger.info(f"[TRANSLATE] Catalog hit for {dest_lang}")
+        return catalog_text
+    
+    with _translation_cache_lock:
+        cached = _translation_cache.get((text_hash, dest_lang))
+        if cached is not None:
+            _translation_cache.move_to_end((text_hash, dest_lang))
+            logger.info(f"[TRANSLATE] Cache hit for {dest_lang}")
+            return cached
     
-    if not text.strip():
-        logger.warning(f"[TRANSLATE] Empty text, returning original")
+    if not translator_available:
+        logger.warning(f"[TRANSLATE] Translator not available, returning original")
         return text
     
     try:
         logger.info(f"[TRANSLATE] Calling GoogleTranslator(source='en', target='{dest_lang}')")
         translated = GoogleTranslator(source='en', target=dest_lang).translate(text)
         logger.info(f"[TRANSLATE] SUCCESS! Translated to {dest_lang}: {translated[:100]}...")
-        return translated
     except Exception as e:
         logger.error(f"[TRANSLATE] FAILED: {str(e)}")
         import traceback
         logger.error(traceback.format_exc())
         return text
+    
+    if translated:
+        with _translation_cache_lock:
+            _translation_cache[(text_hash, dest_lang)] = translated
+            _translation_cache.move_to_end((text_hash, dest_lang))
+            while len(_translation_cache) > TRANSLATION_CACHE_SIZE:
+                _translation_cache.popitem(last=False)
+    return translated or text
 
 def detect_language(text: str) -> str:
     """Enhanced language detection with better accuracy"""
@@ -796,6 +831,104 @@ def resp_something_else() -> str:
 def resp_location() -> str:
     return f"Our office is at: {OFFICE_ADDRESS}\n\n{OFFICE_MAP_EMBED}"
 
+# ======================
+# TRANSLATION CATALOG
+# ======================
+# Static responses (resp_* functions, TERMINAL_RESPONSES and menu texts) are
+# translated once by build_translation_catalog.py into
+# translations/response_catalog.json, keyed by the SHA-256 of the English
+# text, and loaded at startup. Only text that is not in the catalog (LLM
+# answers, live prices, responses edited since the last build) is sent to
+# GoogleTranslator, through a bounded LRU cache keyed by (text hash, language).
+TRANSLATION_CATALOG_PATH = os.getenv(
+    'TRANSLATION_CATALOG_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'translations', 'response_catalog.json')
+)
+TRANSLATION_CATALOG_VERSION = 1
+CATALOG_LANGUAGES = ('mr', 'hi', 'te')
+TRANSLATION_CACHE_SIZE = int(os.getenv('TRANSLATION_CACHE_SIZE', '512'))
+# resp_* functions whose text changes at runtime and cannot be precomputed
+DYNAMIC_RESPONSES = {'resp_quote'}
+# Placeholders kept out of translation (map embeds are HTML)
+UNTRANSLATED_SEGMENTS = (OFFICE_MAP_EMBED, MARKET_MAP_EMBED)
+
+# Labels of the follow-up options shown after a terminal response
+FLOWING_MENU_TEXTS = {
+    "vegetable_prices": "Vegetable Prices",
+    "fruit_prices": "Fruit Prices",
+    "bulk_discounts": "Bulk Discounts",
+    "place_order": "Place an Order",
+    "office_address": "Office Address",
+    "market_location": "Market Location",
+    "contact_us": "Contact Us",
+    "delivery_info": "Delivery Info",
+    "main_menu": "Back to Main Menu"
+}
+TERMINAL_FALLBACK_RESPONSE = "Thank you for your inquiry!"
+
+TRANSLATION_CATALOG = {}  # lang -> {text hash: translated text}
+_translation_cache = OrderedDict()  # (text hash, lang) -> translated text
+_translation_cache_lock = threading.Lock()
+
+def translation_hash(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+def format_response_template(template: str) -> str:
+    """Fill the business placeholders used by TERMINAL_RESPONSES"""
+    return template.format(
+        CONTACT_PHONE=CONTACT_PHONE,
+        CONTACT_EMAIL=CONTACT_EMAIL,
+        OFFICE_ADDRESS=OFFICE_ADDRESS,
+        OFFICE_MAP_EMBED=OFFICE_MAP_EMBED,
+        MARKET_MAP_EMBED=MARKET_MAP_EMBED
+    )
+
+def static_response_texts() -> List[str]:
+    """Every fixed English string the chatbot can send, in a stable order"""
+    texts = []
+    for name in sorted(globals()):
+        if name.startswith('resp_') and name not in DYNAMIC_RESPONSES and callable(globals()[name]):
+            texts.append(globals()[name]())
+    texts.extend(format_response_template(template) for template in TERMINAL_RESPONSES.values())
+    for menu in MENU_STRUCTURE.values():
+        texts.append(menu["message"])
+        texts.extend(option["text"] for option in menu["options"])
+    texts.extend(FLOWING_MENU_TEXTS.values())
+    texts.append(TERMINAL_FALLBACK_RESPONSE)
+    return list(dict.fromkeys(text for text in texts if text and text.strip()))
+
+def load_translation_catalog(path: str = TRANSLATION_CATALOG_PATH) -> Dict[str, Dict[str, str]]:
+    """Load the precomputed catalog into TRANSLATION_CATALOG; a missing file leaves it empty"""
+    global TRANSLATION_CATALOG
+    try:
+        with open(path, encoding='utf-8') as f:
+            catalog = json.load(f)
+    except FileNotFoundError:
+        logger.warning(f"[TRANSLATION_CATALOG] {path} not found, run build_translation_catalog.py")
+        return TRANSLATION_CATALOG
+    except Exception as e:
+        logger.error(f"[TRANSLATION_CATALOG] Could not load {path}: {str(e)}")
+        return TRANSLATION_CATALOG
+    
+    if catalog.get('version') != TRANSLATION_CATALOG_VERSION:
+        logger.error(f"[TRANSLATION_CATALOG] Unsupported catalog version {catalog.get('version')}, ignoring {path}")
+        return TRANSLATION_CATALOG
+    
+    loaded = {lang: {} for lang in CATALOG_LANGUAGES}
+    for text_hash, entry in catalog.get('entries', {}).items():
+        for lang in CATALOG_LANGUAGES:
+            if entry.get(lang):
+                loaded[lang][text_hash] = entry[lang]
+    TRANSLATION_CATALOG = loaded
+    
+    missing = [text for text in static_response_texts() if translation_hash(text) not in catalog.get('entries', {})]
+    logger.info(f"[TRANSLATION_CATALOG] Loaded {len(catalog.get('entries', {}))} entries built {catalog.get('built_at')}")
+    if missing:
+        logger.warning(f"[TRANSLATION_CATALOG] {len(missing)} static responses are not in the catalog, rebuild it")
+    return TRANSLATION_CATALOG
+
+load_translation_catalog()
+
 # LLM integration
 def llm_answer(user_text: str, context: str) -> Optional[str]:
     """Get response from DeepSeek AI"""
@@ -962,7 +1095,8 @@ def health_check():
             "translation": translator_available,
             "language_detection": detector_available,
             "mms_tts": mms_tts_available
-        }
+        },
+        "db_pool": db_pool.stats()
     }
     return jsonify(status_info)
 
@@ -1344,13 +1478,12 @@ def format_terminal_response(action: str) -> Dict[str, Any]:
         terminal_responses = TERMINAL_RESPONSES
         logger.info(f"[TERMINAL] Using English responses")
     
-    response_text = terminal_responses.get(action, "Thank you for your inquiry!").format(
-        CONTACT_PHONE=CONTACT_PHONE,
-        CONTACT_EMAIL=CONTACT_EMAIL,
-        OFFICE_ADDRESS=OFFICE_ADDRESS,
-        OFFICE_MAP_EMBED=OFFICE_MAP_EMBED,
-        MARKET_MAP_EMBED=MARKET_MAP_EMBED
-    )
+    if action in terminal_responses:
+        response_text = format_response_template(terminal_responses[action])
+    else:
+        # No hand-written translation for this action: use the catalog (no network call)
+        english_text = format_response_template(TERMINAL_RESPONSES.get(action, TERMINAL_FALLBACK_RESPONSE))
+        response_text = TRANSLATION_CATALOG.get(_LAST_DETECTED_LANG, {}).get(translation_hash(english_text), english_text)
     
     logger.info(f"[TERMINAL] action={action}, lang={_LAST_DETECTED_LANG}, response='{response_text[:50]}...'")
     
@@ -1397,17 +1530,7 @@ def format_terminal_response(action: str) -> Dict[str, Any]:
             "main_menu": "मुख्य मेनू पर वापस जाएं"
         }
     else:
-        menu_texts = {
-            "vegetable_prices": "Vegetable Prices",
-            "fruit_prices": "Fruit Prices",
-            "bulk_discounts": "Bulk Discounts",
-            "place_order": "Place an Order",
-            "office_address": "Office Address",
-            "market_location": "Market Location",
-            "contact_us": "Contact Us",
-            "delivery_info": "Delivery Info",
-            "main_menu": "Back to Main Menu"
-        }
+        menu_texts = FLOWING_MENU_TEXTS
     
     formatted_options = []
     for menu_action in menu_actions:
@@ -1514,11 +1637,393 @@ db_config = {
 active_sessions = {}
 
 
+# Pooled connections (sizing via DB_POOL_MIN / DB_POOL_MAX / DB_POOL_TIMEOUT,
+# see db_pool.py); opened lazily, warmed to DB_POOL_MIN at startup
+db_pool = pool_from_env(db_config)
+
+# Optional read replica for reporting endpoints (e.g. DB_REPLICA_DSN=mysql://reader:pw@replica-host/BVS).
+# Its user needs REPLICATION CLIENT to report lag; reads fall back to the primary when
+# lag exceeds REPLICA_MAX_LAG_SECONDS or cannot be measured.
+replica_db_config = config_from_dsn(os.environ['DB_REPLICA_DSN'], db_config) if os.environ.get('DB_REPLICA_DSN') else None
+replica_pool = pool_from_env(replica_db_config) if replica_db_config else None
+REPLICA_MAX_LAG_SECONDS = float(os.environ.get('REPLICA_MAX_LAG_SECONDS', '5'))
+REPLICA_LAG_CHECK_INTERVAL = float(os.environ.get('REPLICA_LAG_CHECK_INTERVAL', '10'))
+
+_replica_state = {'checked_at': 0.0, 'healthy': False, 'lag_seconds': None, 'error': None}
+_replica_state_lock = threading.Lock()
+
+
 # ======================
 # HELPER FUNCTIONS
 # ======================
 def get_db_connection():
-    return mysql.connector.connect(**db_config)
+    """
+    Borrow a pooled connection; conn.close() hands it back to the pool.
+
+    Connections borrowed during a request are also returned when the app
+    context tears down, so an early return or exception cannot leak one.
+    """
+    if has_app_context() and g.get('db_read_replica'):
+        conn = acquire_read_connection()
+    else:
+        conn = db_pool.acquire()
+    if has_app_context():
+        g.setdefault('db_connections', []).append(conn)
+    return conn
+
+
+def measure_replica_lag():
+    """
+    Return the replica's replication lag in seconds.
+
+    Returns None when the replica does not report lag (replication
+    stopped, or the user lacks REPLICATION CLIENT).
+    """
+    with replica_pool.connection() as conn:
+        cursor = conn.cursor(dictionary=True)
+        try:
+            try:
+                cursor.execute("SHOW REPLICA STATUS")
+            except mysql.connector.Error:
+                cursor.execute("SHOW SLAVE STATUS")  # MySQL < 8.0.22
+            row = cursor.fetchone()
+        finally:
+            cursor.close()
+    if not row:
+        return None
+    lag = row.get('Seconds_Behind_Source', row.get('Seconds_Behind_Master'))
+    return float(lag) if lag is not None else None
+
+
+def replica_is_fresh():
+    """True if the replica's lag is within REPLICA_MAX_LAG_SECONDS (re-measured every REPLICA_LAG_CHECK_INTERVAL)"""
+    if replica_pool is None:
+        return False
+    with _replica_state_lock:
+        if time.monotonic() - _replica_state['checked_at'] < REPLICA_LAG_CHECK_INTERVAL:
+            return _replica_state['healthy']
+        _replica_state['checked_at'] = time.monotonic()  # one request re-measures, the rest use the last result
+
+    try:
+        lag, error = measure_replica_lag(), None
+    except Exception as e:
+        lag, error = None, str(e)
+    healthy = lag is not None and lag <= REPLICA_MAX_LAG_SECONDS
+    with _replica_state_lock:
+        was_healthy = _replica_state['healthy']
+        _replica_state.update(healthy=healthy, lag_seconds=lag, error=error)
+    if was_healthy != healthy:
+        print(f"[{datetime.now()}] Read replica {'in use' if healthy else 'bypassed'}: lag={lag}s{f', error={error}' if error else ''}")
+    return healthy
+
+
+def acquire_read_connection():
+    """Borrow a connection for read-only work: the replica when fresh, else the primary"""
+    if replica_is_fresh():
+        try:
+            return replica_pool.acquire()
+        except mysql.connector.Error as e:
+            print(f"[{datetime.now()}] Read replica unavailable, using primary: {str(e)}")
+            with _replica_state_lock:
+                _replica_state.update(healthy=False, checked_at=time.monotonic(), error=str(e))
+    return db_pool.acquire()
+
+
+def read_replica(f):
+    """Route the connections a read-only endpoint borrows to the read replica"""
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        g.db_read_replica = True
+        try:
+            return f(*args, **kwargs)
+        finally:
+            g.db_read_replica = False
+    return decorated
+
+
+@contextmanager
+def db_connection():
+    """Borrow a pooled connection for the duration of a with-block"""
+    conn = get_db_connection()
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+@app.teardown_appcontext
+def release_db_connections(exc):
+    """Return any connection a request did not close itself"""
+    for conn in g.pop('db_connections', []):
+        if not conn.returned:
+            conn.close()
+
+
+def day_range(day):
+    """
+    Half-open [start, end) bounds covering one calendar day.
+
+    Compare the raw column against these (col >= %s AND col < %s) instead
+    of wrapping it in DATE(), so MySQL can use an index on it.
+    """
+    return day, day + timedelta(days=1)
+
+
+def month_range(day=None):
+    """Half-open [start, end) bounds covering the calendar month of day (default today)"""
+    first = (day or datetime.now().date()).replace(day=1)
+    return first, (first + timedelta(days=32)).replace(day=1)
+
+
+# Days covered by the revenue trends chart
+REVENUE_TREND_DAYS = 30
+
+
+def trend_range(days=REVENUE_TREND_DAYS, day=None):
+    """Half-open [start, end) bounds covering the last `days` days up to and including day (default today)"""
+    end = (day or datetime.now().date()) + timedelta(days=1)
+    return end - timedelta(days=days), end
+
+
+# Order ids per IN (...) query when loading order items
+ORDER_ITEMS_BATCH_SIZE = 500
+
+
+def load_order_items(cursor, order_ids, columns=ORDER_ITEM_COLUMNS, order_by="oi.id"):
+    """
+    Fetch the items of many orders with one IN (...) query per chunk.
+
+    Args:
+        cursor: dictionary cursor to run the queries on
+        order_ids: ids of the orders to load items for
+        columns: SELECT list over order_items oi JOIN products p
+        order_by: ordering of the items within each order
+
+    Returns:
+        Dict of order_id -> list of item rows (empty list for orders without items)
+    """
+    order_ids = list(dict.fromkeys(order_ids))
+    items_by_order = {order_id: [] for order_id in order_ids}
+
+    for start in range(0, len(order_ids), ORDER_ITEMS_BATCH_SIZE):
+        chunk = order_ids[start:start + ORDER_ITEMS_BATCH_SIZE]
+        placeholders = ', '.join(['%s'] * len(chunk))
+        cursor.execute(ORDER_ITEMS_BATCH_SQL.format(columns=columns, placeholders=placeholders, order_by=order_by), chunk)
+        for item in cursor.fetchall():
+            items_by_order[item.pop('batch_order_id')].append(item)
+
+    return items_by_order
+
+
+def load_products(cursor, product_ids, columns="id, price_per_unit, is_available, name, unit_type"):
+    """
+    Fetch many products with a single IN (...) query.
+
+    Returns:
+        Dict of product id -> product row (ids that do not exist are absent)
+    """
+    product_ids = list(dict.fromkeys(int(product_id) for product_id in product_ids))
+    if not product_ids:
+        return {}
+    placeholders = ', '.join(['%s'] * len(product_ids))
+    cursor.execute(f"SELECT {columns} FROM products WHERE id IN ({placeholders})", product_ids)
+    return {product['id']: product for product in cursor.fetchall()}
+
+
+# Rows per keyset batch when streaming a listing
+STREAM_BATCH_SIZE = 500
+
+# Largest page a keyset-paginated listing returns
+LISTING_MAX_LIMIT = 500
+
+
+def encode_keyset_cursor(*values):
+    """Encode the sort key of the last row on a page as an opaque cursor string"""
+    return base64.urlsafe_b64encode(json.dumps(values, default=str).encode()).decode()
+
+
+def decode_keyset_cursor(token, size):
+    """
+    Decode a cursor from encode_keyset_cursor().
+
+    Raises:
+        ValueError: if the token is malformed or does not hold size values
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(token.encode()).decode())
+    except Exception:
+        raise ValueError('Invalid cursor')
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError('Invalid cursor')
+    return values
+
+
+def stream_json_array(select_query, conditions, params, date_column, id_column, transform=None):
+    """
+    Stream a listing as a JSON array response without holding a connection.
+
+    Rows are read newest first in keyset batches of STREAM_BATCH_SIZE
+    ((date_column, id_column) < last row seen), each with a buffered cursor
+    on one pooled connection that is returned before the batch is written
+    out, so a slow client never ties up the pool. transform(cursor, rows)
+    may enrich each batch in place using the same cursor.
+
+    If a batch fails after the response has started, the array is closed
+    with a final {"stream_error": ...} element instead of being cut off.
+
+    Args:
+        select_query: SELECT ... FROM ... JOIN ... without WHERE / ORDER BY
+        conditions, params: filters applied to every batch
+        date_column, id_column: (sql expression, row key) pairs of the sort key
+    """
+    (date_sql, date_key), (id_sql, id_key) = date_column, id_column
+
+    def fetch_batch(last):
+        batch_conditions, batch_params = list(conditions), list(params)
+        if last is not None:
+            batch_conditions.append(f"({date_sql} < %s OR ({date_sql} = %s AND {id_sql} < %s))")
+            batch_params.extend([last[0], last[0], last[1]])
+        query = select_query
+        if batch_conditions:
+            query += " WHERE " + " AND ".join(batch_conditions)
+        query += f" ORDER BY {date_sql} DESC, {id_sql} DESC LIMIT %s"
+        with db_pool.connection() as conn:
+            cursor = conn.cursor(dictionary=True, buffered=True)
+            try:
+                cursor.execute(query, batch_params + [STREAM_BATCH_SIZE])
+                rows = cursor.fetchall()
+                if rows and transform:
+                    transform(cursor, rows)
+                return rows
+            finally:
+                cursor.close()
+
+    def generate():
+        yield '['
+        first = True
+        last = None
+        try:
+            while True:
+                rows = fetch_batch(last)
+                if not rows:
+                    break
+                chunk = ','.join(app.json.dumps(row) for row in rows)
+                yield chunk if first else ',' + chunk
+                first = False
+                if len(rows) < STREAM_BATCH_SIZE:
+                    break
+                last = (rows[-1][date_key], rows[-1][id_key])
+        except Exception as e:
+            print(f"[{datetime.now()}] Streaming listing aborted: {str(e)}")
+            marker = app.json.dumps({'stream_error': str(e)})
+            yield marker if first else ',' + marker
+        yield ']'
+
+    return Response(generate(), mimetype='application/json')
+
+
+def attach_order_items(cursor, orders):
+    """Attach items to a batch of order rows using the batch's cursor"""
+    items_by_order = load_order_items(cursor, [order['id'] for order in orders])
+    for order in orders:
+        order['items'] = items_by_order[order['id']]
+
+
+# Seconds between background bill total consistency checks (0 disables)
+BILL_TOTALS_CHECK_INTERVAL = int(os.environ.get('BILL_TOTALS_CHECK_INTERVAL', '900'))
+
+# Per-order totals of priced items, shared by the writer and the checker
+ORDER_ITEM_TOTALS_SQL = """
+    SELECT order_id, SUM(price_at_order * quantity) AS calculated_total
+    FROM order_items
+    WHERE price_at_order IS NOT NULL
+    GROUP BY order_id
+"""
+
+BILL_TOTAL_DRIFT_SQL = """
+    b.bill_status != 'draft'
+    AND (b.total_amount IS NULL OR b.amount IS NULL
+         OR ABS(b.total_amount - t.calculated_total) > 0.005
+         OR ABS(b.amount - t.calculated_total) > 0.005)
+"""
+
+
+def sync_order_totals(cursor, order_id):
+    """
+    Write an order's item total onto the order and its bill.
+
+    Call inside the transaction that changed the order's items, so the
+    stored bill total never disagrees with the items once committed.
+
+    Returns:
+        The new total (0.0 when no item is priced yet)
+    """
+    cursor.execute("""
+        SELECT COALESCE(SUM(price_at_order * quantity), 0)
+        FROM order_items
+        WHERE order_id = %s AND price_at_order IS NOT NULL
+    """, (order_id,))
+    row = cursor.fetchone()
+    total = float(list(row.values())[0] if isinstance(row, dict) else row[0])
+    cursor.execute("UPDATE orders SET total_amount = %s WHERE id = %s", (total, order_id))
+    cursor.execute(BILL_TOTAL_SYNC_SQL, (total, total, order_id))
+    return total
+
+
+def check_bill_totals(fix=True):
+    """
+    Find (and optionally repair) bills whose stored totals drifted from their items.
+
+    Uses one grouped query over order_items to find drift and one
+    multi-table UPDATE to repair it. Draft bills are skipped, and so are
+    bills without priced items.
+
+    Returns:
+        List of drifted bills as {bill_id, order_id, stored_total, calculated_total}
+    """
+    with db_connection() as conn:
+        cursor = conn.cursor(dictionary=True)
+        try:
+            cursor.execute(f"""
+                SELECT b.id AS bill_id, b.order_id, b.total_amount AS stored_total, t.calculated_total
+                FROM bills b
+                JOIN ({ORDER_ITEM_TOTALS_SQL}) t ON t.order_id = b.order_id
+                WHERE {BILL_TOTAL_DRIFT_SQL}
+            """)
+            drifted = cursor.fetchall()
+            if drifted and fix:
+                cursor.execute(f"""
+                    UPDATE bills b
+                    JOIN ({ORDER_ITEM_TOTALS_SQL}) t ON t.order_id = b.order_id
+                    SET b.total_amount = t.calculated_total, b.amount = t.calculated_total
+                    WHERE {BILL_TOTAL_DRIFT_SQL}
+                """)
+                conn.commit()
+            return drifted
+        finally:
+            cursor.close()
+
+
+def run_bill_totals_checker():
+    """Background loop: repair drifted bill totals every BILL_TOTALS_CHECK_INTERVAL seconds"""
+    while True:
+        time.sleep(BILL_TOTALS_CHECK_INTERVAL)
+        try:
+            drifted = check_bill_totals(fix=True)
+            if drifted:
+                ids = ', '.join(str(bill['bill_id']) for bill in drifted)
+                print(f"[{datetime.now()}] Bill totals checker: repaired {len(drifted)} bill(s): {ids}")
+        except Exception as e:
+            print(f"[{datetime.now()}] Bill totals checker failed: {str(e)}")
+
+
+def start_bill_totals_checker():
+    """Start the consistency checker thread (no-op when disabled)"""
+    if BILL_TOTALS_CHECK_INTERVAL <= 0:
+        return None
+    checker = threading.Thread(target=run_bill_totals_checker, name='bill-totals-checker', daemon=True)
+    checker.start()
+    return checker
 
 
 def create_session(token, user_data):
@@ -1920,12 +2425,7 @@ def get_hotel_dashboard(current_user):
         recent_bills = cursor.fetchall()
 
         # This month total
-        cursor.execute("""
-            SELECT SUM(total_amount) as this_month_total 
-            FROM orders 
-            WHERE user_id = %s AND MONTH(order_date) = MONTH(CURRENT_DATE()) 
-            AND YEAR(order_date) = YEAR(CURRENT_DATE())
-        """, (user_id,))
+        cursor.execute(HOTEL_MONTH_TOTAL_SQL, (user_id, *month_range()))
         this_month = cursor.fetchone()
 
         return jsonify({
@@ -1974,15 +2474,10 @@ def get_hotel_orders(current_user):
 
         orders = cursor.fetchall()
 
-        # Get items for each order
+        # Get items for all orders in one batched query
+        items_by_order = load_order_items(cursor, [order['id'] for order in orders])
         for order in orders:
-            cursor.execute("""
-                SELECT oi.*, p.name as product_name, p.unit_type 
-                FROM order_items oi 
-                JOIN products p ON oi.product_id = p.id 
-                WHERE oi.order_id = %s
-            """, (order['id'],))
-            order['items'] = cursor.fetchall()
+            order['items'] = items_by_order[order['id']]
             
             # Add pricing status for frontend badge
             order['pricing_badge'] = 'Awaiting Price Confirmation' if order['pricing_status'] == 'pending_pricing' else 'Price Confirmed'
@@ -2059,42 +2554,8 @@ def get_hotel_bills(current_user):
 
         bills = cursor.fetchall()
         
-        # Add bill status badge and calculate/hide prices based on status
+        # Add bill status badge and hide prices based on status
         for bill in bills:
-            # ALWAYS recalculate from order_items for non-draft bills
-            if bill['bill_status'] != 'draft':
-                print(f"[{datetime.now()}] Recalculating bill {bill['id']} for order {bill['order_id']}, current DB values: total_amount={bill.get('total_amount')}, amount={bill.get('amount')}")
-                
-                calc_cursor = conn.cursor(dictionary=True)
-                # First check what items exist
-                calc_cursor.execute("""
-                    SELECT product_id, quantity, price_at_order
-                    FROM order_items
-                    WHERE order_id = %s
-                """, (bill['order_id'],))
-                items = calc_cursor.fetchall()
-                print(f"[{datetime.now()}] Found {len(items)} items for order {bill['order_id']}: {items}")
-                
-                # Now calculate total
-                calc_cursor.execute("""
-                    SELECT SUM(price_at_order * quantity) as calculated_total
-                    FROM order_items
-                    WHERE order_id = %s AND price_at_order IS NOT NULL
-                """, (bill['order_id'],))
-                
-                result = calc_cursor.fetchone()
-                calc_cursor.close()
-                
-                print(f"[{datetime.now()}] Calculation result: {result}")
-                
-                if result and result['calculated_total']:
-                    calculated = float(result['calculated_total'])
-                    bill['total_amount'] = calculated
-                    bill['amount'] = calculated
-                    print(f"[{datetime.now()}] ✅ Hotel bill {bill['id']} updated to ₹{calculated}")
-                else:
-                    print(f"[{datetime.now()}] ⚠️ No calculated total for bill {bill['id']}, keeping DB values")
-            
             # Set status badges
             if bill['bill_status'] == 'draft':
                 bill['status_badge'] = '⏳ Awaiting Price Finalization'
@@ -2356,15 +2817,11 @@ def create_hotel_order(current_user):
         user_id = current_user['id']
         print(f"[{datetime.now()}] Processing order for user {user_id}...")
         
-        # Verify products exist and are available, get names for message
+        # Verify products exist and are available (one query), get names for message
+        products = load_products(cursor, [item['product_id'] for item in data['items']])
         order_items_details = []  # List to hold formatted item strings
         for item in data['items']:
-            cursor.execute("""
-                SELECT is_available, name, unit_type 
-                FROM products 
-                WHERE id = %s
-            """, (item['product_id'],))
-            product = cursor.fetchone()
+            product = products.get(int(item['product_id']))
             if not product:
                 print(f"[{datetime.now()}] ERROR: Product {item['product_id']} not found")
                 return jsonify({'error': f"Product with ID {item['product_id']} not found"}), 400
@@ -2395,13 +2852,11 @@ def create_hotel_order(current_user):
         print(f"[{datetime.now()}] Order created: ID #{order_id} (pricing_status=pending_pricing)")
 
         # Create order items with price_at_order = NULL (will be filled when prices finalized)
-        cursor = conn.cursor()  # Switch back to tuple cursor for inserts
         print(f"[{datetime.now()}] Adding {len(data['items'])} items with NULL prices...")
-        for item in data['items']:
-            cursor.execute("""
-                INSERT INTO order_items (order_id, product_id, quantity, price_at_order)
-                VALUES (%s, %s, %s, NULL)
-            """, (order_id, item['product_id'], item['quantity']))
+        cursor.executemany("""
+            INSERT INTO order_items (order_id, product_id, quantity, price_at_order)
+            VALUES (%s, %s, %s, NULL)
+        """, [(order_id, item['product_id'], item['quantity']) for item in data['items']])
         print(f"[{datetime.now()}] Items added successfully")
 
         # Create bill as DRAFT with total_amount = 0
@@ -2421,6 +2876,7 @@ def create_hotel_order(current_user):
         ))
         bill_id = cursor.lastrowid
         conn.commit()
+        invalidate_dashboard_cache()
         print(f"[{datetime.now()}] Draft Bill created: ID #{bill_id} for order #{order_id}")
 
         print(f"[{datetime.now()}] Order #{order_id} fully processed")
@@ -2571,6 +3027,7 @@ def get_products(current_user):
 @app.route('/api/admin/analytics', methods=['GET'])
 @token_required
 @admin_required
+@read_replica
 def get_admin_analytics(current_user):
     """Comprehensive analytics for admin dashboard"""
     try:
@@ -2592,111 +3049,164 @@ def get_admin_analytics(current_user):
         logger.error(f"Traceback: {traceback.format_exc()}")
         return jsonify({'error': f'Failed to fetch analytics: {str(e)}'}), 500
 
+# Seconds the admin dashboard stats are served from cache
+DASHBOARD_CACHE_TTL = float(os.environ.get('DASHBOARD_CACHE_TTL', '30'))
+
+_dashboard_cache = {'stats': None, 'computed_at': None, 'expires': 0.0, 'generation': 0}
+_dashboard_cache_lock = threading.Lock()
+
+
+def invalidate_dashboard_cache():
+    """Drop the cached dashboard stats (call after orders are created or change status)"""
+    with _dashboard_cache_lock:
+        _dashboard_cache['expires'] = 0.0
+        _dashboard_cache['generation'] += 1
+
+
+def compute_dashboard_stats(cursor):
+    """Compute the admin dashboard counters (one aggregation query) and recent lists"""
+    cursor.execute("""
+        SELECT
+            (SELECT COUNT(*) FROM users WHERE role = 'hotel') AS total_hotels,
+            (SELECT COUNT(*) FROM products WHERE is_available = 1) AS total_products,
+            COUNT(*) AS total_orders,
+            COALESCE(SUM(CASE WHEN status != 'cancelled' THEN total_amount END), 0) AS total_revenue,
+            COALESCE(SUM(status = 'pending'), 0) AS pending_orders,
+            COALESCE(SUM(CASE WHEN status != 'cancelled' AND order_date >= %s AND order_date < %s
+                              THEN total_amount END), 0) AS this_month_revenue
+        FROM orders
+    """, month_range())
+    counters = cursor.fetchone()
+
+    # Recent orders
+    cursor.execute("""
+        SELECT o.*, u.hotel_name 
+        FROM orders o 
+        JOIN users u ON o.user_id = u.id 
+        ORDER BY o.order_date DESC 
+        LIMIT 10
+    """)
+    recent_orders = cursor.fetchall()
+
+    # Recent hotels
+    cursor.execute("""
+        SELECT username, hotel_name, email, created_at 
+        FROM users 
+        WHERE role = 'hotel' 
+        ORDER BY created_at DESC 
+        LIMIT 5
+    """)
+    recent_hotels = cursor.fetchall()
+
+    return {
+        'total_hotels': int(counters['total_hotels']),
+        'total_orders': int(counters['total_orders']),
+        'total_revenue': float(counters['total_revenue']),
+        'pending_orders': int(counters['pending_orders']),
+        'total_products': int(counters['total_products']),
+        'this_month_revenue': float(counters['this_month_revenue']),
+        'recent_orders': recent_orders,
+        'recent_hotels': recent_hotels
+    }
+
+
 @app.route('/api/admin/dashboard', methods=['GET'])
 @token_required
 @admin_required
 def get_admin_dashboard(current_user):
-    """Admin dashboard overview"""
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-
-    try:
-        # Total statistics
-        cursor.execute("SELECT COUNT(*) as total_hotels FROM users WHERE role = 'hotel'")
-        total_hotels = cursor.fetchone()['total_hotels']
-
-        cursor.execute("SELECT COUNT(*) as total_orders FROM orders")
-        total_orders = cursor.fetchone()['total_orders']
-
-        cursor.execute("SELECT SUM(total_amount) as total_revenue FROM orders WHERE status != 'cancelled'")
-        total_revenue = cursor.fetchone()['total_revenue'] or 0
-
-        cursor.execute("SELECT COUNT(*) as pending_orders FROM orders WHERE status = 'pending'")
-        pending_orders = cursor.fetchone()['pending_orders']
-
-        cursor.execute("SELECT COUNT(*) as total_products FROM products WHERE is_available = 1")
-        total_products = cursor.fetchone()['total_products']
-
-        # Recent orders
-        cursor.execute("""
-            SELECT o.*, u.hotel_name 
-            FROM orders o 
-            JOIN users u ON o.user_id = u.id 
-            ORDER BY o.order_date DESC 
-            LIMIT 10
-        """)
-        recent_orders = cursor.fetchall()
-
-        # Recent hotels
-        cursor.execute("""
-            SELECT username, hotel_name, email, created_at 
-            FROM users 
-            WHERE role = 'hotel' 
-            ORDER BY created_at DESC 
-            LIMIT 5
-        """)
-        recent_hotels = cursor.fetchall()
-
-        # This month revenue
-        cursor.execute("""
-            SELECT SUM(total_amount) as this_month_revenue 
-            FROM orders 
-            WHERE MONTH(order_date) = MONTH(CURRENT_DATE()) 
-            AND YEAR(order_date) = YEAR(CURRENT_DATE())
-            AND status != 'cancelled'
-        """)
-        this_month_revenue = cursor.fetchone()
-
-        stats = {
-            'total_hotels': total_hotels,
-            'total_orders': total_orders,
-            'total_revenue': float(total_revenue),
-            'pending_orders': pending_orders,
-            'total_products': total_products,
-            'this_month_revenue': float(this_month_revenue['this_month_revenue'] or 0),
-            'recent_orders': recent_orders,
-            'recent_hotels': recent_hotels
-        }
+    """Admin dashboard overview (cached for DASHBOARD_CACHE_TTL seconds)"""
+    now = time.monotonic()
+    with _dashboard_cache_lock:
+        if _dashboard_cache['stats'] is not None and now < _dashboard_cache['expires']:
+            stats, computed_at = _dashboard_cache['stats'], _dashboard_cache['computed_at']
+        else:
+            stats = None
+            generation = _dashboard_cache['generation']
 
-        return jsonify(stats)
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
-    finally:
-        cursor.close()
-        conn.close()
+    if stats is None:
+        conn = get_db_connection()
+        cursor = conn.cursor(dictionary=True)
+        try:
+            stats = compute_dashboard_stats(cursor)
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+        finally:
+            cursor.close()
+            conn.close()
+        computed_at = datetime.now()
+        with _dashboard_cache_lock:
+            # Don't cache stats an order write invalidated while they were being computed
+            if _dashboard_cache['generation'] == generation:
+                _dashboard_cache.update(stats=stats, computed_at=computed_at, expires=now + DASHBOARD_CACHE_TTL)
 
+    return jsonify({
+        **stats,
+        'computed_at': computed_at.isoformat(),
+        'data_age_seconds': round((datetime.now() - computed_at).total_seconds(), 1)
+    })
 
 @app.route('/api/admin/orders', methods=['GET'])
 @token_required
 @admin_required
 def get_all_orders(current_user):
-    """Get all orders for admin, optionally filtered by user_id"""
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
+    """
+    Get all orders for admin, optionally filtered by user_id.
+
+    Query params:
+        limit: page size (max LISTING_MAX_LIMIT); returns {orders, next_cursor, has_more}
+        cursor: next_cursor from the previous page (keyset on order_date, id)
+        stream: '1' streams the whole (filtered) listing as a JSON array
+    """
     try:
         user_id_filter = request.args.get('user_id')
-        base_query = """
+        limit = request.args.get('limit', type=int)
+        after = request.args.get('cursor')
+        stream = request.args.get('stream') in ('1', 'true')
+
+        select_query = """
             SELECT o.*, u.hotel_name, u.phone, u.email
             FROM orders o
             JOIN users u ON o.user_id = u.id
         """
+        conditions = []
         params = []
         if user_id_filter:
-            base_query += " WHERE o.user_id = %s"
+            conditions.append("o.user_id = %s")
             params.append(int(user_id_filter))
-        base_query += " ORDER BY o.order_date DESC"
-        cursor.execute(base_query, params)
+        if stream:
+            return stream_json_array(select_query, conditions, params, ('o.order_date', 'order_date'), ('o.id', 'id'),
+                                     transform=attach_order_items)
+        if after:
+            after_date, after_id = decode_keyset_cursor(after, 2)
+            conditions.append("(o.order_date < %s OR (o.order_date = %s AND o.id < %s))")
+            params.extend([after_date, after_date, int(after_id)])
+        base_query = select_query
+        if conditions:
+            base_query += " WHERE " + " AND ".join(conditions)
+        base_query += " ORDER BY o.order_date DESC, o.id DESC"
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        if limit:
+            limit = max(1, min(limit, LISTING_MAX_LIMIT))
+            cursor.execute(base_query + " LIMIT %s", params + [limit + 1])
+        else:
+            cursor.execute(base_query, params)
         orders = cursor.fetchall()
-        # Get items for each order
+        has_more = bool(limit) and len(orders) > limit
+        if has_more:
+            orders = orders[:limit]
+        # Get items for all orders in one batched query
+        items_by_order = load_order_items(cursor, [order['id'] for order in orders])
         for order in orders:
-            cursor.execute("""
-                SELECT oi.*, p.name as product_name, p.unit_type
-                FROM order_items oi
-                JOIN products p ON oi.product_id = p.id
-                WHERE oi.order_id = %s
-            """, (order['id'],))
-            order['items'] = cursor.fetchall()
-        return jsonify(orders)
+            order['items'] = items_by_order[order['id']]
+        if not limit:
+            return jsonify(orders)
+        next_cursor = encode_keyset_cursor(orders[-1]['order_date'], orders[-1]['id']) if has_more else None
+        return jsonify({'orders': orders, 'next_cursor': next_cursor, 'has_more': has_more})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
     finally:
@@ -2806,6 +3316,7 @@ def update_order_status(current_user, order_id):
         """, (new_status, datetime.now(), order_id))
 
         conn.commit()
+        invalidate_dashboard_cache()
 
         if cursor.rowcount == 0:
             return jsonify({'error': 'Order not found'}), 404
@@ -2837,15 +3348,13 @@ def get_pending_pricing_orders(current_user):
 
         orders = cursor.fetchall()
 
-        # Get items for each order
+        # Get items for all orders in one batched query
+        items_by_order = load_order_items(
+            cursor, [order['id'] for order in orders],
+            columns=ORDER_ITEM_COLUMNS + ", p.price_per_unit as current_price"
+        )
         for order in orders:
-            cursor.execute("""
-                SELECT oi.*, p.name as product_name, p.unit_type, p.price_per_unit as current_price
-                FROM order_items oi 
-                JOIN products p ON oi.product_id = p.id 
-                WHERE oi.order_id = %s
-            """, (order['id'],))
-            order['items'] = cursor.fetchall()
+            order['items'] = items_by_order[order['id']]
 
         return jsonify({'pending_orders': orders})
     except Exception as e:
@@ -2858,6 +3367,7 @@ def get_pending_pricing_orders(current_user):
 @app.route('/api/admin/orders/todays-vegetables', methods=['GET'])
 @token_required
 @admin_required
+@read_replica
 def get_todays_vegetables(current_user):
     """
     Get aggregated list of vegetables for today's delivery (from yesterday's orders)
@@ -2891,23 +3401,7 @@ def get_todays_vegetables(current_user):
         print(f"[{datetime.now()}] Today's vegetables - Order date (Day X): {target_date} → Delivery date (Day X+1): {now.date()}")
         
         # Get vegetables from ALL orders placed on target_date (not just pending pricing)
-        cursor.execute("""
-            SELECT 
-                p.id as product_id,
-                p.name as product_name,
-                p.category,
-                p.unit_type,
-                SUM(oi.quantity) as total_quantity,
-                COUNT(DISTINCT o.id) as order_count,
-                DATE(o.order_date) as order_date
-            FROM orders o
-            JOIN order_items oi ON o.id = oi.order_id
-            JOIN products p ON oi.product_id = p.id
-            WHERE DATE(o.order_date) = %s
-            AND o.status != 'cancelled'
-            GROUP BY p.id, p.name, p.category, p.unit_type, DATE(o.order_date)
-            ORDER BY p.category, p.name
-        """, (target_date,))
+        cursor.execute(DAY_VEGETABLES_SQL, day_range(target_date))
         
         print(f"[{datetime.now()}] Found {cursor.rowcount} vegetable records from {target_date}")
         
@@ -2946,6 +3440,7 @@ def get_todays_vegetables(current_user):
 @app.route('/api/admin/orders/todays-hotels-orders', methods=['GET'])
 @token_required
 @admin_required
+@read_replica
 def get_todays_hotels_orders(current_user):
     """
     Get today's orders grouped by hotel (from yesterday's orders)
@@ -2978,45 +3473,18 @@ def get_todays_hotels_orders(current_user):
         print(f"[{datetime.now()}] Today's hotels orders - Order date (Day X): {target_date} → Delivery date (Day X+1): {now.date()}")
         
         # Get all orders from target_date with hotel details
-        cursor.execute("""
-            SELECT 
-                o.id as order_id,
-                o.order_date,
-                o.delivery_date,
-                o.total_amount,
-                o.status,
-                o.pricing_status,
-                o.special_instructions,
-                u.id as hotel_id,
-                u.hotel_name,
-                u.email,
-                u.phone,
-                u.address
-            FROM orders o
-            JOIN users u ON o.user_id = u.id
-            WHERE DATE(o.order_date) = %s
-            AND o.status != 'cancelled'
-            ORDER BY u.hotel_name, o.id
-        """, (target_date,))
+        cursor.execute(DAY_HOTEL_ORDERS_SQL, day_range(target_date))
         
         orders = cursor.fetchall()
         
-        # Get items for each order
+        # Get items for all orders in one batched query
+        items_by_order = load_order_items(
+            cursor, [order['order_id'] for order in orders],
+            columns="oi.product_id, oi.quantity, oi.price_at_order, p.name as product_name, p.unit_type, p.category",
+            order_by="p.category, p.name"
+        )
         for order in orders:
-            cursor.execute("""
-                SELECT 
-                    oi.product_id,
-                    oi.quantity,
-                    oi.price_at_order,
-                    p.name as product_name,
-                    p.unit_type,
-                    p.category
-                FROM order_items oi
-                JOIN products p ON oi.product_id = p.id
-                WHERE oi.order_id = %s
-                ORDER BY p.category, p.name
-            """, (order['order_id'],))
-            order['items'] = cursor.fetchall()
+            order['items'] = items_by_order[order['order_id']]
         
         return jsonify({
             'date': date_str,
@@ -3037,6 +3505,7 @@ def get_todays_hotels_orders(current_user):
 @app.route('/api/admin/orders/vegetables-history', methods=['GET'])
 @token_required
 @admin_required
+@read_replica
 def get_vegetables_history(current_user):
     """Get aggregated vegetables for a specific date (history view)"""
     conn = get_db_connection()
@@ -3066,23 +3535,7 @@ def get_vegetables_history(current_user):
         print(f"[{datetime.now()}] ========================================")
         
         # Get vegetables from orders placed on target_date (day before)
-        cursor.execute("""
-            SELECT 
-                p.id as product_id,
-                p.name as product_name,
-                p.category,
-                p.unit_type,
-                SUM(oi.quantity) as total_quantity,
-                COUNT(DISTINCT o.id) as order_count,
-                DATE(o.order_date) as order_date
-            FROM orders o
-            JOIN order_items oi ON o.id = oi.order_id
-            JOIN products p ON oi.product_id = p.id
-            WHERE DATE(o.order_date) = %s
-            AND o.status != 'cancelled'
-            GROUP BY p.id, p.name, p.category, p.unit_type, DATE(o.order_date)
-            ORDER BY p.category, p.name
-        """, (target_date,))
+        cursor.execute(DAY_VEGETABLES_SQL, day_range(target_date))
         
         vegetables = cursor.fetchall()
         
@@ -3125,6 +3578,7 @@ def get_vegetables_history(current_user):
 @app.route('/api/admin/orders/todays-filling', methods=['GET'])
 @token_required
 @admin_required
+@read_replica
 def get_todays_filling(current_user):
     """
     Get today's orders in matrix format (products x hotels)
@@ -3157,37 +3611,12 @@ def get_todays_filling(current_user):
         print(f"[{datetime.now()}] Today's filling matrix - Order date (Day X): {target_date} → Delivery date (Day X+1): {now.date()}")
         
         # Get all hotels with orders on target_date
-        cursor.execute("""
-            SELECT DISTINCT
-                u.id as hotel_id,
-                u.hotel_name
-            FROM orders o
-            JOIN users u ON o.user_id = u.id
-            WHERE DATE(o.order_date) = %s
-            AND o.status != 'cancelled'
-            ORDER BY u.hotel_name
-        """, (target_date,))
+        cursor.execute(DAY_FILLING_HOTELS_SQL, day_range(target_date))
         
         hotels = cursor.fetchall()
         
         # Get all products ordered on target_date with quantities per hotel
-        cursor.execute("""
-            SELECT 
-                p.id as product_id,
-                p.name as product_name,
-                p.unit_type,
-                p.category,
-                u.id as hotel_id,
-                SUM(oi.quantity) as quantity
-            FROM orders o
-            JOIN users u ON o.user_id = u.id
-            JOIN order_items oi ON o.id = oi.order_id
-            JOIN products p ON oi.product_id = p.id
-            WHERE DATE(o.order_date) = %s
-            AND o.status != 'cancelled'
-            GROUP BY p.id, p.name, p.unit_type, p.category, u.id
-            ORDER BY p.category, p.name
-        """, (target_date,))
+        cursor.execute(DAY_FILLING_ITEMS_SQL, day_range(target_date))
         
         items = cursor.fetchall()
         
@@ -3228,6 +3657,7 @@ def get_todays_filling(current_user):
 @app.route('/api/admin/orders/filling-history', methods=['GET'])
 @token_required
 @admin_required
+@read_replica
 def get_filling_history(current_user):
     """Get filling orders for a specific date in matrix format (history view)"""
     conn = get_db_connection()
@@ -3248,37 +3678,12 @@ def get_filling_history(current_user):
         print(f"[{datetime.now()}] Filling History Matrix for {selected_date} - showing orders from: {target_date}")
         
         # Get all hotels with orders on target_date
-        cursor.execute("""
-            SELECT DISTINCT
-                u.id as hotel_id,
-                u.hotel_name
-            FROM orders o
-            JOIN users u ON o.user_id = u.id
-            WHERE DATE(o.order_date) = %s
-            AND o.status != 'cancelled'
-            ORDER BY u.hotel_name
-        """, (target_date,))
+        cursor.execute(DAY_FILLING_HOTELS_SQL, day_range(target_date))
         
         hotels = cursor.fetchall()
         
         # Get all products ordered on target_date with quantities per hotel
-        cursor.execute("""
-            SELECT 
-                p.id as product_id,
-                p.name as product_name,
-                p.unit_type,
-                p.category,
-                u.id as hotel_id,
-                SUM(oi.quantity) as quantity
-            FROM orders o
-            JOIN users u ON o.user_id = u.id
-            JOIN order_items oi ON o.id = oi.order_id
-            JOIN products p ON oi.product_id = p.id
-            WHERE DATE(o.order_date) = %s
-            AND o.status != 'cancelled'
-            GROUP BY p.id, p.name, p.unit_type, p.category, u.id
-            ORDER BY p.category, p.name
-        """, (target_date,))
+        cursor.execute(DAY_FILLING_ITEMS_SQL, day_range(target_date))
         
         items = cursor.fetchall()
         
@@ -3322,6 +3727,7 @@ def get_filling_history(current_user):
 @app.route('/api/admin/orders/hotels-orders-history', methods=['GET'])
 @token_required
 @admin_required
+@read_replica
 def get_hotels_orders_history(current_user):
     """Get hotels orders for a specific date (history view)"""
     conn = get_db_connection()
@@ -3347,46 +3753,20 @@ def get_hotels_orders_history(current_user):
         print(f"[{datetime.now()}] Hotels Orders History for {selected_date} - showing orders from: {target_date}")
         
         # Get orders with hotel details
-        cursor.execute("""
-            SELECT 
-                o.id as order_id,
-                o.order_date,
-                o.delivery_date,
-                o.status,
-                o.pricing_status,
-                o.special_instructions,
-                u.id as hotel_id,
-                u.hotel_name,
-                u.email,
-                u.phone,
-                u.address
-            FROM orders o
-            JOIN users u ON o.user_id = u.id
-            WHERE DATE(o.order_date) = %s
-            AND o.status != 'cancelled'
-            ORDER BY u.hotel_name, o.id
-        """, (target_date,))
+        cursor.execute(DAY_HOTEL_ORDERS_HISTORY_SQL, day_range(target_date))
         
         orders = cursor.fetchall()
         
         print(f"[{datetime.now()}] Found {len(orders)} orders from {target_date} for viewing on {selected_date}")
         
-        # Fetch items for each order
+        # Fetch items for all orders in one batched query
+        items_by_order = load_order_items(
+            cursor, [order['order_id'] for order in orders],
+            columns="oi.product_id, p.name as product_name, oi.quantity, oi.price_at_order, p.unit_type, p.category",
+            order_by="p.name"
+        )
         for order in orders:
-            cursor.execute("""
-                SELECT 
-                    oi.product_id,
-                    p.name as product_name,
-                    oi.quantity,
-                    oi.price_at_order,
-                    p.unit_type,
-                    p.category
-                FROM order_items oi
-                JOIN products p ON oi.product_id = p.id
-                WHERE oi.order_id = %s
-                ORDER BY p.name
-            """, (order['order_id'],))
-            order['items'] = cursor.fetchall()
+            order['items'] = items_by_order[order['order_id']]
         
         return jsonify({
             'date': date_str,
@@ -3483,18 +3863,21 @@ def finalize_order_prices(current_user, order_id):
             WHERE order_id = %s
         """, (total_amount, total_amount, now, datetime.now().strftime('%Y-%m-%d'), order_id))
         
-        print(f"[{datetime.now()}] Bill updated for order {order_id} with total_amount={total_amount}")
-        
         # Update order with finalized pricing status and auto-confirm
         cursor.execute("""
             UPDATE orders 
             SET pricing_status = 'prices_finalized', price_locked_at = %s, total_amount = %s, status = 'confirmed', updated_at = %s
             WHERE id = %s
         """, (now, total_amount, now, order_id))
+
+        # Store the total of all priced items (including any not in this request) in the same transaction
+        total_amount = sync_order_totals(cursor, order_id)
+        print(f"[{datetime.now()}] Bill updated for order {order_id} with total_amount={total_amount}")
         
         print(f"[{datetime.now()}] Order updated with pricing_status=prices_finalized, status=confirmed, total_amount={total_amount}")
         
         conn.commit()
+        invalidate_dashboard_cache()
         print(f"[{datetime.now()}] Transaction committed successfully")
         
         return jsonify({
@@ -4154,13 +4537,10 @@ def admin_create_order(current_user):
         # Calculate total and validate items
         total_amount = 0.0
         order_items_details = []
+        products = load_products(cursor, [item['product_id'] for item in data['items']])
+        item_rows = []
         for item in data['items']:
-            cursor.execute("""
-                SELECT price_per_unit, is_available, name, unit_type
-                FROM products
-                WHERE id = %s
-            """, (item['product_id'],))
-            product = cursor.fetchone()
+            product = products.get(int(item['product_id']))
             if not product:
                 return jsonify({'error': f"Product with ID {item['product_id']} not found"}), 400
             if not product['is_available']:
@@ -4169,6 +4549,7 @@ def admin_create_order(current_user):
             quantity = float(item['quantity'])
             item_total = price * quantity
             total_amount += item_total
+            item_rows.append((item['product_id'], item['quantity'], price))
             item_str = f"{product['name']} :{quantity}{product['unit_type']} | ₹{item_total:.0f}"
             order_items_details.append(item_str)
         print(f"[{datetime.now()}] Total calculated: ₹{total_amount}")
@@ -4188,16 +4569,11 @@ def admin_create_order(current_user):
         ))
         order_id = cursor.lastrowid
         print(f"[{datetime.now()}] Order created: ID #{order_id}")
-        # Create order items
-        cursor = conn.cursor()
-        for item in data['items']:
-            cursor.execute("SELECT price_per_unit FROM products WHERE id = %s", (item['product_id'],))
-            price_at_order_result = cursor.fetchone()
-            price_at_order = float(price_at_order_result[0])
-            cursor.execute("""
-                INSERT INTO order_items (order_id, product_id, quantity, price_at_order)
-                VALUES (%s, %s, %s, %s)
-            """, (order_id, item['product_id'], item['quantity'], price_at_order))
+        # Create order items at the prices validated above
+        cursor.executemany("""
+            INSERT INTO order_items (order_id, product_id, quantity, price_at_order)
+            VALUES (%s, %s, %s, %s)
+        """, [(order_id, product_id, quantity, price) for product_id, quantity, price in item_rows])
         print(f"[{datetime.now()}] Items added successfully")
         # Create bill automatically
         due_date = (datetime.now() + timedelta(days=10)).strftime('%Y-%m-%d')
@@ -4216,6 +4592,7 @@ def admin_create_order(current_user):
         ))
         bill_id = cursor.lastrowid
         conn.commit()
+        invalidate_dashboard_cache()
         print(f"[{datetime.now()}] Bill created: ID #{bill_id} for order #{order_id}. Admin order fully processed.")
         return jsonify({
             'order_id': order_id,
@@ -4262,61 +4639,59 @@ def get_single_user(current_user, user_id):
 @token_required
 @admin_required
 def get_all_bills(current_user):
-    """Get all bills for admin, optionally filtered by user_id"""
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
+    """
+    Get all bills for admin, optionally filtered by user_id.
+
+    Query params:
+        limit: page size (max LISTING_MAX_LIMIT); returns {bills, next_cursor, has_more}
+        cursor: next_cursor from the previous page (keyset on bill_date, id)
+        stream: '1' streams the whole (filtered) listing as a JSON array
+    """
     try:
         user_id_filter = request.args.get('user_id')
-        base_query = """
+        limit = request.args.get('limit', type=int)
+        after = request.args.get('cursor')
+        stream = request.args.get('stream') in ('1', 'true')
+
+        select_query = """
             SELECT b.*, o.order_date, u.hotel_name, u.email, b.comments
             FROM bills b
             JOIN orders o ON b.order_id = o.id
             JOIN users u ON o.user_id = u.id
         """
+        conditions = []
         params = []
         if user_id_filter:
-            base_query += " WHERE o.user_id = %s"
+            conditions.append("o.user_id = %s")
             params.append(int(user_id_filter))
-        base_query += " ORDER BY b.bill_date DESC"
-        cursor.execute(base_query, params)
+        if stream:
+            return stream_json_array(select_query, conditions, params, ('b.bill_date', 'bill_date'), ('b.id', 'id'))
+        if after:
+            after_date, after_id = decode_keyset_cursor(after, 2)
+            conditions.append("(b.bill_date < %s OR (b.bill_date = %s AND b.id < %s))")
+            params.extend([after_date, after_date, int(after_id)])
+        base_query = select_query
+        if conditions:
+            base_query += " WHERE " + " AND ".join(conditions)
+        base_query += " ORDER BY b.bill_date DESC, b.id DESC"
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        if limit:
+            limit = max(1, min(limit, LISTING_MAX_LIMIT))
+            cursor.execute(base_query + " LIMIT %s", params + [limit + 1])
+        else:
+            cursor.execute(base_query, params)
         bills = cursor.fetchall()
-        
-        # ALWAYS recalculate totals from order_items for non-draft bills
-        for bill in bills:
-            if bill['bill_status'] != 'draft':
-                print(f"[{datetime.now()}] Admin: Recalculating bill {bill['id']} for order {bill['order_id']}, current DB values: total_amount={bill.get('total_amount')}, amount={bill.get('amount')}")
-                
-                calc_cursor = conn.cursor(dictionary=True)
-                # First check what items exist
-                calc_cursor.execute("""
-                    SELECT product_id, quantity, price_at_order
-                    FROM order_items
-                    WHERE order_id = %s
-                """, (bill['order_id'],))
-                items = calc_cursor.fetchall()
-                print(f"[{datetime.now()}] Admin: Found {len(items)} items for order {bill['order_id']}: {items}")
-                
-                # Now calculate total
-                calc_cursor.execute("""
-                    SELECT SUM(price_at_order * quantity) as calculated_total
-                    FROM order_items
-                    WHERE order_id = %s AND price_at_order IS NOT NULL
-                """, (bill['order_id'],))
-                
-                result = calc_cursor.fetchone()
-                calc_cursor.close()
-                
-                print(f"[{datetime.now()}] Admin: Calculation result: {result}")
-                
-                if result and result['calculated_total']:
-                    calculated = float(result['calculated_total'])
-                    bill['total_amount'] = calculated
-                    bill['amount'] = calculated
-                    print(f"[{datetime.now()}] ✅ Admin bill {bill['id']} updated to ₹{calculated}")
-                else:
-                    print(f"[{datetime.now()}] ⚠️ Admin: No calculated total for bill {bill['id']}, keeping DB values")
-        
-        return jsonify(bills)
+        if not limit:
+            return jsonify(bills)
+        has_more = len(bills) > limit
+        bills = bills[:limit]
+        next_cursor = encode_keyset_cursor(bills[-1]['bill_date'], bills[-1]['id']) if has_more else None
+        return jsonify({'bills': bills, 'next_cursor': next_cursor, 'has_more': has_more})
     except Exception as e:
         print(f"[{datetime.now()}] Error fetching admin bills: {str(e)}")
         return jsonify({'error': str(e)}), 500
@@ -4391,20 +4766,13 @@ def create_bill(current_user):
 @app.route('/api/admin/analytics/trends', methods=['GET'])
 @token_required
 @admin_required
+@read_replica
 def get_analytics_trends(current_user):
-    # Daily/weekly/monthly revenue from orders
+    # Daily revenue from orders over the last REVENUE_TREND_DAYS days
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
     try:
-        cursor.execute("""
-            SELECT 
-                DATE(order_date) as date,
-                SUM(total_amount) as revenue
-            FROM orders 
-            WHERE status != 'cancelled'
-            GROUP BY DATE(order_date)
-            ORDER BY date DESC LIMIT 30
-        """)
+        cursor.execute(REVENUE_TRENDS_SQL, trend_range())
         trends = cursor.fetchall()
         return jsonify({'trends': trends})
     except Exception as e:
@@ -4786,40 +5154,40 @@ def update_hotel_profile(current_user):
 @token_required
 @admin_required
 def get_support_tickets(current_user):
-    conn = get_db_connection()
-    cur = conn.cursor(dictionary=True)
-    cur.execute("""
-        SELECT t.*, u.hotel_name, u.email 
-        FROM support_tickets t 
-        LEFT JOIN users u ON t.userid = u.id  -- Fixed: userid
-        ORDER BY t.created_at DESC
-    """)
-    tickets = cur.fetchall()
-    cur.close(); conn.close()
+    with db_connection() as conn:
+        cur = conn.cursor(dictionary=True)
+        cur.execute("""
+            SELECT t.*, u.hotel_name, u.email 
+            FROM support_tickets t 
+            LEFT JOIN users u ON t.userid = u.id  -- Fixed: userid
+            ORDER BY t.created_at DESC
+        """)
+        tickets = cur.fetchall()
+        cur.close()
     return jsonify(tickets)
 
 @app.route('/api/admin/support/tickets/<int:ticket_id>', methods=['GET'])
 @token_required
 @admin_required
 def get_support_ticket(current_user, ticket_id):
-    conn = get_db_connection()
-    cur = conn.cursor(dictionary=True)
+    with db_connection() as conn:
+        cur = conn.cursor(dictionary=True)
 
-    cur.execute("SELECT * FROM support_tickets WHERE id=%s", (ticket_id,))
-    ticket = cur.fetchone()
-    if not ticket:
-        cur.close(); conn.close()
-        return jsonify({'error': 'Ticket not found'}), 404
+        cur.execute("SELECT * FROM support_tickets WHERE id=%s", (ticket_id,))
+        ticket = cur.fetchone()
+        if not ticket:
+            cur.close()
+            return jsonify({'error': 'Ticket not found'}), 404
+
+        cur.execute("""
+            SELECT sr.message, sr.isadmin as is_admin, sr.createdat as created_at 
+            FROM supportreplies sr  
+            WHERE sr.ticketid = %s 
+            ORDER BY sr.createdat ASC
+        """, (ticket_id,))
+        ticket['replies'] = cur.fetchall()
+        cur.close()
 
-    cur.execute("""
-        SELECT sr.message, sr.isadmin as is_admin, sr.createdat as created_at 
-        FROM supportreplies sr  
-        WHERE sr.ticketid = %s 
-        ORDER BY sr.createdat ASC
-    """, (ticket_id,))
-    ticket['replies'] = cur.fetchall()
-
-    cur.close(); conn.close()
     return jsonify(ticket)
 
 @app.route('/api/admin/support/tickets', methods=['POST'])
@@ -4830,14 +5198,14 @@ def create_support_ticket(current_user):
     if not data or 'subject' not in data or 'message' not in data:
         return jsonify({'error': 'subject & message required'}), 400
 
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute(
-        "INSERT INTO support_tickets (subject, message, status, created_at, updated_at) VALUES (%s, %s, 'open', NOW(), NOW())",  
-        (data['subject'], data['message'])
-    )
-    ticket_id = cur.lastrowid
-    conn.commit(); cur.close(); conn.close()
+    with db_connection() as conn:
+        cur = conn.cursor()
+        cur.execute(
+            "INSERT INTO support_tickets (subject, message, status, created_at, updated_at) VALUES (%s, %s, 'open', NOW(), NOW())",  
+            (data['subject'], data['message'])
+        )
+        ticket_id = cur.lastrowid
+        conn.commit(); cur.close()
     return jsonify({'id': ticket_id}), 201
 
 @app.route('/api/admin/support/tickets/<int:ticket_id>/reply', methods=['POST'])
@@ -4848,28 +5216,28 @@ def add_reply(current_user, ticket_id):
     if not data or 'message' not in data:
         return jsonify({'error': 'message required'}), 400
 
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute(
-        "INSERT INTO supportreplies (ticketid, message, isadmin) VALUES (%s, %s, 1)", 
-        (ticket_id, data['message'])
-    )
-    # Update ticket timestamp
-    cur.execute("UPDATE support_tickets SET updated_at = NOW() WHERE id = %s", (ticket_id,))
-    conn.commit(); cur.close(); conn.close()
+    with db_connection() as conn:
+        cur = conn.cursor()
+        cur.execute(
+            "INSERT INTO supportreplies (ticketid, message, isadmin) VALUES (%s, %s, 1)", 
+            (ticket_id, data['message'])
+        )
+        # Update ticket timestamp
+        cur.execute("UPDATE support_tickets SET updated_at = NOW() WHERE id = %s", (ticket_id,))
+        conn.commit(); cur.close()
     return jsonify({'message': 'reply added'})
 
 @app.route('/api/admin/support/tickets/<int:ticket_id>/close', methods=['PATCH'])
 @token_required
 @admin_required
 def close_ticket(current_user, ticket_id):
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute("UPDATE support_tickets SET status='closed', updated_at=NOW() WHERE id=%s", (ticket_id,))
-    if cur.rowcount == 0:
-        cur.close(); conn.close()
-        return jsonify({'error': 'Ticket not found'}), 404
-    conn.commit(); cur.close(); conn.close()
+    with db_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("UPDATE support_tickets SET status='closed', updated_at=NOW() WHERE id=%s", (ticket_id,))
+        if cur.rowcount == 0:
+            cur.close()
+            return jsonify({'error': 'Ticket not found'}), 404
+        conn.commit(); cur.close()
     return jsonify({'message': 'ticket closed'})
 
 # Hotel adds reply to their ticket
@@ -4954,13 +5322,13 @@ def before_request():
 @token_required
 @admin_required
 def admin_dashboard(current_user):
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute("SELECT COUNT(*) FROM orders"); total_orders = cur.fetchone()[0]
-    cur.execute("SELECT COALESCE(SUM(total_amount),0) FROM orders WHERE MONTH(created_at)=MONTH(NOW())"); month_revenue = cur.fetchone()[0]
-    cur.execute("SELECT COUNT(*) FROM orders WHERE status='pending'"); pending = cur.fetchone()[0]
-    cur.execute("SELECT COUNT(*) FROM products WHERE stock_quantity < 10"); out_of_stock = cur.fetchone()[0]
-    cur.close(); conn.close()
+    with db_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT COUNT(*) FROM orders"); total_orders = cur.fetchone()[0]
+        cur.execute("SELECT COALESCE(SUM(total_amount),0) FROM orders WHERE created_at >= %s AND created_at < %s", month_range()); month_revenue = cur.fetchone()[0]
+        cur.execute("SELECT COUNT(*) FROM orders WHERE status='pending'"); pending = cur.fetchone()[0]
+        cur.execute("SELECT COUNT(*) FROM products WHERE stock_quantity < 10"); out_of_stock = cur.fetchone()[0]
+        cur.close()
     return jsonify({
         'total_orders': total_orders,
         'month_revenue': float(month_revenue),
@@ -4969,6 +5337,19 @@ def admin_dashboard(current_user):
     })
 
 
+@app.route('/api/admin/db-pool', methods=['GET'])
+@token_required
+@admin_required
+def get_db_pool_stats(current_user):
+    """Connection pool sizing, in-use count and checkout wait statistics"""
+    stats = db_pool.stats()
+    if replica_pool is not None:
+        with _replica_state_lock:
+            replica_state = {name: value for name, value in _replica_state.items() if name != 'checked_at'}
+        stats['replica'] = {**replica_pool.stats(), **replica_state, 'max_lag_seconds': REPLICA_MAX_LAG_SECONDS}
+    return jsonify(stats), 200
+
+
 # ======================
 # ERROR HANDLERS
 # ======================
@@ -5008,4 +5389,6 @@ if __name__ == '__main__':
     
     print(f"🔧 Services: {', '.join(status) if status else 'Basic fallback mode'}")
     
+    db_pool.warm()
+    start_bill_totals_checker()
     app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+# ======================
+# MYSQL SCHEMA MIGRATIONS
+# Applies migrations/NNNN_name.sql in order and checks report query plans
+# ======================
+"""
+Versioned schema migrations for the MySQL database used by combine_api.py
+and api.py.
+
+Each file in migrations/ is named NNNN_description.sql and holds one or
+more ';'-terminated statements. Applied versions are recorded in the
+schema_migrations table, so every file runs once. CREATE INDEX statements
+for an index that already exists are skipped, so databases that were
+indexed by hand can still adopt the migration set.
+
+--explain runs EXPLAIN on the report SQL the endpoints execute (the
+constants in report_queries.py) and fails if the date-filtered tables are
+read with a full table scan. Run it against a
+database with realistic row counts; on near-empty tables MySQL may choose
+a scan regardless of indexes.
+
+Usage:
+    python db_migrate.py              # apply pending migrations
+    python db_migrate.py --status     # list applied / pending versions
+    python db_migrate.py --explain    # check report queries use an index
+"""
+
+import argparse
+import os
+import re
+import sys
+from datetime import datetime, timedelta
+
+import mysql.connector
+from mysql.connector import errorcode
+
+from report_queries import (
+    BILL_TOTAL_SYNC_SQL,
+    DAY_FILLING_HOTELS_SQL,
+    DAY_FILLING_ITEMS_SQL,
+    DAY_HOTEL_ORDERS_HISTORY_SQL,
+    DAY_HOTEL_ORDERS_SQL,
+    DAY_VEGETABLES_SQL,
+    HOTEL_MONTH_TOTAL_SQL,
+    ORDER_ITEM_COLUMNS,
+    ORDER_ITEMS_BATCH_SQL,
+    REVENUE_TRENDS_SQL,
+)
+
+# Same database as db_config in combine_api.py / api.py
+DB_CONFIG = {
+    "host": os.environ.get('DB_HOST', 'localhost'),
+    "user": os.environ.get('DB_USER', 'root'),
+    "passwd": os.environ.get('DB_PASSWORD', '123456'),
+    "database": os.environ.get('DB_NAME', 'BVS'),
+}
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+MIGRATION_FILE_RE = re.compile(r'^(\d{4})_([\w-]+)\.sql$')
+
+
+# ======================
+# MIGRATIONS
+# ======================
+def load_migrations():
+    """Return [(version, name, statements)] for every migration file, in version order"""
+    migrations = []
+    for filename in sorted(os.listdir(MIGRATIONS_DIR)):
+        match = MIGRATION_FILE_RE.match(filename)
+        if not match:
+            continue
+        with open(os.path.join(MIGRATIONS_DIR, filename), encoding='utf-8') as f:
+            sql = '\n'.join(line for line in f.read().splitlines() if not line.strip().startswith('--'))
+        statements = [statement.strip() for statement in sql.split(';') if statement.strip()]
+        migrations.append((match.group(1), match.group(2), statements))
+    return migrations
+
+
+def ensure_migrations_table(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version VARCHAR(16) PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            applied_at DATETIME NOT NULL
+        )
+    """)
+
+
+def applied_versions(cursor):
+    cursor.execute("SELECT version FROM schema_migrations")
+    return {row[0] for row in cursor.fetchall()}
+
+
+def apply_migrations(conn):
+    """Apply every pending migration; returns the number applied"""
+    cursor = conn.cursor()
+    try:
+        ensure_migrations_table(cursor)
+        done = applied_versions(cursor)
+        applied = 0
+        for version, name, statements in load_migrations():
+            if version in done:
+                continue
+            print(f"[{datetime.now()}] Applying migration {version}_{name} ({len(statements)} statements)")
+            for statement in statements:
+                try:
+                    cursor.execute(statement)
+                except mysql.connector.Error as e:
+                    if e.errno == errorcode.ER_DUP_KEYNAME:
+                        print(f"[{datetime.now()}]   index already exists, skipping: {statement.splitlines()[0]}")
+                        continue
+                    raise
+            cursor.execute(
+                "INSERT INTO schema_migrations (version, name, applied_at) VALUES (%s, %s, %s)",
+                (version, name, datetime.now())
+            )
+            conn.commit()
+            applied += 1
+        return applied
+    finally:
+        cursor.close()
+
+
+def print_status(conn):
+    cursor = conn.cursor()
+    try:
+        ensure_migrations_table(cursor)
+        done = applied_versions(cursor)
+    finally:
+        cursor.close()
+    for version, name, _ in load_migrations():
+        print(f"{version}_{name}: {'applied' if version in done else 'pending'}")
+
+
+# ======================
+# QUERY PLAN CHECK
+# ======================
+def report_query_checks():
+    """
+    Report SQL from report_queries.py with sample parameters.
+
+    Each entry is (description, sql, params, aliases); every alias in
+    aliases must be read through an index.
+    """
+    today = datetime.now().date()
+    day = (today - timedelta(days=1), today)
+    first = today.replace(day=1)
+    month = (first, (first + timedelta(days=32)).replace(day=1))
+    trend = (today - timedelta(days=29), today + timedelta(days=1))
+    order_items = ORDER_ITEMS_BATCH_SQL.format(
+        columns=ORDER_ITEM_COLUMNS, placeholders='%s, %s, %s', order_by='oi.id'
+    )
+
+    return [
+        ("day vegetables", DAY_VEGETABLES_SQL, day, ('o', 'oi')),
+        ("day hotel orders", DAY_HOTEL_ORDERS_SQL, day, ('o',)),
+        ("day hotel orders (history)", DAY_HOTEL_ORDERS_HISTORY_SQL, day, ('o',)),
+        ("day filling hotels", DAY_FILLING_HOTELS_SQL, day, ('o',)),
+        ("day filling items", DAY_FILLING_ITEMS_SQL, day, ('o', 'oi')),
+        ("hotel month total", HOTEL_MONTH_TOTAL_SQL, (1, *month), ('orders',)),
+        ("revenue trends", REVENUE_TRENDS_SQL, trend, ('orders',)),
+        ("order items for a page of orders", order_items, (1, 2, 3), ('oi',)),
+        ("bill total sync for an order", BILL_TOTAL_SYNC_SQL, (0, 0, 1), ('bills',)),
+    ]
+
+
+def check_query_plans(conn):
+    """EXPLAIN each report query; returns the number of queries that scan a filtered table"""
+    cursor = conn.cursor(dictionary=True)
+    failures = 0
+    try:
+        for description, sql, params, aliases in report_query_checks():
+            cursor.execute("EXPLAIN " + sql, params)
+            plan = {row['table']: row for row in cursor.fetchall()}
+            problems = []
+            for alias in aliases:
+                row = plan.get(alias)
+                if row is None:
+                    continue  # optimized away (e.g. impossible WHERE on an empty table)
+                if row.get('type') == 'ALL' or not row.get('key'):
+                    problems.append(f"{alias}: type={row.get('type')} key={row.get('key')}")
+            if problems:
+                failures += 1
+                print(f"FAIL  {description}: " + '; '.join(problems))
+            else:
+                keys = ', '.join(f"{alias}={plan[alias]['key']}" for alias in aliases if alias in plan)
+                print(f"ok    {description}: {keys}")
+    finally:
+        cursor.close()
+    return failures
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Apply MySQL schema migrations')
+    parser.add_argument('--status', action='store_true', help='list applied and pending migrations')
+    parser.add_argument('--explain', action='store_true', help='check that report queries use an index')
+    args = parser.parse_args(argv)
+
+    conn = mysql.connector.connect(**DB_CONFIG)
+    try:
+        if args.status:
+            print_status(conn)
+            return 0
+        if args.explain:
+            return 1 if check_query_plans(conn) else 0
+        applied = apply_migrations(conn)
+        print(f"[{datetime.now()}] {applied} migration(s) applied")
+        return 0
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
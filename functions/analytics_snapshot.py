@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+# ===================================================================
+# BHAIRAVNATH VEGETABLE SUPPLIER - COLUMNAR ANALYTICS SNAPSHOT
+# Exports orders and order items to a NumPy .npz file for ad-hoc analysis
+# ===================================================================
+"""
+Columnar snapshot of orders and order items for ad-hoc analytics.
+
+/api/admin/analytics answers a fixed set of questions from the
+analytics_counters documents. Anything else (arbitrary date ranges,
+per-category totals, hotel cohorts) would need a scan of every order and
+item in Python. This tool exports orders, order items, products and hotels
+once into a compressed NumPy .npz file, with one array per column, and
+answers queries with vectorized group-by sums over those arrays.
+
+Orders use the same rules as the analytics counters: they are dated by
+their IST order_date_key, the amount is total_amount (else total_price),
+and product revenue is quantity * price_at_order. String columns (hotel,
+product, category, status) are stored as integer codes into a lookup
+array.
+
+Products carry no cost price, so category figures are revenue and
+quantity, not margins.
+
+Needs numpy, which is not deployed with the function:
+    pip install -r requirements-tools.txt
+
+Usage:
+    python analytics_snapshot.py export snapshot.npz
+    python analytics_snapshot.py query snapshot.npz --by category --from 2026-01-01 --to 2026-04-01
+    python analytics_snapshot.py cohorts snapshot.npz
+"""
+
+import argparse
+import json
+import logging
+import sys
+from collections import defaultdict
+from datetime import datetime, timezone
+
+import numpy as np
+
+from main import ANALYTICS_EXCLUDED_ORDER_STATUSES, get_firestore_client, to_ist_date_key
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s %(message)s')
+logger = logging.getLogger('analytics_snapshot')
+
+# Group-by keys answered from order rows vs order item rows
+ORDER_GROUP_KEYS = ('day', 'month', 'hotel')
+ITEM_GROUP_KEYS = ('product', 'category')
+
+
+class SnapshotBuilder:
+    """Accumulates order, item, product and hotel rows and builds an OrderSnapshot"""
+
+    def __init__(self):
+        self._order_rows = {}
+        self._codes = {'hotel': {}, 'product': {}, 'category': {}, 'status': {}}
+        self._product_info = {}
+        self._hotel_names = {}
+        self.order_ids, self.order_day, self.order_hotel, self.order_status, self.order_amount = [], [], [], [], []
+        self.item_order_ids, self.item_product, self.item_quantity, self.item_price = [], [], [], []
+
+    def _code(self, table: str, value: str) -> int:
+        codes = self._codes[table]
+        return codes.setdefault(value, len(codes))
+
+    def add_order(self, order_id: str, order: dict) -> bool:
+        """Add one order document; returns False if it has no usable date"""
+        date_key = order.get('order_date_key') or to_ist_date_key(order.get('order_date'))
+        if not date_key:
+            return False
+        amount = order.get('total_amount')
+        self._order_rows[str(order_id)] = len(self.order_ids)
+        self.order_ids.append(str(order_id))
+        self.order_day.append(date_key)
+        self.order_hotel.append(self._code('hotel', str(order.get('user_id') or '')))
+        self.order_status.append(self._code('status', str(order.get('status', '')).lower()))
+        self.order_amount.append(float((amount if amount is not None else order.get('total_price', 0)) or 0))
+        return True
+
+    def add_item(self, order_id: str, item: dict):
+        """Add one order item; items may be added before their order"""
+        product_id = str(item.get('product_id') or '')
+        if not product_id:
+            return
+        self.item_order_ids.append(str(order_id))
+        self.item_product.append(self._code('product', product_id))
+        self.item_quantity.append(float(item.get('quantity', 0) or 0))
+        self.item_price.append(float(item.get('price_at_order') or 0))
+        self._product_info.setdefault(product_id, {'name': item.get('product_name') or 'Unknown'})
+
+    def add_product(self, product_id: str, product: dict):
+        """Record a product's name and category"""
+        self._product_info[str(product_id)] = {
+            'name': product.get('name') or product.get('product_name') or 'Unknown',
+            'category': product.get('category') or 'Other'
+        }
+
+    def add_hotel(self, user_id: str, user: dict):
+        """Record a hotel's display name"""
+        self._hotel_names[str(user_id)] = user.get('hotel_name') or user.get('username') or 'Unknown'
+
+    def build(self) -> 'OrderSnapshot':
+        """Return the snapshot; items whose order was not added are dropped"""
+        rows = [self._order_rows.get(order_id, -1) for order_id in self.item_order_ids]
+        item_order = np.array(rows, dtype=np.int32)
+        keep = item_order >= 0
+
+        product_ids = list(self._codes['product'])
+        product_category = [
+            self._code('category', self._product_info.get(product_id, {}).get('category') or 'Other')
+            for product_id in product_ids
+        ]
+        hotel_ids = list(self._codes['hotel'])
+
+        return OrderSnapshot({
+            'order_ids': np.array(self.order_ids, dtype=str),
+            'order_day': np.array(self.order_day, dtype='datetime64[D]'),
+            'order_hotel': np.array(self.order_hotel, dtype=np.int32),
+            'order_status': np.array(self.order_status, dtype=np.int16),
+            'order_amount': np.array(self.order_amount, dtype=np.float64),
+            'item_order': item_order[keep],
+            'item_product': np.array(self.item_product, dtype=np.int32)[keep],
+            'item_quantity': np.array(self.item_quantity, dtype=np.float64)[keep],
+            'item_price': np.array(self.item_price, dtype=np.float64)[keep],
+            'hotel_ids': np.array(hotel_ids, dtype=str),
+            'hotel_names': np.array([self._hotel_names.get(hotel_id, 'Unknown') for hotel_id in hotel_ids], dtype=str),
+            'product_ids': np.array(product_ids, dtype=str),
+            'product_names': np.array([self._product_info[product_id]['name'] for product_id in product_ids], dtype=str),
+            'product_category': np.array(product_category, dtype=np.int32),
+            'categories': np.array(list(self._codes['category']), dtype=str),
+            'statuses': np.array(list(self._codes['status']), dtype=str),
+            'generated_at': np.array(datetime.now(timezone.utc).isoformat()),
+        })
+
+
+class OrderSnapshot:
+    """Column arrays of one snapshot, with vectorized group-by queries"""
+
+    def __init__(self, arrays: dict):
+        self.arrays = arrays
+        for name, values in arrays.items():
+            setattr(self, name, values)
+
+    @classmethod
+    def load(cls, path: str) -> 'OrderSnapshot':
+        with np.load(path, allow_pickle=False) as data:
+            return cls({name: data[name] for name in data.files})
+
+    def save(self, path: str):
+        np.savez_compressed(path, **self.arrays)
+
+    @property
+    def item_revenue(self) -> np.ndarray:
+        return self.item_quantity * self.item_price
+
+    def order_mask(self, start=None, end=None) -> np.ndarray:
+        """Orders dated in [start, end) that count towards revenue (not cancelled/rejected)"""
+        mask = np.ones(len(self.order_day), dtype=bool)
+        if start is not None:
+            mask &= self.order_day >= np.datetime64(start, 'D')
+        if end is not None:
+            mask &= self.order_day < np.datetime64(end, 'D')
+        excluded = [code for code, status in enumerate(self.statuses) if status in ANALYTICS_EXCLUDED_ORDER_STATUSES]
+        if excluded:
+            mask &= ~np.isin(self.order_status, excluded)
+        return mask
+
+    def revenue_by(self, key: str, start=None, end=None) -> dict:
+        """
+        Sum revenue over orders dated in [start, end), grouped by key.
+
+        Args:
+            key: 'day', 'month' or 'hotel' (order totals), 'product' or 'category' (item totals)
+
+        Returns:
+            Dict of label -> {'revenue', 'orders'} for order keys or {'revenue', 'quantity'}
+            for item keys; only groups with data are included
+        """
+        mask = self.order_mask(start, end)
+
+        if key in ORDER_GROUP_KEYS:
+            if key == 'hotel':
+                codes, labels = self.order_hotel[mask], self.hotel_ids
+            else:
+                unit = 'D' if key == 'day' else 'M'
+                labels, codes = np.unique(self.order_day[mask].astype(f'datetime64[{unit}]'), return_inverse=True)
+                labels = labels.astype(str)
+            revenue = np.bincount(codes, weights=self.order_amount[mask], minlength=len(labels))
+            counts = np.bincount(codes, minlength=len(labels))
+            second = 'orders'
+        elif key in ITEM_GROUP_KEYS:
+            item_mask = mask[self.item_order]
+            codes = self.item_product[item_mask]
+            labels = self.product_ids
+            if key == 'category':
+                codes, labels = self.product_category[codes], self.categories
+            revenue = np.bincount(codes, weights=self.item_revenue[item_mask], minlength=len(labels))
+            counts = np.bincount(codes, weights=self.item_quantity[item_mask], minlength=len(labels))
+            second = 'quantity'
+        else:
+            raise ValueError(f"Unknown group-by key: {key!r}")
+
+        present = np.flatnonzero(counts)
+        return {
+            str(labels[index]): {'revenue': round(float(revenue[index]), 2), second: counts[index].item()}
+            for index in present
+        }
+
+    def hotel_cohorts(self, start=None, end=None) -> dict:
+        """
+        Revenue per month for hotels grouped by the month of their first order.
+
+        Returns:
+            Dict of cohort month -> {'hotels': count, 'revenue': {month: revenue}}
+        """
+        mask = self.order_mask()
+        months = self.order_day.astype('datetime64[M]')
+
+        # First order month per hotel, over the whole snapshot
+        first_month = np.full(len(self.hotel_ids), np.datetime64('9999-12', 'M'))
+        np.minimum.at(first_month, self.order_hotel[mask], months[mask])
+
+        mask &= self.order_mask(start, end)
+        cohort_labels, cohort_codes = np.unique(first_month[self.order_hotel[mask]], return_inverse=True)
+        month_labels, month_codes = np.unique(months[mask], return_inverse=True)
+        revenue = np.zeros((len(cohort_labels), len(month_labels)))
+        np.add.at(revenue, (cohort_codes, month_codes), self.order_amount[mask])
+
+        cohort_sizes = np.bincount(
+            np.searchsorted(cohort_labels, first_month[np.unique(self.order_hotel[mask])]),
+            minlength=len(cohort_labels)
+        )
+        return {
+            str(cohort): {
+                'hotels': int(cohort_sizes[row]),
+                'revenue': {str(month): round(float(revenue[row, col]), 2)
+                            for col, month in enumerate(month_labels) if revenue[row, col]}
+            }
+            for row, cohort in enumerate(cohort_labels)
+        }
+
+
+def export_snapshot(firestore_client, path: str) -> OrderSnapshot:
+    """Stream orders, order items, products and hotels from Firestore into a snapshot file"""
+    builder = SnapshotBuilder()
+    counts = defaultdict(int)
+
+    for product_doc in firestore_client.collection('products').stream():
+        builder.add_product(product_doc.id, product_doc.to_dict() or {})
+        counts['products'] += 1
+    for user_doc in firestore_client.collection('users').where('role', '==', 'hotel').stream():
+        builder.add_hotel(user_doc.id, user_doc.to_dict() or {})
+        counts['hotels'] += 1
+    for order_doc in firestore_client.collection('orders').stream():
+        if builder.add_order(order_doc.id, order_doc.to_dict() or {}):
+            counts['orders'] += 1
+        else:
+            counts['undated_orders'] += 1
+    for item_doc in firestore_client.collection_group('order_items').stream():
+        order_ref = item_doc.reference.parent.parent
+        if order_ref is not None:
+            builder.add_item(order_ref.id, item_doc.to_dict() or {})
+            counts['items'] += 1
+
+    snapshot = builder.build()
+    snapshot.save(path)
+    logger.info(f"[SNAPSHOT] Wrote {path}: " + ', '.join(f"{name} {value}" for name, value in counts.items()))
+    return snapshot
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Export and query a columnar snapshot of orders')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    export_parser = subparsers.add_parser('export', help='write a snapshot from Firestore')
+    export_parser.add_argument('path', help='output .npz file')
+
+    for name, help_text in (('query', 'revenue grouped by a key'), ('cohorts', 'monthly revenue by hotel cohort')):
+        sub = subparsers.add_parser(name, help=help_text)
+        sub.add_argument('path', help='snapshot .npz file')
+        sub.add_argument('--from', dest='start', help='first day (YYYY-MM-DD, inclusive)')
+        sub.add_argument('--to', dest='end', help='last day (YYYY-MM-DD, exclusive)')
+        if name == 'query':
+            sub.add_argument('--by', choices=ORDER_GROUP_KEYS + ITEM_GROUP_KEYS, default='month')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'export':
+        firestore_client = get_firestore_client()
+        if firestore_client is None:
+            logger.error("[SNAPSHOT] Firestore client not initialized")
+            return 1
+        export_snapshot(firestore_client, args.path)
+        return 0
+
+    snapshot = OrderSnapshot.load(args.path)
+    if args.command == 'query':
+        result = snapshot.revenue_by(args.by, args.start, args.end)
+    else:
+        result = snapshot.hotel_cohorts(args.start, args.end)
+    print(json.dumps(result, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# ===================================================================
+# BHAIRAVNATH VEGETABLE SUPPLIER - BILL USER BACKFILL
+# Sets user_id on bills that were created without it
+# ===================================================================
+"""
+Backfill user_id on existing bills from their orders.
+
+The hotel bills and notifications endpoints query bills with
+where('user_id', '==', ...), so every bill has to carry the user_id of its
+order. This tool pages through bills (resumable, see migrate_dates.py) and
+copies the order's user_id onto bills that are missing it.
+
+Usage:
+    python backfill_bill_users.py             # backfill all bills
+    python backfill_bill_users.py --dry-run   # report changes, write nothing
+    python backfill_bill_users.py --reset     # ignore checkpoint, start over
+"""
+
+import argparse
+import logging
+import sys
+
+from main import get_firestore_client
+from migrate_dates import add_common_arguments, run_checkpointed_migration
+
+logger = logging.getLogger('backfill_bill_users')
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Copy order user_id onto bills that lack it')
+    add_common_arguments(parser)
+    args = parser.parse_args(argv)
+
+    firestore_client = get_firestore_client()
+    if firestore_client is None:
+        logger.error("[BACKFILL_BILLS] Firestore client not initialized")
+        return 1
+
+    def process_bill(bill_doc, queue_update, stats):
+        bill = bill_doc.to_dict() or {}
+        if bill.get('user_id'):
+            return
+        order_id = bill.get('order_id')
+        order_doc = firestore_client.collection('orders').document(str(order_id)).get() if order_id else None
+        user_id = (order_doc.to_dict() or {}).get('user_id') if order_doc is not None and order_doc.exists else None
+        if not user_id:
+            stats['orphaned'] = stats.get('orphaned', 0) + 1
+            logger.warning(f"[BACKFILL_BILLS] bills/{bill_doc.id}: no user_id found via order {order_id}")
+            return
+        queue_update(bill_doc.reference, {'user_id': str(user_id)})
+
+    run_checkpointed_migration(
+        firestore_client, 'bills', 'backfill_bill_users',
+        args.page_size, args.dry_run, args.reset, process_bill
+    )
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# ===================================================================
+# BHAIRAVNATH VEGETABLE SUPPLIER - HOTEL IDENTITY BACKFILL
+# Embeds hotel name / phone / email on existing orders, bills and tickets
+# ===================================================================
+"""
+Backfill the embedded hotel identity on existing orders, bills and tickets.
+
+List endpoints show hotel_name, phone and email from the row itself instead
+of reading users/{id} per row. This tool pages through users (resumable,
+see migrate_dates.py) and, for each hotel, writes its current identity onto
+every order, bill and support ticket whose copy is missing or stale.
+
+Usage:
+    python backfill_hotel_identity.py             # backfill all hotels
+    python backfill_hotel_identity.py --dry-run   # report changes, write nothing
+    python backfill_hotel_identity.py --reset     # ignore checkpoint, start over
+"""
+
+import argparse
+import logging
+import sys
+
+from main import get_firestore_client, hotel_identity_from_user, iter_hotel_identity_updates
+from migrate_dates import add_common_arguments, run_checkpointed_migration
+
+logger = logging.getLogger('backfill_hotel_identity')
+
+
+def process_user(user_doc, queue_update, stats):
+    """Queue identity updates for one hotel's orders, bills and tickets"""
+    user = user_doc.to_dict() or {}
+    if user.get('role') != 'hotel':
+        return
+    stats['hotels'] = stats.get('hotels', 0) + 1
+    for ref, updates in iter_hotel_identity_updates(user_doc.id, hotel_identity_from_user(user)):
+        queue_update(ref, updates)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Embed hotel identity on existing orders, bills and tickets')
+    add_common_arguments(parser)
+    args = parser.parse_args(argv)
+
+    firestore_client = get_firestore_client()
+    if firestore_client is None:
+        logger.error("[BACKFILL_IDENTITY] Firestore client not initialized")
+        return 1
+
+    run_checkpointed_migration(
+        firestore_client, 'users', 'backfill_hotel_identity',
+        args.page_size, args.dry_run, args.reset, process_user
+    )
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
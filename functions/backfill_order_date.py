@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# ===================================================================
+# BHAIRAVNATH VEGETABLE SUPPLIER - ORDER DATE BACKFILL
+# Gives every order an order_date so the admin listing can sort on it
+# ===================================================================
+"""
+Backfill order_date on orders that were written without one.
+
+/api/admin/orders pages with order_by('order_date'), and Firestore leaves
+documents without the ordered field out of such a query, so orders
+missing order_date would silently disappear from the admin listing. This
+tool pages through orders (resumable, see migrate_dates.py) and sets
+order_date on every order that lacks the field, taken from its created_at
+or, failing that, the document's creation time. order_date_key is filled
+in at the same time when it is missing.
+
+Run it before deploying the paginated listing, and again if orders are
+ever imported without order_date.
+
+Usage:
+    python backfill_order_date.py             # backfill all orders
+    python backfill_order_date.py --dry-run   # report changes, write nothing
+    python backfill_order_date.py --reset     # ignore checkpoint, start over
+"""
+
+import argparse
+import logging
+import sys
+from datetime import datetime
+
+from main import get_firestore_client, to_ist_date_key
+from migrate_dates import add_common_arguments, run_checkpointed_migration
+
+logger = logging.getLogger('backfill_order_date')
+
+
+def process_order(order_doc, queue_update, stats):
+    """Queue an order_date for one order that does not have the field"""
+    order = order_doc.to_dict() or {}
+    if 'order_date' in order:
+        return
+
+    order_date = order.get('created_at')
+    if not order_date and order_doc.create_time is not None:
+        order_date = order_doc.create_time.isoformat()
+    if not order_date:
+        stats['unresolved'] = stats.get('unresolved', 0) + 1
+        logger.warning(f"[BACKFILL_ORDER_DATE] orders/{order_doc.id}: no created_at or create_time")
+        return
+    if isinstance(order_date, datetime):
+        order_date = order_date.isoformat()
+
+    updates = {'order_date': order_date}
+    if not order.get('order_date_key'):
+        date_key = to_ist_date_key(order_date)
+        if date_key:
+            updates['order_date_key'] = date_key
+    queue_update(order_doc.reference, updates)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Set order_date on orders that were written without one')
+    add_common_arguments(parser)
+    args = parser.parse_args(argv)
+
+    firestore_client = get_firestore_client()
+    if firestore_client is None:
+        logger.error("[BACKFILL_ORDER_DATE] Firestore client not initialized")
+        return 1
+
+    run_checkpointed_migration(
+        firestore_client, 'orders', 'backfill_order_date',
+        args.page_size, args.dry_run, args.reset, process_order
+    )
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
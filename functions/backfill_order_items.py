@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# ===================================================================
+# BHAIRAVNATH VEGETABLE SUPPLIER - ORDER ITEM BACKFILL
+# Copies order fields onto existing order_items docs
+# ===================================================================
+"""
+Backfill the denormalized order fields on existing order_items docs.
+
+Analytics reads order items with a single collection_group('order_items')
+query, which needs each item to carry its order's order_date,
+order_date_key, delivery_date_key, user_id and status. This tool pages
+through orders (resumable, see migrate_dates.py) and writes those fields
+onto every item that is missing or out of date. Date keys an order does not
+have yet are derived from its raw date fields.
+
+Usage:
+    python backfill_order_items.py             # backfill all orders' items
+    python backfill_order_items.py --dry-run   # report changes, write nothing
+    python backfill_order_items.py --reset     # ignore checkpoint, start over
+"""
+
+import argparse
+import logging
+import sys
+
+from main import get_firestore_client, order_item_denormalized_fields, to_ist_date_key
+from migrate_dates import add_common_arguments, run_checkpointed_migration
+
+logger = logging.getLogger('backfill_order_items')
+
+
+def process_order(order_doc, queue_update, stats):
+    """Queue updates for the items of one order whose copied fields are stale"""
+    order = order_doc.to_dict() or {}
+    if not order.get('order_date_key'):
+        order['order_date_key'] = to_ist_date_key(order.get('order_date'))
+    if not order.get('delivery_date_key'):
+        order['delivery_date_key'] = to_ist_date_key(order.get('delivery_date'))
+    fields = order_item_denormalized_fields(order_doc.id, order)
+
+    for item_doc in order_doc.reference.collection('order_items').stream():
+        item = item_doc.to_dict() or {}
+        updates = {field: value for field, value in fields.items() if item.get(field) != value}
+        if updates:
+            queue_update(item_doc.reference, updates)
+        stats['items'] = stats.get('items', 0) + 1
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Copy order fields onto existing order_items docs')
+    add_common_arguments(parser)
+    args = parser.parse_args(argv)
+
+    firestore_client = get_firestore_client()
+    if firestore_client is None:
+        logger.error("[BACKFILL_ITEMS] Firestore client not initialized")
+        return 1
+
+    run_checkpointed_migration(
+        firestore_client, 'orders', 'backfill_order_items',
+        args.page_size, args.dry_run, args.reset, process_order
+    )
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# ===================================================================
+# BHAIRAVNATH VEGETABLE SUPPLIER - ANALYTICS BENCHMARK
+# Per-document loop vs vectorized snapshot queries on synthetic orders
+# ===================================================================
+"""
+Benchmark the columnar snapshot (analytics_snapshot.py) against the
+per-document Python loop that analytics used to run over orders.
+
+Synthetic orders (about 3 items each, spread over two years, 5% cancelled)
+are generated in memory for each size. For every group-by key the loop
+and the vectorized query are timed over the same data and their results
+are compared. Building the snapshot and the .npz save/load round trip are
+timed separately, since they are paid once per export rather than per
+query.
+
+The 1M order run needs about 3 GB of memory for the synthetic documents.
+
+Needs requirements-tools.txt (numpy) installed.
+
+Usage:
+    python benchmark_analytics.py                         # 10k, 100k and 1M orders
+    python benchmark_analytics.py --sizes 10000 100000
+"""
+
+import argparse
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+from analytics_snapshot import ITEM_GROUP_KEYS, ORDER_GROUP_KEYS, OrderSnapshot, SnapshotBuilder
+from main import ANALYTICS_EXCLUDED_ORDER_STATUSES
+
+logger = logging.getLogger('benchmark_analytics')
+
+STATUSES = ['delivered'] * 15 + ['pending'] * 3 + ['confirmed', 'cancelled']
+CATEGORIES = ['Vegetable', 'Fruit', 'Leafy', 'Exotic', 'Other']
+
+
+def generate_data(order_count: int, seed: int = 7):
+    """Return (orders, products) where orders is a list of (order_id, order, items)"""
+    rng = random.Random(seed)
+    first_day = date(2025, 1, 1)
+    day_keys = [(first_day + timedelta(days=offset)).isoformat() for offset in range(730)]
+    hotel_ids = [f'hotel_{index}' for index in range(max(10, order_count // 200))]
+    products = {
+        f'product_{index}': {'name': f'Product {index}', 'category': CATEGORIES[index % len(CATEGORIES)]}
+        for index in range(200)
+    }
+    product_ids = list(products)
+
+    orders = []
+    for index in range(order_count):
+        items = []
+        total = 0.0
+        for _ in range(rng.randint(1, 5)):
+            product_id = rng.choice(product_ids)
+            quantity = float(rng.randint(1, 20))
+            price = float(rng.randint(10, 120))
+            items.append({
+                'product_id': product_id,
+                'product_name': products[product_id]['name'],
+                'quantity': quantity,
+                'price_at_order': price
+            })
+            total += quantity * price
+        orders.append((f'order_{index}', {
+            'order_date_key': rng.choice(day_keys),
+            'user_id': rng.choice(hotel_ids),
+            'status': rng.choice(STATUSES),
+            'total_amount': total
+        }, items))
+    return orders, products
+
+
+def loop_revenue_by(orders, products, key: str, start: str = None, end: str = None) -> dict:
+    """Reference implementation: one pass over the order documents in Python"""
+    groups = {}
+    for _, order, items in orders:
+        if str(order.get('status', '')).lower() in ANALYTICS_EXCLUDED_ORDER_STATUSES:
+            continue
+        date_key = order.get('order_date_key')
+        if not date_key or (start and date_key < start) or (end and date_key >= end):
+            continue
+
+        if key in ORDER_GROUP_KEYS:
+            label = {'day': date_key, 'month': date_key[:7], 'hotel': str(order.get('user_id') or '')}[key]
+            entry = groups.setdefault(label, {'revenue': 0.0, 'orders': 0})
+            entry['revenue'] += float(order.get('total_amount') or 0)
+            entry['orders'] += 1
+            continue
+
+        for item in items:
+            label = item['product_id']
+            if key == 'category':
+                label = products.get(label, {}).get('category') or 'Other'
+            entry = groups.setdefault(label, {'revenue': 0.0, 'quantity': 0.0})
+            entry['revenue'] += item['quantity'] * item['price_at_order']
+            entry['quantity'] += item['quantity']
+
+    for entry in groups.values():
+        entry['revenue'] = round(entry['revenue'], 2)
+    return groups
+
+
+def results_match(expected: dict, actual: dict) -> bool:
+    if expected.keys() != actual.keys():
+        return False
+    return all(
+        abs(expected[label][field] - actual[label][field]) <= 0.01 + 1e-9 * abs(expected[label][field])
+        for label in expected
+        for field in expected[label]
+    )
+
+
+def timed(function, *args):
+    started = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - started
+
+
+def run_size(order_count: int, start: str, end: str) -> bool:
+    orders, products = generate_data(order_count)
+
+    def build():
+        builder = SnapshotBuilder()
+        for product_id, product in products.items():
+            builder.add_product(product_id, product)
+        for order_id, order, items in orders:
+            builder.add_order(order_id, order)
+            for item in items:
+                builder.add_item(order_id, item)
+        return builder.build()
+
+    snapshot, build_seconds = timed(build)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'snapshot.npz')
+        _, save_seconds = timed(snapshot.save, path)
+        snapshot, load_seconds = timed(OrderSnapshot.load, path)
+        size_mb = os.path.getsize(path) / 1e6
+
+    print(f"\n{order_count:,} orders, {len(snapshot.item_order):,} items")
+    print(f"  snapshot build {build_seconds:.2f}s, save {save_seconds:.2f}s, load {load_seconds:.2f}s, {size_mb:.1f} MB")
+    print(f"  {'query':<10} {'loop':>10} {'vectorized':>12} {'speedup':>9}  match")
+
+    all_match = True
+    for key in ORDER_GROUP_KEYS + ITEM_GROUP_KEYS:
+        expected, loop_seconds = timed(loop_revenue_by, orders, products, key, start, end)
+        actual, vector_seconds = timed(snapshot.revenue_by, key, start, end)
+        match = results_match(expected, actual)
+        all_match &= match
+        speedup = loop_seconds / vector_seconds if vector_seconds else float('inf')
+        print(f"  {key:<10} {loop_seconds * 1000:>8.1f}ms {vector_seconds * 1000:>10.1f}ms {speedup:>8.1f}x  {'yes' if match else 'NO'}")
+    return all_match
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark vectorized snapshot analytics against the per-document loop')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000],
+                        help='order counts to benchmark (default: 10000 100000 1000000)')
+    parser.add_argument('--from', dest='start', default='2025-04-01', help='first day of the query range')
+    parser.add_argument('--to', dest='end', default='2026-04-01', help='day after the query range')
+    args = parser.parse_args(argv)
+
+    all_match = True
+    for order_count in args.sizes:
+        all_match &= run_size(order_count, args.start, args.end)
+    return 0 if all_match else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
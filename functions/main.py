@@ -8,10 +8,14 @@ from flask import Flask, request, jsonify
 from flask_cors import CORS
 from firebase_functions import https_fn
 import logging
+import base64
+import heapq
 import json
 import os
 import re
 import sys
+import threading
+import time
 import traceback
 
 # Load .env file for local development (won't affect production)
@@ -25,6 +29,8 @@ if os.getenv('FLASK_ENV') == 'development':
 from datetime import datetime, timedelta, timezone
 from typing import Dict, Any, List, Optional
 from functools import wraps
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
 
 # Database and Auth
 import firebase_admin
@@ -143,45 +149,97 @@ def get_db_connection():
     """
     Deprecated: MySQL is no longer used.
     This function is kept for backward compatibility but will raise an error.
-    All endpoints must be migrated to use Firestore via the 'db' client.
+    All endpoints must be migrated to use Firestore via get_firestore_client().
     """
     raise RuntimeError(
         "MySQL database is no longer available. "
         "This endpoint needs to be migrated to use Firestore. "
-        "Use the 'db' client (firestore.client()) instead. "
+        "Use get_firestore_client() instead. "
         "See FIREBASE_MIGRATION_GUIDE.md for examples."
     )
 
 # Initialize Firebase Admin SDK using Application Default Credentials
 # On Cloud Functions, this automatically uses the default service account
 # For local development, use serviceAccountKey.json if available
-# DEFERRED INITIALIZATION: Only initialize when first accessed to avoid timeout
+# One client (and gRPC channel) is created per instance and shared by every
+# route. Creation is deferred so importing the module never blocks on the
+# network; on Cloud Run / Functions (K_SERVICE set) a background thread
+# creates and warms it during cold start instead of the first request.
+FIRESTORE_PREWARM = os.getenv('FIRESTORE_PREWARM', '1' if os.getenv('K_SERVICE') else '0') == '1'
+FIRESTORE_INIT_RETRY_SECONDS = float(os.getenv('FIRESTORE_INIT_RETRY_SECONDS', '30'))
 _firebase_db_client = None
-_firebase_initialized = False
+_firebase_init_lock = threading.Lock()
+_firebase_init_failed_at = None
+_firestore_warmup = {
+    'state': 'cold',  # cold -> warming -> ready | failed
+    'warmup_ms': None,
+    'ready_at': None,
+    'error': None
+}
 
 def get_firestore_client():
-    """Lazily initialize and return Firestore client"""
-    global _firebase_db_client, _firebase_initialized
+    """Return the instance-wide Firestore client, creating it on first use"""
+    global _firebase_db_client, _firebase_init_failed_at
     
-    if _firebase_initialized:
-        return _firebase_db_client
+    client = _firebase_db_client
+    if client is not None:
+        return client
     
-    try:
-        if not firebase_admin._apps:
-            service_account_path = os.path.join(os.path.dirname(__file__), '..', 'serviceAccountKey.json')
-            if os.path.exists(service_account_path):
-                cred = credentials.Certificate(service_account_path)
-                firebase_admin.initialize_app(cred)
-            else:
-                firebase_admin.initialize_app()
+    with _firebase_init_lock:
+        if _firebase_db_client is not None:
+            return _firebase_db_client
+        # Back off after a failed init instead of retrying on every call
+        if _firebase_init_failed_at is not None and time.monotonic() - _firebase_init_failed_at < FIRESTORE_INIT_RETRY_SECONDS:
+            return None
         
-        _firebase_db_client = firestore.client()
-        _firebase_initialized = True
-        return _firebase_db_client
+        try:
+            if not firebase_admin._apps:
+                service_account_path = os.path.join(os.path.dirname(__file__), '..', 'serviceAccountKey.json')
+                if os.path.exists(service_account_path):
+                    cred = credentials.Certificate(service_account_path)
+                    firebase_admin.initialize_app(cred)
+                else:
+                    firebase_admin.initialize_app()
+            
+            _firebase_db_client = firestore.client()
+            _firebase_init_failed_at = None
+            return _firebase_db_client
+        except Exception as e:
+            logger.error(f"Failed to initialize Firebase/Firestore: {str(e)}")
+            _firebase_init_failed_at = time.monotonic()
+            return None
+
+def warm_up_firestore() -> Dict:
+    """
+    Create the client and open its gRPC channel with one small read.
+    
+    Returns:
+        Snapshot of the warm-up status
+    """
+    _firestore_warmup.update({'state': 'warming', 'error': None})
+    started = time.monotonic()
+    try:
+        client = get_firestore_client()
+        if client is None:
+            raise RuntimeError("Firestore client not initialized")
+        client.collection('system_settings').document('status').get()
+        _firestore_warmup.update({
+            'state': 'ready',
+            'warmup_ms': round((time.monotonic() - started) * 1000, 1),
+            'ready_at': datetime.now(timezone.utc).isoformat()
+        })
+        logger.info(f"[FIRESTORE] Channel warmed up in {_firestore_warmup['warmup_ms']} ms")
     except Exception as e:
-        logger.error(f"Failed to initialize Firebase/Firestore: {str(e)}")
-        _firebase_initialized = True  # Mark as attempted to avoid retrying
-        return None
+        _firestore_warmup.update({
+            'state': 'failed',
+            'warmup_ms': round((time.monotonic() - started) * 1000, 1),
+            'error': str(e)
+        })
+        logger.error(f"[FIRESTORE] Warm-up failed: {str(e)}")
+    return dict(_firestore_warmup)
+
+if FIRESTORE_PREWARM:
+    threading.Thread(target=warm_up_firestore, name='firestore-prewarm', daemon=True).start()
 
 # ===================================================================
 # JSON SERIALIZATION HELPER
@@ -202,9 +260,6 @@ def make_json_safe(obj):
         # Convert any other type (Timestamp, datetime, etc.) to string
         return str(obj)
 
-# Provide db as alias for backward compatibility
-db = None
-
 # ===================================================================
 # ATOMIC COUNTER INCREMENT (For Order/Bill IDs)
 # ===================================================================
@@ -246,6 +301,1272 @@ def get_next_counter_id(counter_name: str) -> int:
         logger.error(f"[COUNTER] Traceback: {traceback.format_exc()}")
         raise
 
+# ===================================================================
+# PRODUCT CATALOG CACHE (Process-wide, TTL based)
+# ===================================================================
+# Order listings and reports only need product name/unit/category for
+# enrichment, so product docs are cached per instance instead of being
+# fetched once per order line item.
+PRODUCT_CACHE_TTL_SECONDS = int(os.getenv('PRODUCT_CACHE_TTL_SECONDS', '300'))
+_product_cache = {}  # product_id -> (fetched_at, product dict or None)
+_product_cache_generation = 0
+_product_cache_lock = threading.Lock()
+
+def invalidate_product_cache(product_id: Optional[str] = None):
+    """Drop a single product (or the whole catalog when no ID given) from the cache"""
+    global _product_cache_generation
+    with _product_cache_lock:
+        _product_cache_generation += 1
+        if product_id is None:
+            _product_cache.clear()
+        else:
+            _product_cache.pop(str(product_id), None)
+
+def get_products_by_ids(product_ids) -> Dict[str, Optional[Dict]]:
+    """
+    Look up products for enrichment, served from the in-process catalog cache.
+    Missing or expired entries are filled with a single batched get_all() call.
+    
+    Args:
+        product_ids: Iterable of product IDs (int or str)
+    
+    Returns:
+        Dict of product_id (str) -> product dict, or None if the product does not exist.
+        IDs that could not be fetched because of an error are left out.
+    """
+    wanted = {str(pid) for pid in product_ids if pid not in (None, '')}
+    if not wanted:
+        return {}
+    
+    now = time.monotonic()
+    products = {}
+    missing = []
+    with _product_cache_lock:
+        generation = _product_cache_generation
+        for product_id in wanted:
+            entry = _product_cache.get(product_id)
+            if entry is not None and now - entry[0] < PRODUCT_CACHE_TTL_SECONDS:
+                products[product_id] = entry[1]
+            else:
+                missing.append(product_id)
+    
+    if not missing:
+        return products
+    
+    try:
+        firestore_client = get_firestore_client()
+        if firestore_client is None:
+            raise RuntimeError("Firestore client not initialized")
+        
+        fetched = {product_id: None for product_id in missing}
+        refs = [firestore_client.collection('products').document(product_id) for product_id in missing]
+        for snapshot in firestore_client.get_all(refs):
+            fetched[snapshot.id] = snapshot.to_dict() if snapshot.exists else None
+    except Exception as e:
+        logger.warning(f"[PRODUCT_CACHE] Batched fetch of {len(missing)} products failed: {str(e)}")
+        return products
+    
+    fetched_at = time.monotonic()
+    with _product_cache_lock:
+        # Skip storing if a product was written while we were fetching
+        if generation == _product_cache_generation:
+            for product_id, product in fetched.items():
+                _product_cache[product_id] = (fetched_at, product)
+    
+    logger.info(f"[PRODUCT_CACHE] {len(products)} hits, {len(missing)} misses fetched in one batch")
+    products.update(fetched)
+    return products
+
+# ===================================================================
+# CONCURRENT FIRESTORE READS (Bounded thread pool)
+# ===================================================================
+# Listing endpoints read one order_items subcollection per order. Those reads
+# are independent, so they run on a shared bounded pool: page latency is close
+# to the slowest read instead of the sum of all of them.
+FIRESTORE_FANOUT_MAX_WORKERS = int(os.getenv('FIRESTORE_FANOUT_MAX_WORKERS', '8'))
+FIRESTORE_FANOUT_TIMEOUT_SECONDS = float(os.getenv('FIRESTORE_FANOUT_TIMEOUT_SECONDS', '10'))
+# How long a read may wait in the pool's queue before it starts
+FIRESTORE_FANOUT_QUEUE_TIMEOUT_SECONDS = float(os.getenv('FIRESTORE_FANOUT_QUEUE_TIMEOUT_SECONDS', '30'))
+_fanout_executor = None
+_fanout_executor_lock = threading.Lock()
+
+def _get_fanout_executor() -> ThreadPoolExecutor:
+    """Create the shared read pool on first use"""
+    global _fanout_executor
+    if _fanout_executor is None:
+        with _fanout_executor_lock:
+            if _fanout_executor is None:
+                _fanout_executor = ThreadPoolExecutor(
+                    max_workers=FIRESTORE_FANOUT_MAX_WORKERS,
+                    thread_name_prefix='firestore-fanout'
+                )
+    return _fanout_executor
+
+def run_concurrent_reads(read_fn, args, timeout: Optional[float] = None, label: str = 'reads') -> List:
+    """
+    Run independent reads concurrently on the shared bounded pool.
+    
+    Args:
+        read_fn: Callable taking one element of args and returning its result
+        args: Inputs, one read each
+        timeout: Seconds each read may take once it starts (default FIRESTORE_FANOUT_TIMEOUT_SECONDS);
+            time queued behind other requests' reads is bounded separately by
+            FIRESTORE_FANOUT_QUEUE_TIMEOUT_SECONDS
+        label: Name used in the log line
+    
+    Returns:
+        Results in the same order as args; None for reads that failed or timed out
+    """
+    args = list(args)
+    if not args:
+        return []
+    timeout = FIRESTORE_FANOUT_TIMEOUT_SECONDS if timeout is None else timeout
+    
+    in_flight = 0
+    peak = 0
+    counter_lock = threading.Lock()
+    
+    def tracked(arg, start):
+        nonlocal in_flight, peak
+        start['at'] = time.monotonic()
+        start['event'].set()
+        with counter_lock:
+            in_flight += 1
+            peak = max(peak, in_flight)
+        try:
+            return read_fn(arg)
+        finally:
+            with counter_lock:
+                in_flight -= 1
+    
+    started = time.monotonic()
+    executor = _get_fanout_executor()
+    queue_deadline = time.monotonic() + FIRESTORE_FANOUT_QUEUE_TIMEOUT_SECONDS
+    tasks = []
+    for arg in args:
+        start = {'at': None, 'event': threading.Event()}
+        tasks.append((executor.submit(tracked, arg, start), start))
+    
+    results = []
+    failed = 0
+    for future, start in tasks:
+        try:
+            if not start['event'].wait(max(0.0, queue_deadline - time.monotonic())) and future.cancel():
+                raise FuturesTimeoutError(f"still queued after {FIRESTORE_FANOUT_QUEUE_TIMEOUT_SECONDS}s")
+            # The deadline runs from when the read started, not from submission
+            start['event'].wait()
+            results.append(future.result(timeout=max(0.0, start['at'] + timeout - time.monotonic())))
+        except FuturesTimeoutError as e:
+            future.cancel()
+            failed += 1
+            results.append(None)
+            logger.warning(f"[FANOUT] {label}: read timed out ({str(e) or f'running over {timeout}s'})")
+        except Exception as e:
+            failed += 1
+            results.append(None)
+            logger.warning(f"[FANOUT] {label}: read failed: {str(e)}")
+    
+    elapsed_ms = (time.monotonic() - started) * 1000
+    logger.info(f"[FANOUT] {label}: {len(args)} reads, peak {peak} in parallel, {failed} failed, {elapsed_ms:.0f} ms")
+    return results
+
+def fetch_order_items_concurrently(order_refs) -> List[Optional[List]]:
+    """
+    Read the order_items subcollection of several orders concurrently.
+    
+    Returns:
+        One list of item snapshots per order ref, in the same order (None if the read failed)
+    """
+    return run_concurrent_reads(
+        lambda order_ref: list(order_ref.collection('order_items').stream()),
+        order_refs,
+        label='order_items'
+    )
+
+# ===================================================================
+# DATE KEY HELPERS
+# ===================================================================
+# Orders carry normalized YYYY-MM-DD keys (IST) next to their raw date
+# fields so that reports can use equality where() queries instead of
+# scanning and parsing every order.
+IST = timezone(timedelta(hours=5, minutes=30))
+
+def to_ist_date_key(value) -> Optional[str]:
+    """
+    Normalize a stored date value to a 'YYYY-MM-DD' key in IST.
+    
+    Accepts datetime / Firestore Timestamp values and 'YYYY-MM-DD', ISO 8601,
+    'DD Mon YYYY' and RFC-2822 strings. Plain calendar dates are kept as-is,
+    values with a time component are converted to IST (naive ones are treated as UTC).
+    
+    Returns:
+        Date key string, or None if the value could not be parsed
+    """
+    if value is None or value == '':
+        return None
+    
+    parsed = None
+    if isinstance(value, datetime):
+        parsed = value
+    elif hasattr(value, 'year') and hasattr(value, 'month') and hasattr(value, 'day'):
+        # Plain date object
+        return value.strftime('%Y-%m-%d')
+    elif isinstance(value, str):
+        text = value.strip()
+        if len(text) == 10 and text[4] == '-':
+            try:
+                return datetime.strptime(text, '%Y-%m-%d').strftime('%Y-%m-%d')
+            except ValueError:
+                pass
+        try:
+            return datetime.strptime(text, '%d %b %Y').strftime('%Y-%m-%d')
+        except ValueError:
+            pass
+        if len(text) >= 19 and text[4] == '-':
+            try:
+                parsed = datetime.fromisoformat(text.replace('Z', '+00:00'))
+            except ValueError:
+                pass
+        if parsed is None:
+            try:
+                from email.utils import parsedate_to_datetime
+                parsed = parsedate_to_datetime(text)
+            except (TypeError, ValueError):
+                pass
+    
+    if parsed is None:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(IST).strftime('%Y-%m-%d')
+
+# ===================================================================
+# ORDER ITEM DENORMALIZATION
+# ===================================================================
+# Order item docs repeat a few order fields so analytics can run one
+# collection_group('order_items') query instead of opening every order's
+# subcollection. Keep these in step whenever the order fields change.
+ORDER_ITEM_DENORMALIZED_FIELDS = ['order_date', 'order_date_key', 'delivery_date_key', 'user_id', 'status']
+
+def order_item_denormalized_fields(order_id: str, order: Dict) -> Dict:
+    """Return the order fields copied onto each of its order_items docs"""
+    fields = {field: order.get(field) for field in ORDER_ITEM_DENORMALIZED_FIELDS}
+    fields['order_id'] = str(order_id)
+    if fields['user_id'] is not None:
+        fields['user_id'] = str(fields['user_id'])
+    return fields
+
+def get_order_items_for_user(user_id: str) -> Dict[str, List[Dict]]:
+    """
+    Fetch all order items of a hotel with a single collection-group query.
+    
+    Returns:
+        Dict of order_id -> list of order item dicts
+    """
+    items_by_order = {}
+    items_query = get_firestore_client().collection_group('order_items').where('user_id', '==', str(user_id)).stream()
+    for item_doc in items_query:
+        item = item_doc.to_dict()
+        order_id = item.get('order_id') or item_doc.reference.parent.parent.id
+        items_by_order.setdefault(str(order_id), []).append(item)
+    return items_by_order
+
+# ===================================================================
+# HOTEL IDENTITY DENORMALIZATION
+# ===================================================================
+# Orders, bills and support tickets carry a copy of the hotel's name, phone
+# and email so list endpoints don't read users/{id} once per row. When a
+# hotel changes them, fan_out_hotel_identity() rewrites the copies.
+HOTEL_IDENTITY_FIELDS = ['hotel_name', 'phone', 'email']
+HOTEL_IDENTITY_COLLECTIONS = ['orders', 'bills', 'support_tickets']
+
+def hotel_identity_from_user(user: Optional[Dict]) -> Dict:
+    """Return the identity fields embedded on a hotel's orders, bills and tickets"""
+    user = user or {}
+    return {field: user.get(field, '') or '' for field in HOTEL_IDENTITY_FIELDS}
+
+def get_hotel_identities(user_ids) -> Dict[str, Dict]:
+    """
+    Batch-read hotel identity fields for a set of users.
+    
+    Returns:
+        Dict of user_id (str) -> identity dict, for users that exist
+    """
+    wanted = {str(uid) for uid in user_ids if uid}
+    if not wanted:
+        return {}
+    firestore_client = get_firestore_client()
+    refs = [firestore_client.collection('users').document(uid) for uid in wanted]
+    return {
+        user_doc.id: hotel_identity_from_user(user_doc.to_dict())
+        for user_doc in firestore_client.get_all(refs)
+        if user_doc.exists
+    }
+
+def has_hotel_identity(doc_data: Dict) -> bool:
+    """True if a document already carries an embedded hotel identity"""
+    return bool(doc_data.get('hotel_name'))
+
+def iter_hotel_identity_updates(user_id: str, identity: Dict):
+    """Yield (doc ref, updates) for every embedded copy of a hotel's identity that is out of date"""
+    firestore_client = get_firestore_client()
+    for collection_name in HOTEL_IDENTITY_COLLECTIONS:
+        for doc in firestore_client.collection(collection_name).where('user_id', '==', str(user_id)).stream():
+            data = doc.to_dict()
+            updates = {field: value for field, value in identity.items() if data.get(field) != value}
+            if updates:
+                yield doc.reference, updates
+
+def fan_out_hotel_identity(user_id: str, identity: Dict) -> int:
+    """
+    Rewrite a hotel's embedded identity on its orders, bills and tickets with batched writes.
+    
+    Returns:
+        Number of documents updated
+    """
+    firestore_client = get_firestore_client()
+    batch = firestore_client.batch()
+    pending = 0
+    updated = 0
+    for ref, updates in iter_hotel_identity_updates(user_id, identity):
+        batch.update(ref, updates)
+        pending += 1
+        updated += 1
+        if pending >= 500:
+            batch.commit()
+            batch = firestore_client.batch()
+            pending = 0
+    if pending:
+        batch.commit()
+    
+    # Upcoming delivery rollups show the hotel name in the filling matrix
+    user_id = str(user_id)
+    today_key = datetime.now(IST).strftime('%Y-%m-%d')
+    rollups_query = firestore_client.collection(DAILY_ROLLUPS_COLLECTION).where('delivery_date', '>=', today_key).stream()
+    for rollup_doc in rollups_query:
+        if user_id in (rollup_doc.to_dict().get('hotels') or {}):
+            _update_daily_rollup(
+                rollup_doc.id,
+                lambda rollup: rollup['hotels'].get(user_id, {}).update(hotel_name=identity.get('hotel_name') or 'N/A'),
+                f"renamed hotel {user_id}"
+            )
+    
+    logger.info(f"[HOTEL_IDENTITY] Updated {updated} documents for user {user_id}")
+    return updated
+
+# ===================================================================
+# DAILY ROLLUPS (Packing / purchasing reports)
+# ===================================================================
+# daily_rollups/{delivery_date_key} holds per-product, per-category and
+# per-hotel quantity totals for every non-cancelled order delivering on that
+# date. Order writes commit the order, its items and the rollup change in
+# one transaction (write_docs), so reports can be served from a single
+# document read and never count an order that was not written (or miss one
+# that was).
+#
+# Each rollup also records the lines it has counted per order, which keeps
+# add/remove idempotent and lets a cancel subtract exactly what was added.
+# A date without a materialized rollup is rebuilt from its orders on first read.
+DAILY_ROLLUPS_COLLECTION = 'daily_rollups'
+
+def _empty_daily_rollup(delivery_date_key: str) -> Dict:
+    """Return a materialized rollup with no orders counted"""
+    return {
+        'delivery_date': delivery_date_key,
+        'materialized': True,
+        'order_count': 0,
+        'total_amount': 0,
+        'orders': {},
+        'products': {},
+        'category_totals': {},
+        'hotels': {},
+        'matrix': {}
+    }
+
+def _rollup_add_order(rollup: Dict, order_id: str, user_id: str, hotel_name: str, lines, products: Dict, total_amount: float = 0):
+    """
+    Count one order in a rollup dict (no-op if already counted).
+    
+    Args:
+        lines: Iterable of (product_id, quantity)
+        products: Product lookup as returned by get_products_by_ids()
+    """
+    order_id = str(order_id)
+    if order_id in rollup['orders']:
+        return
+    
+    user_id = str(user_id)
+    order_lines = {}
+    for product_id, quantity in lines:
+        product_key = str(product_id)
+        order_lines[product_key] = round(order_lines.get(product_key, 0) + float(quantity or 0), 3)
+    
+    hotel_row = rollup['matrix'].setdefault(user_id, {})
+    for product_key, quantity in order_lines.items():
+        product = products.get(product_key) or {}
+        entry = rollup['products'].get(product_key)
+        if entry is None:
+            entry = rollup['products'][product_key] = {
+                'product_id': product_key,
+                'product_name': product.get('name', 'Unknown'),
+                'category': product.get('category', 'Other'),
+                'unit_type': product.get('unit_type', 'kg'),
+                'line_count': 0,
+                'total_quantity': 0
+            }
+        entry['line_count'] += 1
+        entry['total_quantity'] = round(entry['total_quantity'] + quantity, 3)
+        
+        category = rollup['category_totals'].setdefault(entry['category'], {'count': 0, 'total_quantity': 0})
+        category['count'] += 1
+        category['total_quantity'] = round(category['total_quantity'] + quantity, 3)
+        
+        hotel_row[product_key] = round(hotel_row.get(product_key, 0) + quantity, 3)
+    
+    hotel = rollup['hotels'].setdefault(user_id, {'hotel_id': user_id, 'hotel_name': hotel_name or 'N/A', 'order_count': 0})
+    hotel['order_count'] += 1
+    
+    rollup['orders'][order_id] = {
+        'user_id': user_id,
+        'lines': order_lines,
+        'total_amount': float(total_amount or 0)
+    }
+    rollup['order_count'] += 1
+    rollup['total_amount'] = round(rollup['total_amount'] + float(total_amount or 0), 2)
+
+def _rollup_remove_order(rollup: Dict, order_id: str):
+    """Subtract a previously counted order from a rollup dict (no-op if not counted)"""
+    counted = rollup['orders'].pop(str(order_id), None)
+    if counted is None:
+        return
+    
+    user_id = counted['user_id']
+    hotel_row = rollup['matrix'].get(user_id, {})
+    for product_key, quantity in counted['lines'].items():
+        entry = rollup['products'].get(product_key)
+        if entry is not None:
+            entry['line_count'] -= 1
+            entry['total_quantity'] = round(entry['total_quantity'] - quantity, 3)
+            category = rollup['category_totals'].get(entry['category'])
+            if category is not None:
+                category['count'] -= 1
+                category['total_quantity'] = round(category['total_quantity'] - quantity, 3)
+                if category['count'] <= 0:
+                    rollup['category_totals'].pop(entry['category'], None)
+            if entry['line_count'] <= 0:
+                rollup['products'].pop(product_key, None)
+        
+        remaining = round(hotel_row.get(product_key, 0) - quantity, 3)
+        if remaining > 0:
+            hotel_row[product_key] = remaining
+        else:
+            hotel_row.pop(product_key, None)
+    
+    hotel = rollup['hotels'].get(user_id)
+    if hotel is not None:
+        hotel['order_count'] -= 1
+        if hotel['order_count'] <= 0:
+            rollup['hotels'].pop(user_id, None)
+            rollup['matrix'].pop(user_id, None)
+    
+    rollup['order_count'] -= 1
+    rollup['total_amount'] = round(rollup['total_amount'] - counted.get('total_amount', 0), 2)
+
+def _get_hotel_name(user_id) -> str:
+    """Best-effort hotel name lookup for rollup rows"""
+    try:
+        user_doc = get_firestore_client().collection('users').document(str(user_id)).get()
+        if user_doc.exists:
+            return user_doc.to_dict().get('hotel_name', 'N/A')
+    except Exception as e:
+        logger.warning(f"[DAILY_ROLLUP] Could not fetch hotel name for {user_id}: {str(e)}")
+    return 'N/A'
+
+def _update_daily_rollup(delivery_date_key: Optional[str], mutate, description: str, write_docs=None):
+    """
+    Apply mutate(rollup_dict) to a materialized rollup inside a transaction.
+    Dates that have no materialized rollup yet are skipped; they are rebuilt from
+    orders on first read.
+    
+    write_docs(transaction), if given, queues the order/item writes in the same
+    transaction, so they and the rollup change commit together or not at all;
+    errors are then raised to the caller. Without it (rollup-only changes) a
+    failed update drops the rollup so the next read rebuilds it instead of
+    serving stale totals.
+    """
+    firestore_client = get_firestore_client()
+    if firestore_client is None:
+        if write_docs is not None:
+            raise RuntimeError("Firestore client not initialized")
+        return
+    if not delivery_date_key and write_docs is None:
+        return
+    rollup_ref = firestore_client.collection(DAILY_ROLLUPS_COLLECTION).document(delivery_date_key) if delivery_date_key else None
+    
+    @firestore.transactional
+    def apply_in_transaction(transaction):
+        # All reads happen before the first write
+        rollup = None
+        if rollup_ref is not None:
+            snapshot = rollup_ref.get(transaction=transaction)
+            rollup = snapshot.to_dict() if snapshot.exists else None
+        if write_docs is not None:
+            write_docs(transaction)
+        if not rollup or not rollup.get('materialized'):
+            return
+        mutate(rollup)
+        rollup['updated_at'] = datetime.now(timezone.utc).isoformat()
+        transaction.set(rollup_ref, rollup)
+    
+    if write_docs is not None:
+        apply_in_transaction(firestore_client.transaction())
+        logger.info(f"[DAILY_ROLLUP] {delivery_date_key}: {description} (with order writes)")
+        return
+    
+    try:
+        apply_in_transaction(firestore_client.transaction())
+        logger.info(f"[DAILY_ROLLUP] {delivery_date_key}: {description}")
+    except Exception as e:
+        logger.error(f"[DAILY_ROLLUP] {delivery_date_key}: failed to apply {description}: {str(e)}")
+        try:
+            rollup_ref.delete()
+        except Exception:
+            pass
+
+def add_order_to_daily_rollup(delivery_date_key: Optional[str], order_id: str, user_id: str, lines,
+                              total_amount: float = 0, write_docs=None):
+    """Count a new (or un-cancelled) order in its delivery date's rollup, committing write_docs with it"""
+    lines = [(product_id, quantity) for product_id, quantity in lines]
+    if not delivery_date_key or not user_id:
+        _update_daily_rollup(delivery_date_key, lambda rollup: None, f"wrote order {order_id}", write_docs)
+        return
+    products = get_products_by_ids(product_id for product_id, _ in lines)
+    hotel_name = _get_hotel_name(user_id)
+    _update_daily_rollup(
+        delivery_date_key,
+        lambda rollup: _rollup_add_order(rollup, order_id, user_id, hotel_name, lines, products, total_amount),
+        f"added order {order_id}",
+        write_docs
+    )
+
+def remove_order_from_daily_rollup(delivery_date_key: Optional[str], order_id: str, write_docs=None):
+    """Remove a cancelled order from its delivery date's rollup, committing write_docs with it"""
+    _update_daily_rollup(
+        delivery_date_key,
+        lambda rollup: _rollup_remove_order(rollup, order_id),
+        f"removed order {order_id}",
+        write_docs
+    )
+
+def set_order_total_in_daily_rollup(delivery_date_key: Optional[str], order_id: str, total_amount: float, write_docs=None):
+    """Update the amount counted for an order after its prices are finalized, committing write_docs with it"""
+    def mutate(rollup):
+        counted = rollup['orders'].get(str(order_id))
+        if counted is None:
+            return
+        rollup['total_amount'] = round(rollup['total_amount'] - counted.get('total_amount', 0) + float(total_amount or 0), 2)
+        counted['total_amount'] = float(total_amount or 0)
+    
+    _update_daily_rollup(delivery_date_key, mutate, f"set total of order {order_id}", write_docs)
+
+def rebuild_daily_rollup(delivery_date_key: str) -> Dict:
+    """Recompute a date's rollup from its orders in one transaction and store it"""
+    firestore_client = get_firestore_client()
+    if firestore_client is None:
+        raise RuntimeError("Firestore client not initialized")
+    rollup_ref = firestore_client.collection(DAILY_ROLLUPS_COLLECTION).document(delivery_date_key)
+    
+    @firestore.transactional
+    def rebuild_in_transaction(transaction):
+        # Read the rollup first so concurrent order writes wait for this rebuild
+        rollup_ref.get(transaction=transaction)
+        
+        orders_query = firestore_client.collection('orders').where('delivery_date_key', '==', delivery_date_key)
+        counted_orders = []
+        for order_doc in transaction.get(orders_query):
+            order = order_doc.to_dict()
+            if order.get('status') == 'cancelled' or not order.get('user_id'):
+                continue
+            items_query = order_doc.reference.collection('order_items').select(['product_id', 'quantity'])
+            lines = [(item.get('product_id'), item.get('quantity')) for item in (doc.to_dict() for doc in transaction.get(items_query))]
+            total_amount = order.get('total_amount', order.get('total_price', 0))
+            counted_orders.append((order_doc.id, str(order['user_id']), lines, total_amount))
+        
+        products = get_products_by_ids(product_id for _, _, lines, _ in counted_orders for product_id, _ in lines)
+        hotel_names = {}
+        user_refs = [firestore_client.collection('users').document(user_id) for user_id in {order[1] for order in counted_orders}]
+        if user_refs:
+            for user_doc in firestore_client.get_all(user_refs, transaction=transaction):
+                if user_doc.exists:
+                    hotel_names[user_doc.id] = user_doc.to_dict().get('hotel_name', 'N/A')
+        
+        rollup = _empty_daily_rollup(delivery_date_key)
+        for order_id, user_id, lines, total_amount in counted_orders:
+            _rollup_add_order(rollup, order_id, user_id, hotel_names.get(user_id, 'N/A'), lines, products, total_amount)
+        rollup['updated_at'] = datetime.now(timezone.utc).isoformat()
+        transaction.set(rollup_ref, rollup)
+        return rollup
+    
+    rollup = rebuild_in_transaction(firestore_client.transaction())
+    logger.info(f"[DAILY_ROLLUP] Rebuilt {delivery_date_key} from {rollup['order_count']} orders")
+    return rollup
+
+def get_daily_rollup(delivery_date_key: str) -> Dict:
+    """Return the rollup for a delivery date, rebuilding it if it is not materialized"""
+    firestore_client = get_firestore_client()
+    if firestore_client is None:
+        raise RuntimeError("Firestore client not initialized")
+    
+    snapshot = firestore_client.collection(DAILY_ROLLUPS_COLLECTION).document(delivery_date_key).get()
+    rollup = snapshot.to_dict() if snapshot.exists else None
+    if rollup and rollup.get('materialized'):
+        return rollup
+    return rebuild_daily_rollup(delivery_date_key)
+
+def daily_rollup_vegetables(rollup: Dict):
+    """Shape a rollup for the purchasing reports: (vegetables list, category totals)"""
+    vegetables = [
+        {
+            'product_id': entry['product_id'],
+            'product_name': entry['product_name'],
+            'category': entry['category'],
+            'unit_type': entry['unit_type'],
+            'total_quantity': entry['total_quantity']
+        }
+        for entry in rollup.get('products', {}).values()
+    ]
+    return vegetables, rollup.get('category_totals', {})
+
+def daily_rollup_filling(rollup: Dict):
+    """Shape a rollup for the filling matrix: (hotels list, products list with per-hotel quantities)"""
+    hotels = [
+        {'hotel_id': str(hotel['hotel_id']), 'hotel_name': str(hotel.get('hotel_name', 'N/A'))}
+        for hotel in rollup.get('hotels', {}).values()
+    ]
+    products = {}
+    for user_id, row in rollup.get('matrix', {}).items():
+        for product_key, quantity in row.items():
+            entry = rollup.get('products', {}).get(product_key, {})
+            product = products.setdefault(product_key, {
+                'product_id': str(product_key),
+                'product_name': str(entry.get('product_name', 'Unknown')),
+                'unit_type': str(entry.get('unit_type', 'kg')),
+                'category': str(entry.get('category', 'Other')),
+                'quantities': {}
+            })
+            product['quantities'][str(user_id)] = str(quantity)
+    return hotels, list(products.values())
+
+# ===================================================================
+# ANALYTICS COUNTERS (Admin analytics)
+# ===================================================================
+# analytics_counters holds pre-aggregated revenue so /api/admin/analytics
+# reads a fixed set of documents instead of scanning orders and bills:
+#   month_<YYYY-MM>  revenue and order count for the month, with per-day
+#                    totals in 'days' and per-product totals in 'products'
+#   week_<YYYY-MM-DD> revenue and order count for the ISO week starting
+#                    on that Monday
+#   year_<YYYY>      revenue and order count for the year
+#   hotels           per-hotel revenue, order count and unpaid bill totals
+# Orders are bucketed by their IST order_date_key. Every order or bill write
+# queues the difference between what the document contributed before and
+# after the write as Increments on the same batch or transaction, with the
+# "before" read inside that transaction, so counters change exactly when
+# the document does; rebuild_analytics_counters.py recomputes all counters
+# from scratch.
+ANALYTICS_COUNTERS_COLLECTION = 'analytics_counters'
+ANALYTICS_EXCLUDED_ORDER_STATUSES = ('cancelled', 'rejected')
+# order_items fields order_analytics_contributions() reads
+ANALYTICS_ITEM_FIELDS = ['product_id', 'product_name', 'quantity', 'price_at_order']
+
+def order_analytics_contributions(order: Optional[Dict], items) -> Dict[str, Dict]:
+    """
+    Return what one order adds to the counter documents.
+    
+    Args:
+        order: Order document data (None for "no order")
+        items: Iterable of order_items dicts (product_id, product_name, quantity, price_at_order)
+    
+    Returns:
+        Dict of counter doc id -> nested field values; empty for cancelled/rejected
+        orders and orders without a usable date
+    """
+    if not order or str(order.get('status', '')).lower() in ANALYTICS_EXCLUDED_ORDER_STATUSES:
+        return {}
+    date_key = order.get('order_date_key') or to_ist_date_key(order.get('order_date'))
+    if not date_key:
+        return {}
+    
+    amount = order.get('total_amount')
+    amount = float((amount if amount is not None else order.get('total_price', 0)) or 0)
+    products = {}
+    for item in items or []:
+        product_id = str(item.get('product_id') or '')
+        if not product_id:
+            continue
+        quantity = float(item.get('quantity', 0) or 0)
+        entry = products.setdefault(product_id, {'name': item.get('product_name') or 'Unknown', 'quantity': 0.0, 'revenue': 0.0})
+        entry['quantity'] += quantity
+        entry['revenue'] += quantity * float(item.get('price_at_order') or 0)
+    
+    month_key = date_key[:7]
+    order_day = datetime.strptime(date_key, '%Y-%m-%d').date()
+    week_key = (order_day - timedelta(days=order_day.weekday())).isoformat()
+    contributions = {
+        f'month_{month_key}': {
+            'month': month_key,
+            'revenue': amount,
+            'orders': 1,
+            'days': {date_key[8:]: {'revenue': amount, 'orders': 1}},
+            'products': products
+        },
+        f'week_{week_key}': {'week': week_key, 'revenue': amount, 'orders': 1},
+        f'year_{date_key[:4]}': {'year': date_key[:4], 'revenue': amount, 'orders': 1}
+    }
+    if order.get('user_id'):
+        contributions['hotels'] = {'hotels': {str(order['user_id']): {'revenue': amount, 'orders': 1}}}
+    return contributions
+
+def is_bill_unpaid(bill: Dict) -> bool:
+    """Unpaid bill test shared with the unpaid bills report"""
+    bill_status = str(bill.get('status', '')).lower()
+    return bill.get('paid', False) is False or bool(bill_status and bill_status not in ['paid', 'cancelled'])
+
+def bill_analytics_contributions(bill: Optional[Dict]) -> Dict[str, Dict]:
+    """Return what one bill adds to the counter documents (unpaid totals per hotel)"""
+    if not bill or not is_bill_unpaid(bill):
+        return {}
+    user_id = bill.get('user_id') or bill.get('hotel_id') or bill.get('customer_id')
+    amount = float(bill.get('total_amount') or bill.get('amount') or bill.get('bill_amount') or 0)
+    if not user_id or amount <= 0:
+        return {}
+    return {'hotels': {'hotels': {str(user_id): {'unpaid_total': amount, 'unpaid_count': 1}}}}
+
+def _analytics_counter_delta(old: Dict, new: Dict) -> Dict:
+    """Nested dict of Increment(new - old) for numeric fields; label fields are copied from new"""
+    delta = {}
+    for key in set(old) | set(new):
+        old_value, new_value = old.get(key), new.get(key)
+        if isinstance(old_value, dict) or isinstance(new_value, dict):
+            nested = _analytics_counter_delta(old_value or {}, new_value or {})
+            if nested:
+                delta[key] = nested
+        elif isinstance(old_value, str) or isinstance(new_value, str):
+            if new_value is not None:
+                delta[key] = new_value
+        else:
+            difference = round(float(new_value or 0) - float(old_value or 0), 3)
+            if difference:
+                delta[key] = firestore.Increment(difference)
+    return delta
+
+def _has_increment(delta: Dict) -> bool:
+    return any(
+        _has_increment(value) if isinstance(value, dict) else not isinstance(value, str)
+        for value in delta.values()
+    )
+
+def queue_analytics_change(writer, old_contributions: Dict, new_contributions: Dict) -> List[str]:
+    """
+    Queue the difference between two contribution sets on a batch or transaction.
+    
+    Pass {} as old for a new document and {} as new for a removed one. Use the
+    writer that commits the document itself, and for updates compute old from
+    a read inside the same transaction, so concurrent writes are counted once.
+    
+    Returns:
+        YYYY-MM-DD keys of the days whose counters change, for finish_analytics_change()
+    """
+    counters_ref = get_firestore_client().collection(ANALYTICS_COUNTERS_COLLECTION)
+    updated_at = datetime.now(timezone.utc).isoformat()
+    for doc_id in set(old_contributions) | set(new_contributions):
+        delta = _analytics_counter_delta(old_contributions.get(doc_id, {}), new_contributions.get(doc_id, {}))
+        if not _has_increment(delta):
+            continue
+        delta['updated_at'] = updated_at
+        writer.set(counters_ref.document(doc_id), delta, merge=True)
+    return [
+        f"{doc_id[len('month_'):]}-{day}"
+        for contributions in (old_contributions, new_contributions)
+        for doc_id, counter in contributions.items()
+        if doc_id.startswith('month_')
+        for day in counter.get('days', {})
+    ]
+
+def finish_analytics_change(changed_days, description: str):
+    """Call once the writer from queue_analytics_change() has committed"""
+    invalidate_analytics_range_cache(changed_days)
+    logger.info(f"[ANALYTICS_COUNTERS] {description}")
+
+# ===================================================================
+# ANALYTICS RANGE QUERIES (Cached result sets)
+# ===================================================================
+# /api/admin/analytics?from=&to=&granularity=&group_by= answers arbitrary
+# date ranges. The revenue series comes from the per-day totals in the
+# month_<YYYY-MM> counter docs; group_by scans the orders (hotel) or
+# order_items (product/category) of the range by order_date_key.
+# Group totals are ranked with top_k() and can be limited to the top K.
+# Results are kept in a per-instance LRU keyed by the normalized query.
+# Ranges that end before the pricing window (orders are repriced by
+# finalize_order_prices for a few days after they are placed) are closed:
+# a cached closed range is served for as long as the updated_at stamps of
+# its month counter docs are unchanged, which also catches writes made on
+# other instances. Ranges that reach into the pricing window are recomputed
+# after ANALYTICS_OPEN_RANGE_TTL_SECONDS. A result computed while a counter
+# write was applied on this instance is not stored.
+ANALYTICS_RANGE_CACHE_SIZE = int(os.getenv('ANALYTICS_RANGE_CACHE_SIZE', '128'))
+ANALYTICS_OPEN_RANGE_TTL_SECONDS = int(os.getenv('ANALYTICS_OPEN_RANGE_TTL_SECONDS', '60'))
+ANALYTICS_PRICING_WINDOW_DAYS = int(os.getenv('ANALYTICS_PRICING_WINDOW_DAYS', '7'))
+ANALYTICS_MAX_RANGE_DAYS = 1096
+ANALYTICS_GRANULARITIES = ('day', 'week', 'month')
+ANALYTICS_GROUP_BY = ('hotel', 'product', 'category')
+# Ranking metrics per group_by (first is the default); limit keeps the top K
+ANALYTICS_TOP_METRICS = {
+    'hotel': ('revenue', 'orders'),
+    'product': ('revenue', 'quantity'),
+    'category': ('revenue', 'quantity')
+}
+ANALYTICS_MAX_TOP_K = 500
+_analytics_range_cache = OrderedDict()  # parse_analytics_range_args() key -> (computed_at, closed, version, result)
+_analytics_range_cache_generation = 0
+_analytics_range_cache_lock = threading.Lock()
+
+def invalidate_analytics_range_cache(date_keys):
+    """Drop cached ranges that cover any of the given YYYY-MM-DD date keys"""
+    global _analytics_range_cache_generation
+    date_keys = [key for key in date_keys if key]
+    if not date_keys:
+        return
+    with _analytics_range_cache_lock:
+        _analytics_range_cache_generation += 1
+        for cache_key in [key for key in _analytics_range_cache if any(key[0] <= day <= key[1] for day in date_keys)]:
+            del _analytics_range_cache[cache_key]
+
+def parse_analytics_range_args(args, today) -> tuple:
+    """
+    Normalize the range query parameters.
+    
+    Args:
+        args: request.args (from/to as YYYY-MM-DD, both inclusive; granularity; group_by;
+              metric and limit to rank the groups)
+        today: Current IST date, used for the defaults (last 30 days, by day)
+    
+    Returns:
+        (from_key, to_key, granularity, group_by or '', metric or '', limit or 0) - also the cache key
+    
+    Raises:
+        ValueError: for malformed or out-of-range parameters
+    """
+    try:
+        start = datetime.strptime(args['from'], '%Y-%m-%d').date() if args.get('from') else today - timedelta(days=29)
+        end = datetime.strptime(args['to'], '%Y-%m-%d').date() if args.get('to') else today
+    except ValueError:
+        raise ValueError("'from' and 'to' must be dates in YYYY-MM-DD format")
+    if start > end:
+        raise ValueError("'from' must not be after 'to'")
+    if (end - start).days >= ANALYTICS_MAX_RANGE_DAYS:
+        raise ValueError(f"Date range must not exceed {ANALYTICS_MAX_RANGE_DAYS} days")
+    
+    granularity = (args.get('granularity') or 'day').lower()
+    if granularity not in ANALYTICS_GRANULARITIES:
+        raise ValueError(f"'granularity' must be one of: {', '.join(ANALYTICS_GRANULARITIES)}")
+    group_by = (args.get('group_by') or '').lower()
+    if group_by and group_by not in ANALYTICS_GROUP_BY:
+        raise ValueError(f"'group_by' must be one of: {', '.join(ANALYTICS_GROUP_BY)}")
+    
+    metric, limit = '', 0
+    if group_by:
+        metrics = ANALYTICS_TOP_METRICS[group_by]
+        metric = (args.get('metric') or metrics[0]).lower()
+        if metric not in metrics:
+            raise ValueError(f"'metric' for group_by={group_by} must be one of: {', '.join(metrics)}")
+        try:
+            limit = int(args.get('limit') or 0)
+        except ValueError:
+            raise ValueError("'limit' must be a whole number")
+        if not 0 <= limit <= ANALYTICS_MAX_TOP_K:
+            raise ValueError(f"'limit' must be at most {ANALYTICS_MAX_TOP_K} (omit it to return every group)")
+    return start.isoformat(), end.isoformat(), granularity, group_by, metric, limit
+
+def top_k(totals: Dict[str, Dict], k: Optional[int], metric: str, fallback: Optional[str] = None) -> List[tuple]:
+    """
+    Rank aggregated entries by one metric, best first.
+    
+    With k this keeps a bounded heap (O(n log k)) instead of sorting every
+    entry; k=None (or 0) ranks them all. Entries whose metric is zero are
+    ranked by the fallback metric after all non-zero entries.
+    
+    Args:
+        totals: Dict of id -> totals dict (e.g. {'revenue': ..., 'quantity': ...})
+        k: Number of entries to keep
+        metric: Field of the totals dicts to rank by
+        fallback: Field used to order entries whose metric is zero
+    
+    Returns:
+        List of (id, totals) tuples, ties kept in input order
+    """
+    def rank(entry):
+        value = entry[1].get(metric, 0) or 0
+        if value or not fallback:
+            return (1, value)
+        return (0, entry[1].get(fallback, 0) or 0)
+    
+    if not k:
+        return sorted(totals.items(), key=rank, reverse=True)
+    return heapq.nlargest(k, totals.items(), key=rank)
+
+def analytics_period_key(day, granularity: str) -> str:
+    """Bucket label for a date: the day, the Monday of its ISO week, or YYYY-MM"""
+    if granularity == 'week':
+        return (day - timedelta(days=day.weekday())).isoformat()
+    if granularity == 'month':
+        return day.strftime('%Y-%m')
+    return day.isoformat()
+
+def _analytics_group_totals(firestore_client, from_key: str, to_key: str, group_by: str,
+                            metric: str = 'revenue', limit: int = 0) -> List[Dict]:
+    """
+    Totals per hotel, product or category for orders dated in [from_key, to_key],
+    ranked by metric and cut to the top limit (0 keeps every group). Names are
+    looked up with one batched read for the ranked groups only.
+    """
+    groups = {}
+    if group_by == 'hotel':
+        orders_query = (firestore_client.collection('orders')
+                        .where('order_date_key', '>=', from_key)
+                        .where('order_date_key', '<=', to_key)
+                        .select(['user_id', 'status', 'total_amount', 'total_price']))
+        for order_doc in orders_query.stream():
+            order = order_doc.to_dict() or {}
+            if str(order.get('status', '')).lower() in ANALYTICS_EXCLUDED_ORDER_STATUSES or not order.get('user_id'):
+                continue
+            amount = order.get('total_amount')
+            entry = groups.setdefault(str(order['user_id']), {'revenue': 0.0, 'orders': 0})
+            entry['revenue'] += float((amount if amount is not None else order.get('total_price', 0)) or 0)
+            entry['orders'] += 1
+        
+        ranked = top_k(groups, limit, metric)
+        identities = get_hotel_identities(user_id for user_id, _ in ranked)
+        rows = [
+            {'id': user_id, 'name': identities.get(user_id, {}).get('hotel_name') or 'Unknown', **totals}
+            for user_id, totals in ranked
+        ]
+    else:
+        items_query = (firestore_client.collection_group('order_items')
+                       .where('order_date_key', '>=', from_key)
+                       .where('order_date_key', '<=', to_key)
+                       .select(['product_id', 'product_name', 'quantity', 'price_at_order', 'status']))
+        names = {}
+        for item_doc in items_query.stream():
+            item = item_doc.to_dict() or {}
+            product_id = str(item.get('product_id') or '')
+            if not product_id or str(item.get('status', '')).lower() in ANALYTICS_EXCLUDED_ORDER_STATUSES:
+                continue
+            quantity = float(item.get('quantity', 0) or 0)
+            entry = groups.setdefault(product_id, {'revenue': 0.0, 'quantity': 0.0})
+            entry['revenue'] += quantity * float(item.get('price_at_order') or 0)
+            entry['quantity'] += quantity
+            names.setdefault(product_id, item.get('product_name') or 'Unknown')
+        
+        if group_by == 'product':
+            rows = [{'id': product_id, 'name': names[product_id], **totals} for product_id, totals in top_k(groups, limit, metric)]
+        else:
+            products = get_products_by_ids(groups.keys())
+            categories = {}
+            for product_id, totals in groups.items():
+                category = (products.get(product_id) or {}).get('category') or 'Other'
+                entry = categories.setdefault(category, {'id': category, 'name': category, 'revenue': 0.0, 'quantity': 0.0})
+                entry['revenue'] += totals['revenue']
+                entry['quantity'] += totals['quantity']
+            rows = [entry for _, entry in top_k(categories, limit, metric)]
+    
+    for row in rows:
+        row['revenue'] = round(row['revenue'], 2)
+    return rows
+
+def _analytics_month_keys(from_key: str, to_key: str) -> List[str]:
+    """YYYY-MM of every month counter doc a date range touches"""
+    start = datetime.strptime(from_key, '%Y-%m-%d').date()
+    end = datetime.strptime(to_key, '%Y-%m-%d').date()
+    month_keys = []
+    month = start.replace(day=1)
+    while month <= end:
+        month_keys.append(month.strftime('%Y-%m'))
+        month = (month + timedelta(days=32)).replace(day=1)
+    return month_keys
+
+def _analytics_range_version(firestore_client, from_key: str, to_key: str) -> tuple:
+    """updated_at of the range's month counter docs; changes whenever any instance writes to them"""
+    counters_ref = firestore_client.collection(ANALYTICS_COUNTERS_COLLECTION)
+    refs = [counters_ref.document(f'month_{key}') for key in _analytics_month_keys(from_key, to_key)]
+    return tuple(sorted(
+        (doc.id, (doc.to_dict() or {}).get('updated_at') if doc.exists else None)
+        for doc in firestore_client.get_all(refs, field_paths=['updated_at'])
+    ))
+
+def compute_analytics_range(firestore_client, from_key: str, to_key: str, granularity: str,
+                            group_by: str, metric: str, limit: int) -> Dict:
+    """Build the revenue series (and optional group totals) for one normalized query"""
+    start = datetime.strptime(from_key, '%Y-%m-%d').date()
+    end = datetime.strptime(to_key, '%Y-%m-%d').date()
+    
+    # One batched read of the month counter docs the range touches
+    month_keys = _analytics_month_keys(from_key, to_key)
+    counters_ref = firestore_client.collection(ANALYTICS_COUNTERS_COLLECTION)
+    months = {
+        doc.id[len('month_'):]: doc.to_dict() or {}
+        for doc in firestore_client.get_all([counters_ref.document(f'month_{key}') for key in month_keys])
+        if doc.exists
+    }
+    
+    series = {}
+    day = start
+    while day <= end:
+        counts = months.get(day.strftime('%Y-%m'), {}).get('days', {}).get(day.strftime('%d'), {})
+        bucket = series.setdefault(analytics_period_key(day, granularity), {'revenue': 0.0, 'orders': 0})
+        bucket['revenue'] += float(counts.get('revenue', 0) or 0)
+        bucket['orders'] += int(counts.get('orders', 0) or 0)
+        day += timedelta(days=1)
+    
+    result = {
+        'range': {'from': from_key, 'to': to_key, 'granularity': granularity, 'group_by': group_by or None},
+        'ranking': {'metric': metric, 'limit': limit or None} if group_by else None,
+        'totals': {
+            'revenue': round(sum(bucket['revenue'] for bucket in series.values()), 2),
+            'orders': sum(bucket['orders'] for bucket in series.values())
+        },
+        'series': [
+            {'period': period, 'revenue': round(bucket['revenue'], 2), 'orders': bucket['orders']}
+            for period, bucket in series.items()
+        ],
+        'computed_at': datetime.now(timezone.utc).isoformat()
+    }
+    if group_by:
+        result['groups'] = _analytics_group_totals(firestore_client, from_key, to_key, group_by, metric, limit)
+    return result
+
+def get_analytics_range(firestore_client, query_key: tuple, today) -> tuple:
+    """
+    Serve a normalized range query from the LRU cache, computing it on a miss.
+    
+    Returns:
+        (result dict, True if served from cache)
+    """
+    closed = query_key[1] < (today - timedelta(days=ANALYTICS_PRICING_WINDOW_DAYS)).isoformat()
+    now = time.monotonic()
+    with _analytics_range_cache_lock:
+        generation = _analytics_range_cache_generation
+        entry = _analytics_range_cache.get(query_key)
+    
+    # Closed ranges are checked against the counter docs (one small batched read)
+    version = _analytics_range_version(firestore_client, query_key[0], query_key[1]) if closed else None
+    if entry is not None and (entry[2] == version if entry[1] else now - entry[0] < ANALYTICS_OPEN_RANGE_TTL_SECONDS):
+        with _analytics_range_cache_lock:
+            if query_key in _analytics_range_cache:
+                _analytics_range_cache.move_to_end(query_key)
+        return entry[3], True
+    
+    result = compute_analytics_range(firestore_client, *query_key)
+    with _analytics_range_cache_lock:
+        # Skip storing if a counter write landed while we were computing
+        if generation == _analytics_range_cache_generation:
+            _analytics_range_cache[query_key] = (now, closed, version, result)
+            _analytics_range_cache.move_to_end(query_key)
+            while len(_analytics_range_cache) > ANALYTICS_RANGE_CACHE_SIZE:
+                _analytics_range_cache.popitem(last=False)
+    logger.info(f"[ANALYTICS_RANGE] Computed {query_key} ({'closed' if closed else 'open'} range)")
+    return result, False
+
+# Revenue trend buckets: default and maximum window (number of buckets)
+ANALYTICS_TREND_WINDOWS = {'day': (30, 366), 'week': (12, 104), 'month': (12, 36)}
+
+def load_revenue_trend(firestore_client, bucket: str, window: int, today) -> tuple:
+    """
+    Revenue and order count for the last `window` buckets, ending with the current one.
+    
+    Day buckets come from the per-day totals in the month_<YYYY-MM> counter
+    docs, week and month buckets from the week_<Monday> and month_<YYYY-MM>
+    docs, so a call never reads more than one document per bucket.
+    
+    Returns:
+        (list of {'date', 'revenue', 'orders'} oldest first, number of documents read)
+    """
+    if bucket == 'day':
+        periods = [today - timedelta(days=offset) for offset in range(window - 1, -1, -1)]
+        doc_ids = sorted({f"month_{day.strftime('%Y-%m')}" for day in periods})
+    elif bucket == 'week':
+        monday = today - timedelta(days=today.weekday())
+        periods = [(monday - timedelta(weeks=offset)).isoformat() for offset in range(window - 1, -1, -1)]
+        doc_ids = [f'week_{period}' for period in periods]
+    else:
+        periods = []
+        year, month = today.year, today.month
+        for _ in range(window):
+            periods.append(f'{year:04d}-{month:02d}')
+            year, month = (year, month - 1) if month > 1 else (year - 1, 12)
+        periods.reverse()
+        doc_ids = [f'month_{period}' for period in periods]
+    
+    counters_ref = firestore_client.collection(ANALYTICS_COUNTERS_COLLECTION)
+    counters = {
+        doc.id: doc.to_dict() or {}
+        for doc in firestore_client.get_all([counters_ref.document(doc_id) for doc_id in doc_ids])
+        if doc.exists
+    }
+    
+    trend = []
+    for period in periods:
+        if bucket == 'day':
+            counts = counters.get(f"month_{period.strftime('%Y-%m')}", {}).get('days', {}).get(period.strftime('%d'), {})
+            period = period.isoformat()
+        else:
+            counts = counters.get(f'{bucket}_{period}', {})
+        trend.append({
+            'date': period,
+            'revenue': round(float(counts.get('revenue', 0) or 0), 2),
+            'orders': int(counts.get('orders', 0) or 0)
+        })
+    return trend, len(doc_ids)
+
+# ===================================================================
+# ANALYTICS SNAPSHOT (Stale-while-revalidate)
+# ===================================================================
+# The dashboard payload of /api/admin/analytics is kept in memory and in
+# analytics_snapshots/admin_dashboard, and is always served as-is with its
+# generated_at time. Once it is older than ANALYTICS_SNAPSHOT_MAX_AGE_SECONDS
+# a single background thread per instance rebuilds it (adopting a newer copy
+# persisted by another instance instead, if there is one). A cold instance
+# with no snapshot anywhere computes it once; concurrent requests wait on
+# that same in-flight computation.
+# Cloud Functions throttles CPU once a response has been sent, so a
+# background rebuild can stall. A rebuild running for longer than
+# ANALYTICS_SNAPSHOT_WAIT_SECONDS is treated as dead and replaced, and a
+# snapshot older than ANALYTICS_SNAPSHOT_HARD_MAX_AGE_SECONDS is rebuilt
+# inside the request instead of being served.
+ANALYTICS_SNAPSHOTS_COLLECTION = 'analytics_snapshots'
+ANALYTICS_SNAPSHOT_DOC = 'admin_dashboard'
+ANALYTICS_SNAPSHOT_MAX_AGE_SECONDS = int(os.getenv('ANALYTICS_SNAPSHOT_MAX_AGE_SECONDS', '300'))
+ANALYTICS_SNAPSHOT_HARD_MAX_AGE_SECONDS = int(os.getenv('ANALYTICS_SNAPSHOT_HARD_MAX_AGE_SECONDS', '3600'))
+ANALYTICS_SNAPSHOT_WAIT_SECONDS = 30
+_analytics_snapshot = {'payload': None, 'generated_at': None}  # generated_at is an aware UTC datetime
+_analytics_snapshot_lock = threading.Lock()
+_analytics_snapshot_refresh = None  # Future of the running rebuild, if any
+_analytics_snapshot_refresh_started = 0.0  # time.monotonic() when that rebuild started
+
+def _analytics_snapshot_age_seconds(generated_at) -> float:
+    return (datetime.now(timezone.utc) - generated_at).total_seconds()
+
+def _store_analytics_snapshot(payload: Dict, generated_at) -> bool:
+    """Keep a snapshot in memory unless the one held is newer; returns True if stored"""
+    with _analytics_snapshot_lock:
+        current = _analytics_snapshot['generated_at']
+        if current is not None and current >= generated_at:
+            return False
+        _analytics_snapshot.update({'payload': payload, 'generated_at': generated_at})
+        return True
+
+def _load_persisted_analytics_snapshot(firestore_client):
+    """Adopt the persisted snapshot if it is newer than the in-memory one"""
+    try:
+        doc = firestore_client.collection(ANALYTICS_SNAPSHOTS_COLLECTION).document(ANALYTICS_SNAPSHOT_DOC).get()
+        data = doc.to_dict() if doc.exists else None
+        if data and data.get('payload') and data.get('generated_at'):
+            _store_analytics_snapshot(data['payload'], datetime.fromisoformat(data['generated_at']))
+    except Exception as e:
+        logger.warning(f"[ANALYTICS_SNAPSHOT] Could not read persisted snapshot: {str(e)}")
+
+def _rebuild_analytics_snapshot(firestore_client):
+    """Refresh the snapshot, preferring a fresh copy persisted by another instance"""
+    _load_persisted_analytics_snapshot(firestore_client)
+    with _analytics_snapshot_lock:
+        generated_at = _analytics_snapshot['generated_at']
+    if generated_at is not None and _analytics_snapshot_age_seconds(generated_at) < ANALYTICS_SNAPSHOT_MAX_AGE_SECONDS:
+        logger.info(f"[ANALYTICS_SNAPSHOT] Adopted snapshot generated at {generated_at.isoformat()}")
+        return
+    
+    started = time.monotonic()
+    generated_at = datetime.now(timezone.utc)
+    payload = compute_admin_analytics_summary(firestore_client, datetime.now(IST).date())
+    _store_analytics_snapshot(payload, generated_at)
+    try:
+        firestore_client.collection(ANALYTICS_SNAPSHOTS_COLLECTION).document(ANALYTICS_SNAPSHOT_DOC).set({
+            'payload': payload,
+            'generated_at': generated_at.isoformat()
+        })
+    except Exception as e:
+        logger.warning(f"[ANALYTICS_SNAPSHOT] Could not persist snapshot: {str(e)}")
+    logger.info(f"[ANALYTICS_SNAPSHOT] Rebuilt in {(time.monotonic() - started) * 1000:.0f} ms")
+
+def refresh_analytics_snapshot(firestore_client) -> Future:
+    """
+    Return the in-flight snapshot rebuild, starting one in the background if none is running.
+    
+    A rebuild still running after ANALYTICS_SNAPSHOT_WAIT_SECONDS is assumed
+    stalled and a new one is started; whichever finishes keeps the newest
+    snapshot (see _store_analytics_snapshot).
+    """
+    global _analytics_snapshot_refresh, _analytics_snapshot_refresh_started
+    with _analytics_snapshot_lock:
+        if _analytics_snapshot_refresh is not None and not _analytics_snapshot_refresh.done():
+            running_seconds = time.monotonic() - _analytics_snapshot_refresh_started
+            if running_seconds < ANALYTICS_SNAPSHOT_WAIT_SECONDS:
+                return _analytics_snapshot_refresh
+            logger.warning(f"[ANALYTICS_SNAPSHOT] Rebuild running for {running_seconds:.0f}s, starting a new one")
+        future = _analytics_snapshot_refresh = Future()
+        _analytics_snapshot_refresh_started = time.monotonic()
+    
+    def run():
+        try:
+            _rebuild_analytics_snapshot(firestore_client)
+            future.set_result(True)
+        except Exception as e:
+            logger.error(f"[ANALYTICS_SNAPSHOT] Rebuild failed: {str(e)}")
+            future.set_exception(e)
+    
+    threading.Thread(target=run, name='analytics-snapshot-refresh', daemon=True).start()
+    return future
+
+def get_admin_analytics_snapshot(firestore_client) -> tuple:
+    """
+    Return the dashboard analytics snapshot without waiting for a refresh.
+    
+    Only a cold instance with no snapshot in memory or in Firestore, or a
+    snapshot older than ANALYTICS_SNAPSHOT_HARD_MAX_AGE_SECONDS, waits on the
+    shared in-flight rebuild. If that rebuild fails past the hard max age, the
+    old snapshot is served and marked stale.
+    
+    Returns:
+        (payload dict, generated_at datetime, True if older than the max age)
+    
+    Raises:
+        Exception: if the first computation fails or exceeds ANALYTICS_SNAPSHOT_WAIT_SECONDS
+    """
+    with _analytics_snapshot_lock:
+        payload, generated_at = _analytics_snapshot['payload'], _analytics_snapshot['generated_at']
+    
+    if payload is None:
+        _load_persisted_analytics_snapshot(firestore_client)
+        with _analytics_snapshot_lock:
+            payload, generated_at = _analytics_snapshot['payload'], _analytics_snapshot['generated_at']
+    
+    if payload is None:
+        refresh_analytics_snapshot(firestore_client).result(timeout=ANALYTICS_SNAPSHOT_WAIT_SECONDS)
+        with _analytics_snapshot_lock:
+            payload, generated_at = _analytics_snapshot['payload'], _analytics_snapshot['generated_at']
+    
+    if _analytics_snapshot_age_seconds(generated_at) >= ANALYTICS_SNAPSHOT_HARD_MAX_AGE_SECONDS:
+        try:
+            refresh_analytics_snapshot(firestore_client).result(timeout=ANALYTICS_SNAPSHOT_WAIT_SECONDS)
+        except Exception as e:
+            logger.warning(f"[ANALYTICS_SNAPSHOT] Inline rebuild failed, serving snapshot from {generated_at.isoformat()}: {str(e)}")
+        with _analytics_snapshot_lock:
+            payload, generated_at = _analytics_snapshot['payload'], _analytics_snapshot['generated_at']
+    
+    stale = _analytics_snapshot_age_seconds(generated_at) >= ANALYTICS_SNAPSHOT_MAX_AGE_SECONDS
+    if stale:
+        refresh_analytics_snapshot(firestore_client)
+    return payload, generated_at, stale
+
 # ===================================================================
 # SESSION MANAGEMENT
 # ===================================================================
@@ -497,7 +1818,7 @@ def detect_language(text: str) -> str:
 def fetch_available_products(limit: int = 20) -> List[Dict[str, Any]]:
     """Fetch available products from Firestore"""
     try:
-        if db is None:
+        if get_firestore_client() is None:
             logger.error("Firestore client not initialized")
             return []
         
@@ -567,12 +1888,12 @@ def health_check():
             "deepseek": deepseek is not None,
             "translation": translator_available,
             "language_detection": detector_available,
-            "firestore": db is not None
+            "firestore": _firebase_db_client is not None
         }
     }
     
     # Add Firestore connectivity check
-    if db is not None:
+    if get_firestore_client() is not None:
         try:
             settings_ref = get_firestore_client().collection('system_settings').document('status')
             doc = settings_ref.get()
@@ -583,6 +1904,26 @@ def health_check():
     
     return jsonify(status_info)
 
+@app.route('/health/ready', methods=['GET'])
+def readiness_check():
+    """Readiness probe - 200 once the shared Firestore channel is warmed up, 503 otherwise"""
+    if _firestore_warmup['state'] in ('cold', 'failed'):
+        # Not pre-warmed on this instance (or the last attempt failed): warm up now
+        warm_up_firestore()
+    
+    ready = _firestore_warmup['state'] == 'ready'
+    return jsonify({
+        'ready': ready,
+        'firestore': {
+            'client_initialized': _firebase_db_client is not None,
+            'channel_state': _firestore_warmup['state'],
+            'warmup_ms': _firestore_warmup['warmup_ms'],
+            'ready_at': _firestore_warmup['ready_at'],
+            'error': _firestore_warmup['error'],
+            'prewarm_enabled': FIRESTORE_PREWARM
+        }
+    }), 200 if ready else 503
+
 # ===================================================================
 # DATABASE MAINTENANCE ENDPOINTS
 # ===================================================================
@@ -592,7 +1933,7 @@ def health_check():
 def fix_database_encoding(current_user):
     """Fix UTF-8 encoding issues in product names - Firestore version"""
     try:
-        if db is None:
+        if get_firestore_client() is None:
             logger.error("Firestore client not initialized")
             return jsonify({'error': 'Database connection error'}), 500
         
@@ -920,7 +2261,7 @@ def get_public_products():
 def get_vegetables():
     """Get vegetable prices from Firestore"""
     try:
-        if db is None:
+        if get_firestore_client() is None:
             logger.error("Firestore client not initialized")
             return jsonify({'error': 'Database connection error'}), 500
         
@@ -1380,7 +2721,7 @@ def hotel_dashboard(current_user):
     try:
         user_id = current_user.get('id')
         
-        if db is None:
+        if get_firestore_client() is None:
             logger.error("Firestore client not initialized")
             return jsonify({'error': 'Database connection error'}), 500
         
@@ -1431,43 +2772,42 @@ def get_hotel_orders(current_user):
             return jsonify({'error': 'Database connection error'}), 500
         
         orders = []
-        query = firestore_db.collection('orders').where('user_id', '==', user_id).stream()
+        order_docs = list(firestore_db.collection('orders').where('user_id', '==', user_id).stream())
         
-        for doc in query:
+        # Fetch every order's items subcollection concurrently
+        items_per_order = fetch_order_items_concurrently(doc.reference for doc in order_docs)
+        
+        for doc, item_docs in zip(order_docs, items_per_order):
             order = doc.to_dict()
             order['id'] = doc.id
             order['order_id'] = doc.id
             
-            # Fetch order items from subcollection
             items = []
-            try:
-                items_query = firestore_db.collection('orders').document(doc.id).collection('order_items').stream()
-                for item_doc in items_query:
+            if item_docs is None:
+                logger.warning(f"Could not fetch items for order {doc.id}")
+            else:
+                for item_doc in item_docs:
                     item = item_doc.to_dict()
                     item['item_id'] = item_doc.id
-                    
-                    # Get product details if not already in item
-                    if 'product_id' in item and not item.get('product_name'):
-                        try:
-                            product_id_str = str(item['product_id'])
-                            product_doc = firestore_db.collection('products').document(product_id_str).get()
-                            if product_doc.exists:
-                                product = product_doc.to_dict()
-                                item['product_name'] = product.get('name', 'Unknown')
-                                item['unit_type'] = item.get('unit_type') or product.get('unit_type', 'kg')
-                        except Exception as prod_err:
-                            logger.warning(f"Could not fetch product details for {item.get('product_id')}: {str(prod_err)}")
-                            item['product_name'] = item.get('product_name', 'Unknown')
-                            item['unit_type'] = item.get('unit_type', 'kg')
-                    
                     items.append(item)
-            except Exception as items_err:
-                logger.warning(f"Could not fetch items for order {doc.id}: {str(items_err)}")
             
             order['items'] = items
             logger.info(f"Order {doc.id} has {len(items)} items")
             orders.append(order)
         
+        # Fill in product details for items that don't carry them (one cached lookup for all orders)
+        products = get_products_by_ids(
+            item['product_id'] for order in orders for item in order['items']
+            if 'product_id' in item and not item.get('product_name')
+        )
+        for order in orders:
+            for item in order['items']:
+                if 'product_id' in item and not item.get('product_name'):
+                    product = products.get(str(item['product_id']))
+                    if product:
+                        item['product_name'] = product.get('name', 'Unknown')
+                        item['unit_type'] = item.get('unit_type') or product.get('unit_type', 'kg')
+        
         # Sort by order_date descending
         orders = sorted(orders, key=lambda x: x.get('order_date', ''), reverse=True)
         
@@ -1513,22 +2853,20 @@ def get_hotel_order_detail(current_user, order_id):
         for item_doc in items_query:
             item = item_doc.to_dict()
             item['item_id'] = item_doc.id
-            
-            # Get product details
+            items.append(item)
+        
+        # Get product details from the catalog cache
+        products = get_products_by_ids(item['product_id'] for item in items if 'product_id' in item)
+        for item in items:
             if 'product_id' in item:
-                try:
-                    product_id_str = str(item['product_id'])  # Convert to string for Firestore
-                    product_doc = firestore_db.collection('products').document(product_id_str).get()
-                    if product_doc.exists:
-                        product = product_doc.to_dict()
-                        item['product_name'] = product.get('name', 'Unknown')
-                        item['unit'] = product.get('unit_type', 'kg')
-                except:
+                product = products.get(str(item['product_id']))
+                if product:
+                    item['product_name'] = product.get('name', 'Unknown')
+                    item['unit'] = product.get('unit_type', 'kg')
+                elif str(item['product_id']) not in products:
                     logger.warning(f"Could not fetch product details for {item['product_id']}")
                     item['product_name'] = 'Unknown'
                     item['unit'] = 'kg'
-            
-            items.append(item)
         
         order['items'] = items
         
@@ -1554,47 +2892,35 @@ def get_hotel_bills(current_user):
             logger.error("Firestore client not initialized")
             return jsonify({'error': 'Database connection error'}), 500
         
-        # Get all orders for this user
-        orders_query = firestore_db.collection('orders').where('user_id', '==', user_id).stream()
-        order_ids = [doc.id for doc in orders_query]
-        
-        if not order_ids:
-            return jsonify({'bills': [], 'success': True})
-        
-        # Get bills associated with these orders
+        # Get this hotel's bills (indexed on user_id)
         bills = []
-        bills_query = firestore_db.collection('bills').stream()
-        
-        for bill_doc in bills_query:
+        for bill_doc in firestore_db.collection('bills').where('user_id', '==', str(user_id)).stream():
             bill = bill_doc.to_dict()
-            # Check if this bill belongs to one of the user's orders
-            if bill.get('order_id') in order_ids:
-                bill['bill_id'] = bill_doc.id
-                
-                # Fetch order_items from subcollection if not already in bill
-                if not bill.get('items') or len(bill.get('items', [])) == 0:
-                    try:
-                        order_doc = get_firestore_client().collection('orders').document(bill.get('order_id')).get()
-                        if order_doc.exists:
-                            items_query = order_doc.reference.collection('order_items').stream()
-                            bill_items = []
-                            for item_doc in items_query:
-                                item_data = item_doc.to_dict()
-                                bill_items.append({
-                                    'product_id': str(item_data.get('product_id', '')),
-                                    'product_name': item_data.get('product_name', ''),
-                                    'quantity': float(item_data.get('quantity', 0)),
-                                    'price_at_order': float(item_data.get('price_at_order', 0)),
-                                    'price_per_unit': float(item_data.get('price_at_order', item_data.get('price_per_unit', 0))),
-                                    'subtotal': float(item_data.get('subtotal', 0)),
-                                    'unit_type': item_data.get('unit_type', 'kg')
-                                })
-                            if bill_items:
-                                bill['items'] = bill_items
-                    except Exception as e:
-                        logger.warning(f"Could not fetch order_items for bill: {str(e)}")
-                
-                bills.append(bill)
+            bill['bill_id'] = bill_doc.id
+            bills.append(bill)
+        
+        # Fill in items for bills that don't carry them, with one read of the hotel's order items
+        if any(not bill.get('items') for bill in bills):
+            try:
+                items_by_order = get_order_items_for_user(user_id)
+                for bill in bills:
+                    if not bill.get('items'):
+                        bill_items = [
+                            {
+                                'product_id': str(item_data.get('product_id', '')),
+                                'product_name': item_data.get('product_name', ''),
+                                'quantity': float(item_data.get('quantity', 0)),
+                                'price_at_order': float(item_data.get('price_at_order', 0)),
+                                'price_per_unit': float(item_data.get('price_at_order', item_data.get('price_per_unit', 0))),
+                                'subtotal': float(item_data.get('subtotal', 0)),
+                                'unit_type': item_data.get('unit_type', 'kg')
+                            }
+                            for item_data in items_by_order.get(str(bill.get('order_id')), [])
+                        ]
+                        if bill_items:
+                            bill['items'] = bill_items
+            except Exception as e:
+                logger.warning(f"Could not fetch order_items for bills: {str(e)}")
         
         # Sort by bill_date descending
         bills = sorted(bills, key=lambda x: x.get('bill_date', ''), reverse=True)
@@ -1621,16 +2947,9 @@ def get_hotel_notifications(current_user):
             logger.error("Firestore client not initialized")
             return jsonify({'error': 'Database connection error'}), 500
         
-        # Get all orders for this user
-        orders_query = firestore_db.collection('orders').where('user_id', '==', user_id).stream()
-        order_ids = [doc.id for doc in orders_query]
-        
-        if not order_ids:
-            return jsonify({'notifications': [], 'success': True})
-        
-        # Get bills associated with these orders
+        # Get this hotel's bills (indexed on user_id)
         notifications = []
-        bills_query = firestore_db.collection('bills').stream()
+        bills_query = firestore_db.collection('bills').where('user_id', '==', str(user_id)).stream()
         
         # Get current date
         now = datetime.now(timezone.utc)
@@ -1639,10 +2958,6 @@ def get_hotel_notifications(current_user):
         for bill_doc in bills_query:
             bill = bill_doc.to_dict()
             
-            # Check if this bill belongs to one of the user's orders
-            if bill.get('order_id') not in order_ids:
-                continue
-            
             # Check if bill is unpaid
             if bill.get('paid', False):
                 continue
@@ -1713,20 +3028,17 @@ def get_hotel_cart(current_user):
         for doc in carts_ref.stream():
             cart_item = doc.to_dict()
             cart_item['cart_id'] = doc.id
-            
-            # Fetch product details to include current price and unit info
-            try:
-                product_doc = firestore_db.collection('products').document(cart_item.get('product_id')).get()
-                if product_doc.exists:
-                    product = product_doc.to_dict()
-                    cart_item['product_name'] = product.get('name')
-                    cart_item['current_price'] = product.get('price_per_unit')
-                    cart_item['unit'] = product.get('unit_type')
-            except Exception as e:
-                logger.warning(f"Could not fetch product details for {cart_item.get('product_id')}: {str(e)}")
-            
             cart_items.append(cart_item)
         
+        # Fetch product details to include current price and unit info
+        products = get_products_by_ids(cart_item.get('product_id') for cart_item in cart_items)
+        for cart_item in cart_items:
+            product = products.get(str(cart_item.get('product_id')))
+            if product:
+                cart_item['product_name'] = product.get('name')
+                cart_item['current_price'] = product.get('price_per_unit')
+                cart_item['unit'] = product.get('unit_type')
+        
         return jsonify({'items': cart_items, 'success': True})
     except Exception as e:
         logger.error(f"Get cart error: {str(e)}")
@@ -1891,22 +3203,22 @@ def calculate_cart_total(current_user):
         if not cart_items:
             return jsonify({'total': 0, 'item_count': 0})
         
-        if db is None:
+        if get_firestore_client() is None:
             logger.error("Firestore client not initialized")
             return jsonify({'error': 'Database connection error'}), 500
         
         total_amount = 0.0
         item_details = []
+        products = get_products_by_ids(item['product_id'] for item in cart_items)
         
         for item in cart_items:
             product_id = item['product_id']
             quantity = item['quantity']
             
             try:
-                product_doc = get_firestore_client().collection('products').document(str(product_id)).get()
+                product = products.get(str(product_id))
                 
-                if product_doc.exists:
-                    product = product_doc.to_dict()
+                if product:
                     if product.get('is_available'):
                         item_total = float(product.get('price_per_unit', 0)) * quantity
                         total_amount += item_total
@@ -2074,123 +3386,10 @@ def get_todays_vegetables(current_user):
         
         logger.info(f"[TODAYS_VEG] Current time: {now.isoformat()}, Target date: {target_date.strftime('%Y-%m-%d')}")
         
-        # Aggregate vegetables from all orders (including pending, confirmed, etc.) with delivery_date = target_date
-        vegetables = {}
-        category_totals = {}
-        total_quantity = 0
-        processed_orders = 0
-        
-        orders_query = get_firestore_client().collection('orders').stream()
-        for order_doc in orders_query:
-            order = order_doc.to_dict()
-            delivery_date_raw = order.get('delivery_date')
-            
-            logger.info(f"[TODAYS_VEG] Order {order_doc.id}: delivery_date_raw={delivery_date_raw}, type={type(delivery_date_raw)}")
-            
-            # Convert delivery_date to date object - handle multiple formats
-            if delivery_date_raw is None:
-                continue
-            
-            try:
-                delivery_dt = None
-                
-                # Check if it's already a datetime object (from Firestore Timestamp)
-                if hasattr(delivery_date_raw, 'date'):
-                    delivery_dt = delivery_date_raw.date()
-                    logger.info(f"[TODAYS_VEG] Converted from datetime: {delivery_dt}")
-                # Check if it's a string
-                elif isinstance(delivery_date_raw, str):
-                    # Try YYYY-MM-DD format first (ISO format - most common)
-                    if len(delivery_date_raw) == 10 and delivery_date_raw[4] == '-':
-                        try:
-                            delivery_dt = datetime.strptime(delivery_date_raw, '%Y-%m-%d').date()
-                            logger.info(f"[TODAYS_VEG] Parsed ISO format: {delivery_dt}")
-                        except ValueError:
-                            pass
-                    
-                    # Try longer ISO format (YYYY-MM-DDTHH:MM:SS)
-                    if delivery_dt is None and len(delivery_date_raw) >= 19 and delivery_date_raw[4] == '-':
-                        try:
-                            delivery_dt = datetime.fromisoformat(delivery_date_raw.replace('Z', '+00:00')).date()
-                            logger.info(f"[TODAYS_VEG] Parsed ISO 8601 format: {delivery_dt}")
-                        except (ValueError, AttributeError):
-                            pass
-                    
-                    # Try RFC format as fallback
-                    if delivery_dt is None:
-                        try:
-                            from email.utils import parsedate_to_datetime
-                            parsed_dt = parsedate_to_datetime(delivery_date_raw)
-                            # Handle timezone-aware datetime
-                            if parsed_dt.tzinfo is not None:
-                                delivery_dt = parsed_dt.astimezone().date()
-                            else:
-                                delivery_dt = parsed_dt.date()
-                            logger.info(f"[TODAYS_VEG] Parsed RFC format: {delivery_dt}")
-                        except (TypeError, ValueError):
-                            pass
-                    
-                    # If still no date was parsed, skip this order
-                    if delivery_dt is None:
-                        logger.warning(f"[TODAYS_VEG] Could not parse delivery_date '{delivery_date_raw}'")
-                        continue
-                else:
-                    logger.warning(f"[TODAYS_VEG] Unknown delivery_date type: {type(delivery_date_raw)}")
-                    continue
-                
-                # Check if delivery_date matches target date
-                if delivery_dt != target_date:
-                    logger.info(f"[TODAYS_VEG] Date mismatch: {delivery_dt} != {target_date}")
-                    continue
-                
-                # Skip cancelled orders only
-                if order.get('status') == 'cancelled':
-                    continue
-                
-                processed_orders += 1
-                logger.info(f"[TODAYS_VEG] Processing order {order_doc.id}")
-                
-            except Exception as e:
-                logger.error(f"[TODAYS_VEG] Error parsing delivery_date: {str(e)}")
-                import traceback
-                logger.error(f"[TODAYS_VEG] Traceback: {traceback.format_exc()}")
-                continue
-            
-            # Get items for this order
-            items_query = get_firestore_client().collection('orders').document(order_doc.id).collection('order_items').stream()
-            for item_doc in items_query:
-                item = item_doc.to_dict()
-                product_id = item.get('product_id')
-                quantity = float(item.get('quantity', 0))
-                
-                logger.info(f"[TODAYS_VEG] Item: product_id={product_id}, quantity={quantity}")
-                
-                # Get product details
-                product_doc = get_firestore_client().collection('products').document(str(product_id)).get()
-                if product_doc.exists:
-                    product = product_doc.to_dict()
-                    category = product.get('category', 'Other')
-                    product_name = product.get('name', f'Product {product_id}')
-                    unit_type = product.get('unit_type', 'kg')
-                    
-                    # Aggregate by product
-                    key = f"{product_id}:{product_name}"
-                    if key not in vegetables:
-                        vegetables[key] = {
-                            'product_id': product_id,
-                            'product_name': product_name,
-                            'category': category,
-                            'unit_type': unit_type,
-                            'total_quantity': 0
-                        }
-                    vegetables[key]['total_quantity'] += quantity
-                    total_quantity += quantity
-                    
-                    # Aggregate by category
-                    if category not in category_totals:
-                        category_totals[category] = {'count': 0, 'total_quantity': 0}
-                    category_totals[category]['count'] += 1
-                    category_totals[category]['total_quantity'] += quantity
+        # Served from the delivery date's rollup (non-cancelled orders only)
+        rollup = get_daily_rollup(target_date.strftime('%Y-%m-%d'))
+        vegetables, category_totals = daily_rollup_vegetables(rollup)
+        processed_orders = rollup['order_count']
         
         logger.info(f"[TODAYS_VEG] Found {processed_orders} orders for {target_date.strftime('%Y-%m-%d')}, {len(vegetables)} unique products")
         
@@ -2198,7 +3397,7 @@ def get_todays_vegetables(current_user):
             'date': now.strftime('%d %B %Y'),
             'day': now.strftime('%A'),
             'target_date': target_date.strftime('%Y-%m-%d'),
-            'vegetables': list(vegetables.values()),
+            'vegetables': vegetables,
             'category_totals': category_totals,
             'total_items': len(vegetables),
             'total_orders': processed_orders,
@@ -2217,7 +3416,7 @@ def get_todays_hotels_orders(current_user):
     try:
         from datetime import datetime, time, timedelta
         
-        now = datetime.now()
+        now = datetime.now(IST)
         current_time = now.time()
         
         # Show yesterday's orders (for today's delivery)
@@ -2229,54 +3428,18 @@ def get_todays_hotels_orders(current_user):
         date_str = now.strftime('%d %B %Y')
         day_str = now.strftime('%A')
         
-        # Get all orders from target_date
+        # Get all orders placed on target_date (IST)
         orders = []
-        orders_query = get_firestore_client().collection('orders').stream()
+        orders_query = get_firestore_client().collection('orders').where(
+            'order_date_key', '==', target_date.strftime('%Y-%m-%d')
+        ).stream()
+        order_docs = [order_doc for order_doc in orders_query if order_doc.to_dict().get('status') != 'cancelled']
         
-        for order_doc in orders_query:
+        # Fetch every order's items subcollection concurrently
+        items_per_order = fetch_order_items_concurrently(order_doc.reference for order_doc in order_docs)
+        
+        for order_doc, item_docs in zip(order_docs, items_per_order):
             order = order_doc.to_dict()
-            order_date_raw = order.get('order_date')
-            order_date = None
-            
-            # Parse order_date with multiple format support
-            if not order_date_raw:
-                continue
-            
-            if isinstance(order_date_raw, str):
-                # Try ISO format (10 chars, YYYY-MM-DD)
-                if len(order_date_raw) >= 10 and order_date_raw[4] == '-':
-                    try:
-                        order_date = datetime.strptime(order_date_raw[:10], '%Y-%m-%d').date()
-                    except ValueError:
-                        pass
-                
-                # Try DD Mon YYYY format if ISO didn't work
-                if order_date is None:
-                    try:
-                        order_date = datetime.strptime(order_date_raw, '%d %b %Y').date()
-                    except ValueError:
-                        pass
-                
-                # Try ISO 8601 format if others didn't work
-                if order_date is None:
-                    try:
-                        order_date = datetime.fromisoformat(order_date_raw.replace('Z', '+00:00')).date()
-                    except ValueError:
-                        pass
-            else:
-                # If it's a Timestamp object
-                try:
-                    if hasattr(order_date_raw, 'date'):
-                        order_date = order_date_raw.date()
-                except:
-                    pass
-            
-            if order_date is None or order_date != target_date:
-                continue
-            
-            # Skip cancelled orders
-            if order.get('status') == 'cancelled':
-                continue
             
             order_id = order_doc.id
             order['order_id'] = order_id
@@ -2294,10 +3457,12 @@ def get_todays_hotels_orders(current_user):
             
             # Get items count and total quantity
             items_list = []
-            items_query = get_firestore_client().collection('orders').document(order_id).collection('order_items').stream()
             item_count = 0
             total_quantity = 0
-            for item_doc in items_query:
+            if item_docs is None:
+                # A packing report with an order's items missing is wrong, not partial
+                raise RuntimeError(f"order_items read failed for order {order_doc.id}")
+            for item_doc in item_docs:
                 item = item_doc.to_dict()
                 item_count += 1
                 total_quantity += float(item.get('quantity', 0))
@@ -2395,126 +3560,16 @@ def get_vegetables_history(current_user):
         
         logger.info(f"[VEGETABLES_HISTORY] Processing vegetables for delivery_date: {delivery_date}")
         
-        # Aggregate vegetables
-        vegetables = {}
-        category_totals = {}
-        
-        orders_query = get_firestore_client().collection('orders').stream()
-        order_count = 0
-        for order_doc in orders_query:
-            order = order_doc.to_dict()
-            delivery_date_raw = order.get('delivery_date')
-            
-            logger.info(f"[VEGETABLES_HISTORY] Order {order_doc.id}: delivery_date_raw={delivery_date_raw}, type={type(delivery_date_raw)}")
-            
-            # Convert delivery_date to date object - handle multiple formats
-            if delivery_date_raw is None:
-                continue
-            
-            try:
-                order_delivery_dt = None
-                
-                # Check if it's already a datetime object (from Firestore Timestamp)
-                if hasattr(delivery_date_raw, 'date'):
-                    order_delivery_dt = delivery_date_raw.date()
-                    logger.info(f"[VEGETABLES_HISTORY] Converted from datetime: {order_delivery_dt}")
-                # Check if it's a string
-                elif isinstance(delivery_date_raw, str):
-                    # Try YYYY-MM-DD format first (ISO format - most common)
-                    if len(delivery_date_raw) == 10 and delivery_date_raw[4] == '-':
-                        try:
-                            order_delivery_dt = datetime.strptime(delivery_date_raw, '%Y-%m-%d').date()
-                            logger.info(f"[VEGETABLES_HISTORY] Parsed ISO format: {order_delivery_dt}")
-                        except ValueError:
-                            pass
-                    
-                    # Try longer ISO format (YYYY-MM-DDTHH:MM:SS)
-                    if order_delivery_dt is None and len(delivery_date_raw) >= 19 and delivery_date_raw[4] == '-':
-                        try:
-                            order_delivery_dt = datetime.fromisoformat(delivery_date_raw.replace('Z', '+00:00')).date()
-                            logger.info(f"[VEGETABLES_HISTORY] Parsed ISO 8601 format: {order_delivery_dt}")
-                        except (ValueError, AttributeError):
-                            pass
-                    
-                    # Try RFC format as fallback
-                    if order_delivery_dt is None:
-                        try:
-                            from email.utils import parsedate_to_datetime
-                            parsed_dt = parsedate_to_datetime(delivery_date_raw)
-                            # Handle timezone-aware datetime
-                            if parsed_dt.tzinfo is not None:
-                                order_delivery_dt = parsed_dt.astimezone().date()
-                            else:
-                                order_delivery_dt = parsed_dt.date()
-                            logger.info(f"[VEGETABLES_HISTORY] Parsed RFC format: {order_delivery_dt}")
-                        except (TypeError, ValueError):
-                            pass
-                    
-                    # If still no date was parsed, skip this order
-                    if order_delivery_dt is None:
-                        logger.warning(f"[VEGETABLES_HISTORY] Could not parse delivery_date '{delivery_date_raw}'")
-                        continue
-                else:
-                    logger.warning(f"[VEGETABLES_HISTORY] Unknown delivery_date type: {type(delivery_date_raw)}")
-                    continue
-                
-                # Check if date matches target date
-                if order_delivery_dt != delivery_date:
-                    logger.info(f"[VEGETABLES_HISTORY] Date mismatch: {order_delivery_dt} != {delivery_date}")
-                    continue
-                
-                # Skip cancelled orders
-                if order.get('status') == 'cancelled':
-                    continue
-                
-                order_count += 1
-                logger.info(f"[VEGETABLES_HISTORY] Order {order_doc.id} matches target date")
-                
-            except Exception as parse_err:
-                logger.error(f"[VEGETABLES_HISTORY] Error parsing delivery_date for order {order_doc.id}: {str(parse_err)}")
-                import traceback
-                logger.error(f"[VEGETABLES_HISTORY] Traceback: {traceback.format_exc()}")
-                continue
-            
-            # Get items
-            items_query = get_firestore_client().collection('orders').document(order_doc.id).collection('order_items').stream()
-            for item_doc in items_query:
-                item = item_doc.to_dict()
-                product_id = item.get('product_id')
-                quantity = float(item.get('quantity', 0))
-                
-                logger.info(f"[VEGETABLES_HISTORY] Item: product_id={product_id}, quantity={quantity}")
-                
-                # Get product details
-                product_doc = get_firestore_client().collection('products').document(str(product_id)).get()
-                if product_doc.exists:
-                    product = product_doc.to_dict()
-                    category = product.get('category', 'Other')
-                    product_name = product.get('name', f'Product {product_id}')
-                    unit_type = product.get('unit_type', 'kg')
-                    
-                    key = f"{product_id}:{product_name}"
-                    if key not in vegetables:
-                        vegetables[key] = {
-                            'product_id': product_id,
-                            'product_name': product_name,
-                            'category': category,
-                            'unit_type': unit_type,
-                            'total_quantity': 0
-                        }
-                    vegetables[key]['total_quantity'] += quantity
-                    
-                    if category not in category_totals:
-                        category_totals[category] = {'count': 0, 'total_quantity': 0}
-                    category_totals[category]['count'] += 1
-                    category_totals[category]['total_quantity'] += quantity
+        rollup = get_daily_rollup(delivery_date.strftime('%Y-%m-%d'))
+        vegetables, category_totals = daily_rollup_vegetables(rollup)
+        order_count = rollup['order_count']
         
         logger.info(f"[VEGETABLES_HISTORY] Found {order_count} orders with {len(vegetables)} vegetables")
         
         return jsonify({
             'date': date_str,
             'day': day_str,
-            'vegetables': list(vegetables.values()),
+            'vegetables': vegetables,
             'category_totals': category_totals,
             'total_items': len(vegetables),
             'total_orders': order_count,
@@ -2550,128 +3605,18 @@ def get_todays_filling(current_user):
         date_str = now.strftime('%d %B %Y')
         day_str = now.strftime('%A')
         
-        # Get all hotels and products for target date
-        hotels_set = {}
-        products_dict = {}
-        
-        orders_query = get_firestore_client().collection('orders').stream()
-        for order_doc in orders_query:
-            order = order_doc.to_dict()
-            delivery_date_raw = order.get('delivery_date')
-            
-            # Convert delivery_date to date object - handle multiple formats
-            if delivery_date_raw is None:
-                continue
-            
-            try:
-                order_delivery_dt = None
-                
-                # Check if it's already a datetime object (from Firestore Timestamp)
-                if hasattr(delivery_date_raw, 'date'):
-                    order_delivery_dt = delivery_date_raw.date()
-                # Check if it's a string
-                elif isinstance(delivery_date_raw, str):
-                    # Try YYYY-MM-DD format first (ISO format - most common)
-                    if len(delivery_date_raw) == 10 and delivery_date_raw[4] == '-':
-                        try:
-                            order_delivery_dt = datetime.strptime(delivery_date_raw, '%Y-%m-%d').date()
-                        except ValueError:
-                            pass
-                    
-                    # Try longer ISO format (YYYY-MM-DDTHH:MM:SS)
-                    if order_delivery_dt is None and len(delivery_date_raw) >= 19 and delivery_date_raw[4] == '-':
-                        try:
-                            order_delivery_dt = datetime.fromisoformat(delivery_date_raw.replace('Z', '+00:00')).date()
-                        except (ValueError, AttributeError):
-                            pass
-                    
-                    # Try RFC format as fallback
-                    if order_delivery_dt is None:
-                        try:
-                            from email.utils import parsedate_to_datetime
-                            parsed_dt = parsedate_to_datetime(delivery_date_raw)
-                            # Handle timezone-aware datetime
-                            if parsed_dt.tzinfo is not None:
-                                order_delivery_dt = parsed_dt.astimezone().date()
-                            else:
-                                order_delivery_dt = parsed_dt.date()
-                        except (TypeError, ValueError):
-                            pass
-                    
-                    # If still no date was parsed, skip this order
-                    if order_delivery_dt is None:
-                        logger.warning(f"[TODAYS_FILLING] Could not parse delivery_date '{delivery_date_raw}'")
-                        continue
-                else:
-                    continue
-                
-                # Check if delivery_date matches target date
-                if order_delivery_dt != target_date:
-                    continue
-                
-            except Exception as e:
-                logger.error(f"[TODAYS_FILLING] Error parsing delivery_date: {str(e)}")
-                continue
-            
-            # Skip cancelled orders
-            if order.get('status') == 'cancelled':
-                continue
-            
-            user_id = order.get('user_id')
-            if not user_id:
-                continue
-            
-            user_id_str = str(user_id)
-            
-            # Get hotel details
-            user_doc = get_firestore_client().collection('users').document(user_id).get()
-            if user_doc.exists:
-                user = user_doc.to_dict()
-                hotels_set[user_id_str] = {
-                    'hotel_id': str(user_id_str),
-                    'hotel_name': str(user.get('hotel_name', 'N/A'))
-                }
-            
-            # Get items
-            items_query = get_firestore_client().collection('orders').document(order_doc.id).collection('order_items').stream()
-            for item_doc in items_query:
-                item = item_doc.to_dict()
-                product_id = int(item.get('product_id', 0))
-                quantity = float(item.get('quantity', 0))
-                
-                # Get product
-                product_doc = get_firestore_client().collection('products').document(str(product_id)).get()
-                if product_doc.exists:
-                    product = product_doc.to_dict()
-                else:
-                    product = {'name': 'Unknown', 'unit_type': 'kg', 'category': 'Other'}
-                
-                product_name = str(product.get('name', 'Unknown'))
-                unit_type = str(product.get('unit_type', 'kg'))
-                
-                # Use product_id as key (no name concatenation)
-                product_key = str(product_id)
-                
-                if product_key not in products_dict:
-                    products_dict[product_key] = {
-                        'product_id': str(product_id),
-                        'product_name': str(product_name),
-                        'unit_type': str(unit_type),
-                        'category': str(product.get('category', 'Other')),
-                        'quantities': {}
-                    }
-                
-                # Add quantity - single assignment per item (convert to string)
-                products_dict[product_key]['quantities'][str(user_id_str)] = str(quantity)
+        # Served from the delivery date's rollup (non-cancelled orders only)
+        rollup = get_daily_rollup(target_date.strftime('%Y-%m-%d'))
+        hotels_list, products_list = daily_rollup_filling(rollup)
         
         return jsonify({
             'date': date_str,
             'day': day_str,
             'target_date': target_date.strftime('%Y-%m-%d'),
-            'hotels': list(hotels_set.values()),
-            'products': list(products_dict.values()),
-            'total_hotels': len(hotels_set),
-            'total_products': len(products_dict),
+            'hotels': hotels_list,
+            'products': products_list,
+            'total_hotels': len(hotels_list),
+            'total_products': len(products_list),
             'success': True
         }), 200
         
@@ -2700,195 +3645,10 @@ def get_filling_history(current_user):
         date_str = selected_date.strftime('%d %B %Y')
         day_str = selected_date.strftime('%A')
         
-        # Also prepare alternative format comparisons
-        selected_date_short = selected_date.strftime('%d %b %Y')  # "14 Dec 2025"
-        
-        hotels_set = {}
-        products_dict = {}
-        unique_dates = set()  # Track all unique dates found
-        
-        orders_query = get_firestore_client().collection('orders').stream()
-        order_count = 0
-        matched_orders = 0
-        logger.error(f"[FILLING_HISTORY] 🔍 STARTING QUERY - Looking for date: {selected_date} or '{selected_date_short}'")
-        
-        for order_doc in orders_query:
-            order_count += 1
-            try:
-                order = order_doc.to_dict()
-                delivery_date_raw = order.get('delivery_date')
-                
-                # Convert delivery_date to date object - handle multiple formats
-                if delivery_date_raw is None:
-                    logger.error(f"[FILLING_HISTORY] Order {order_count} ({order_doc.id}): No delivery_date")
-                    continue
-                
-                try:
-                    # Check if it's already a datetime object (from Firestore Timestamp)
-                    if hasattr(delivery_date_raw, 'date'):
-                        order_delivery_dt = delivery_date_raw.date()
-                        logger.error(f"[FILLING_HISTORY] Order {order_count} ({order_doc.id}): Timestamp object → {order_delivery_dt}")
-                    # Check if it's a string
-                    elif isinstance(delivery_date_raw, str):
-                        order_delivery_dt = None
-                        
-                        # Try YYYY-MM-DD format first (ISO format - most common)
-                        if len(delivery_date_raw) == 10 and delivery_date_raw[4] == '-':
-                            try:
-                                order_delivery_dt = datetime.strptime(delivery_date_raw, '%Y-%m-%d').date()
-                                logger.error(f"[FILLING_HISTORY] Order {order_count} ({order_doc.id}): ISO format → {order_delivery_dt}")
-                            except ValueError as ve:
-                                logger.error(f"[FILLING_HISTORY] Order {order_count}: ISO format parsing failed: {str(ve)}")
-                        
-                        # Try "DD Mon YYYY" format (e.g., "14 Dec 2025")
-                        if order_delivery_dt is None:
-                            try:
-                                order_delivery_dt = datetime.strptime(delivery_date_raw, '%d %b %Y').date()
-                                logger.error(f"[FILLING_HISTORY] Order {order_count} ({order_doc.id}): DD Mon YYYY format → {order_delivery_dt}")
-                            except ValueError:
-                                pass  # Try next format
-                        
-                        # Try longer ISO format (YYYY-MM-DDTHH:MM:SS)
-                        if order_delivery_dt is None and len(delivery_date_raw) >= 19 and delivery_date_raw[4] == '-':
-                            try:
-                                order_delivery_dt = datetime.fromisoformat(delivery_date_raw.replace('Z', '+00:00')).date()
-                                logger.error(f"[FILLING_HISTORY] Order {order_count} ({order_doc.id}): ISO 8601 format → {order_delivery_dt}")
-                            except (ValueError, AttributeError) as ve:
-                                logger.error(f"[FILLING_HISTORY] Order {order_count}: ISO 8601 format parsing failed: {str(ve)}")
-                        
-                        # Try RFC format as fallback
-                        if order_delivery_dt is None:
-                            try:
-                                from email.utils import parsedate_to_datetime
-                                parsed_dt = parsedate_to_datetime(delivery_date_raw)
-                                # Handle timezone-aware datetime
-                                if parsed_dt.tzinfo is not None:
-                                    order_delivery_dt = parsed_dt.astimezone().date()
-                                else:
-                                    order_delivery_dt = parsed_dt.date()
-                                logger.error(f"[FILLING_HISTORY] Order {order_count} ({order_doc.id}): RFC format '{delivery_date_raw}' → {order_delivery_dt}")
-                            except (TypeError, ValueError) as rfc_err:
-                                logger.error(f"[FILLING_HISTORY] Order {order_count}: RFC format parsing failed: {str(rfc_err)}")
-                        
-                        # If still no date was parsed, skip this order
-                        if order_delivery_dt is None:
-                            logger.error(f"[FILLING_HISTORY] Order {order_count} ({order_doc.id}): Could not parse delivery_date '{delivery_date_raw}'")
-                            continue
-                    else:
-                        logger.error(f"[FILLING_HISTORY] Order {order_count} ({order_doc.id}): Unknown type: {type(delivery_date_raw)}")
-                        continue
-                    
-                    # Check if delivery_date matches selected date
-                    unique_dates.add(str(order_delivery_dt))  # Track unique date
-                    
-                    if order_delivery_dt != selected_date:
-                        logger.error(f"[FILLING_HISTORY] Order {order_count} ({order_doc.id}): ❌ NO MATCH {order_delivery_dt} != {selected_date}")
-                        continue
-                    
-                    matched_orders += 1
-                    logger.error(f"[FILLING_HISTORY] Order {order_count} ({order_doc.id}): ✅ MATCHED!")
-                    
-                except Exception as e:
-                    logger.error(f"[FILLING_HISTORY] Order {order_count} ({order_doc.id}): Exception during date parsing: {str(e)}")
-                    logger.error(f"[FILLING_HISTORY] Exception type: {type(e).__name__}")
-                    continue
-                
-                # Skip cancelled orders
-                if order.get('status') == 'cancelled':
-                    continue
-                
-                user_id = order.get('user_id')
-                if not user_id:
-                    logger.error(f"[FILLING_HISTORY] Order {order_count} ({order_doc.id}): No user_id found")
-                    continue
-                
-                user_id_str = str(user_id)
-                logger.error(f"[FILLING_HISTORY] Order {order_count} ({order_doc.id}): user_id={user_id} (type: {type(user_id).__name__})")
-                
-                # Get hotel
-                user_doc = get_firestore_client().collection('users').document(user_id_str).get()
-                if user_doc.exists:
-                    user = user_doc.to_dict()
-                    logger.error(f"[FILLING_HISTORY] Order {order_count} ({order_doc.id}): Found hotel: {user.get('hotel_name', 'N/A')}")
-                    hotels_set[user_id_str] = {
-                        'hotel_id': str(user_id_str),
-                        'hotel_name': str(user.get('hotel_name', 'N/A'))
-                    }
-                else:
-                    logger.error(f"[FILLING_HISTORY] Order {order_count} ({order_doc.id}): User doc not found for {user_id}")
-                    continue
-                
-                # Get items
-                items_query = get_firestore_client().collection('orders').document(order_doc.id).collection('order_items').stream()
-                items_list = list(items_query)
-                logger.error(f"[FILLING_HISTORY] Order {order_count} ({order_doc.id}): Retrieved {len(items_list)} items")
-                
-                for item_doc in items_list:
-                    item = item_doc.to_dict()
-                    logger.error(f"[FILLING_HISTORY] Order {order_count} ({order_doc.id}): Item data: {item}")
-                    product_id = int(item.get('product_id', 0))
-                    quantity = float(item.get('quantity', 0))
-                    
-                    product_doc = get_firestore_client().collection('products').document(str(product_id)).get()
-                    if product_doc.exists:
-                        product = product_doc.to_dict()
-                    else:
-                        product = {'name': 'Unknown', 'unit_type': 'kg', 'category': 'Other'}
-                    
-                    product_name = str(product.get('name', 'Unknown'))
-                    unit_type = str(product.get('unit_type', 'kg'))
-                    
-                    # Use product_id as key (no name concatenation)
-                    product_key = str(product_id)
-                    
-                    if product_key not in products_dict:
-                        products_dict[product_key] = {
-                            'product_id': str(product_id),
-                            'product_name': str(product_name),
-                            'unit_type': str(unit_type),
-                            'category': str(product.get('category', 'Other')),
-                            'quantities': {}
-                        }
-                    
-                    # Add quantity - single assignment per item (convert to string)
-                    products_dict[product_key]['quantities'][str(user_id_str)] = str(quantity)
-                    
-            except Exception as order_loop_err:
-                logger.error(f"[FILLING_HISTORY] Order {order_count}: EXCEPTION in items/hotels processing: {str(order_loop_err)}")
-                import traceback
-                logger.error(f"[FILLING_HISTORY] Traceback: {traceback.format_exc()}")
-                pass  # Skip orders with processing errors
-        
-        sorted_dates = sorted(list(unique_dates))
-        logger.error(f"[FILLING_HISTORY] FINAL SUMMARY: Scanned {order_count} orders, Matched {matched_orders} for date {selected_date}, Found {len(products_dict)} products from {len(hotels_set)} hotels")
-        logger.error(f"[FILLING_HISTORY] UNIQUE DATES IN DATABASE: {sorted_dates}")
-        hotels_list = []
-        for uid, hotel_data in hotels_set.items():
-            try:
-                clean_hotel = {
-                    'hotel_id': str(uid) if uid else '',
-                    'hotel_name': str(hotel_data.get('hotel_name', 'N/A'))
-                }
-                hotels_list.append(clean_hotel)
-            except Exception as hex_err:
-                pass  # Skip problematic hotels
-        
-        products_list = []
-        for pid, product_data in products_dict.items():
-            try:
-                clean_product = {
-                    'product_id': str(pid) if pid else '',
-                    'product_name': str(product_data.get('product_name', 'Unknown')),
-                    'unit_type': str(product_data.get('unit_type', 'kg')),
-                    'category': str(product_data.get('category', 'Other')),
-                    'quantities': {}
-                }
-                # Explicitly add each quantity
-                for hotel_uid, qty_value in product_data.get('quantities', {}).items():
-                    clean_product['quantities'][str(hotel_uid)] = str(qty_value)
-                products_list.append(clean_product)
-            except Exception as pex_err:
-                pass  # Skip problematic products
+        selected_key = selected_date.strftime('%Y-%m-%d')
+        rollup = get_daily_rollup(selected_key)
+        hotels_list, products_list = daily_rollup_filling(rollup)
+        logger.info(f"[FILLING_HISTORY] {rollup['order_count']} orders for date {selected_key}, Found {len(products_list)} products from {len(hotels_list)} hotels")
         
         try:
             response_dict = {
@@ -2897,8 +3657,8 @@ def get_filling_history(current_user):
                 'target_date': str(selected_date.strftime('%Y-%m-%d')),
                 'hotels': hotels_list,
                 'products': products_list,
-                'total_hotels': len(hotels_set),
-                'total_products': len(products_dict),
+                'total_hotels': len(hotels_list),
+                'total_products': len(products_list),
                 'success': True
             }
             return jsonify(response_dict), 200
@@ -2938,50 +3698,15 @@ def get_hotels_orders_history(current_user):
         
         orders_list = []
         
-        orders_query = get_firestore_client().collection('orders').stream()
-        for order_doc in orders_query:
+        target_key = target_date.strftime('%Y-%m-%d')
+        orders_query = get_firestore_client().collection('orders').where('order_date_key', '==', target_key).stream()
+        order_docs = [order_doc for order_doc in orders_query if order_doc.to_dict().get('status') != 'cancelled']
+        
+        # Fetch every order's items subcollection concurrently
+        items_per_order = fetch_order_items_concurrently(order_doc.reference for order_doc in order_docs)
+        
+        for order_doc, item_docs in zip(order_docs, items_per_order):
             order = order_doc.to_dict()
-            order_date_raw = order.get('order_date')
-            order_date = None
-            
-            # Parse order_date with multiple format support
-            if not order_date_raw:
-                continue
-            
-            if isinstance(order_date_raw, str):
-                # Try ISO format (10 chars, YYYY-MM-DD)
-                if len(order_date_raw) >= 10 and order_date_raw[4] == '-':
-                    try:
-                        order_date = datetime.strptime(order_date_raw[:10], '%Y-%m-%d').date()
-                    except ValueError:
-                        pass
-                
-                # Try DD Mon YYYY format if ISO didn't work
-                if order_date is None:
-                    try:
-                        order_date = datetime.strptime(order_date_raw, '%d %b %Y').date()
-                    except ValueError:
-                        pass
-                
-                # Try ISO 8601 format if others didn't work
-                if order_date is None:
-                    try:
-                        order_date = datetime.fromisoformat(order_date_raw.replace('Z', '+00:00')).date()
-                    except ValueError:
-                        pass
-            else:
-                # If it's a Timestamp object
-                try:
-                    if hasattr(order_date_raw, 'date'):
-                        order_date = order_date_raw.date()
-                except:
-                    pass
-            
-            if order_date is None or order_date != target_date:
-                continue
-            
-            if order.get('status') == 'cancelled':
-                continue
             
             user_id = order.get('user_id')
             if not user_id:
@@ -3003,9 +3728,11 @@ def get_hotels_orders_history(current_user):
             item_count = 0
             total_quantity = 0
             items_list = []
-            items_query = get_firestore_client().collection('orders').document(order_doc.id).collection('order_items').stream()
             
-            for item_doc in items_query:
+            if item_docs is None:
+                # A packing report with an order's items missing is wrong, not partial
+                raise RuntimeError(f"order_items read failed for order {order_doc.id}")
+            for item_doc in item_docs:
                 item = item_doc.to_dict()
                 item_count += 1
                 total_quantity += float(item.get('quantity', 0))
@@ -3088,8 +3815,8 @@ def finalize_order_prices(current_user, order_id):
         for item_doc in items_query:
             items_map[item_doc.id] = item_doc.reference
         
-        # Use batch for atomic updates
-        batch = firestore_client.batch()
+        # Updates are queued and committed with the rollup change in one transaction
+        writes = []
         
         for price_item in items_with_prices:
             # Support both item_id and product_id lookups
@@ -3116,30 +3843,67 @@ def finalize_order_prices(current_user, order_id):
                 quantity = float(item.get('quantity', 1))
                 item_total = price * quantity
                 
-                batch.update(matched_ref, {
+                writes.append((matched_ref, {
                     'price_at_order': price,
                     'subtotal': item_total
-                })
+                }))
                 
                 new_total_amount += item_total
         
         # Update order with new total
-        batch.update(order_ref, {
+        writes.append((order_ref, {
             'total_amount': new_total_amount,
             'price_finalized': True,
             'price_finalized_at': datetime.now(timezone.utc).isoformat()
-        })
+        }))
         
         # Update associated bill if exists
         bills_query = firestore_client.collection('bills').where('order_id', '==', str(order_id)).stream()
+        bill_refs = []
         for bill_doc in bills_query:
-            batch.update(bill_doc.reference, {
+            writes.append((bill_doc.reference, {
                 'total_amount': new_total_amount,
                 'paid': False,
                 'updated_at': datetime.now(timezone.utc).isoformat()
-            })
+            }))
+            bill_refs.append(bill_doc.reference)
         
-        batch.commit()
+        changed_days = []
+        
+        def write_prices(transaction):
+            # Counter deltas are taken from the order, items and bills as read in this transaction
+            current_order = order_ref.get(transaction=transaction).to_dict() or {}
+            current_items = {
+                item_doc.id: item_doc.to_dict()
+                for item_doc in transaction.get(order_ref.collection('order_items').select(ANALYTICS_ITEM_FIELDS))
+            }
+            current_bills = {}
+            if bill_refs:
+                current_bills = {bill_doc.id: bill_doc.to_dict() or {} for bill_doc in firestore_client.get_all(bill_refs, transaction=transaction)}
+            
+            updates_by_path = {ref.path: updates for ref, updates in writes}
+            priced_items = {
+                item_id: {**item, **updates_by_path.get(order_ref.collection('order_items').document(item_id).path, {})}
+                for item_id, item in current_items.items()
+            }
+            changed_days[:] = queue_analytics_change(
+                transaction,
+                order_analytics_contributions(current_order, current_items.values()),
+                order_analytics_contributions({**current_order, 'total_amount': new_total_amount}, priced_items.values())
+            )
+            for bill_ref in bill_refs:
+                old_bill = current_bills.get(bill_ref.id, {})
+                queue_analytics_change(
+                    transaction,
+                    bill_analytics_contributions(old_bill),
+                    bill_analytics_contributions({**old_bill, **updates_by_path[bill_ref.path]})
+                )
+            
+            for ref, updates in writes:
+                transaction.update(ref, updates)
+        
+        set_order_total_in_daily_rollup(order.get('delivery_date_key'), order_id, new_total_amount, write_docs=write_prices)
+        finish_analytics_change(changed_days, f"finalized prices of order {order_id} and its {len(bill_refs)} bills")
         
         return jsonify({
             'message': 'Prices finalized successfully',
@@ -3249,35 +4013,58 @@ def create_hotel_order(current_user):
             logger.error(f"[HOTEL_ORDER] Counter error traceback: {traceback.format_exc()}")
             return jsonify({'error': 'Failed to generate order ID', 'detail': str(counter_err)}), 500
         
+        # Hotel identity is embedded on the order for list views
+        hotel_identity = hotel_identity_from_user(None)
+        try:
+            hotel_identity = get_hotel_identities([user_id]).get(str(user_id), hotel_identity)
+        except Exception as user_err:
+            logger.warning(f"[HOTEL_ORDER] Could not fetch hotel identity: {str(user_err)}")
+        
         # Create order document with sequential ID
         try:
             order_data = {
                 'user_id': user_id,
                 'order_date': datetime.now(timezone.utc).isoformat(),
                 'delivery_date': data.get('delivery_date'),
+                'delivery_date_key': to_ist_date_key(data.get('delivery_date')),
+                'order_date_key': datetime.now(IST).strftime('%Y-%m-%d'),
                 'total_amount': 0,
                 'status': 'pending',
                 'special_instructions': data.get('special_instructions', ''),
                 'price_finalized': False,
                 'created_at': datetime.now(timezone.utc).isoformat(),
-                'updated_at': datetime.now(timezone.utc).isoformat()
+                'updated_at': datetime.now(timezone.utc).isoformat(),
+                **hotel_identity
             }
             
-            firestore_client.collection('orders').document(order_id).set(order_data)
-            logger.info(f"[HOTEL_ORDER] Order document created with ID: {order_id}")
+            order_ref = firestore_client.collection('orders').document(order_id)
+            item_order_fields = order_item_denormalized_fields(order_id, order_data)
             
-            # Create order items in subcollection
-            for idx, item in enumerate(order_items):
-                firestore_client.collection('orders').document(order_id).collection('order_items').document(f'item_{idx}').set({
-                    'product_id': item['product_id'],
-                    'product_name': item['product_name'],
-                    'quantity': item['quantity'],
-                    'price_at_order': item['price_at_order'],
-                    'subtotal': item['subtotal'],
-                    'created_at': datetime.now(timezone.utc).isoformat()
-                })
+            changed_days = []
+            
+            def write_order(transaction):
+                transaction.set(order_ref, order_data)
+                for idx, item in enumerate(order_items):
+                    transaction.set(order_ref.collection('order_items').document(f'item_{idx}'), {
+                        'product_id': item['product_id'],
+                        'product_name': item['product_name'],
+                        'quantity': item['quantity'],
+                        'price_at_order': item['price_at_order'],
+                        'subtotal': item['subtotal'],
+                        'created_at': datetime.now(timezone.utc).isoformat(),
+                        **item_order_fields
+                    })
+                changed_days[:] = queue_analytics_change(transaction, {}, order_analytics_contributions(order_data, order_items))
+            
+            # Order, items, the delivery date's rollup and the analytics counters commit in one transaction
+            add_order_to_daily_rollup(
+                order_data['delivery_date_key'], order_id, user_id,
+                [(item['product_id'], item['quantity']) for item in order_items],
+                write_docs=write_order
+            )
+            logger.info(f"[HOTEL_ORDER] Order {order_id} created with {len(order_items)} items")
             
-            logger.info(f"[HOTEL_ORDER] Added {len(order_items)} items to order")
+            finish_analytics_change(changed_days, f"added order {order_id}")
         except Exception as order_err:
             logger.error(f"[HOTEL_ORDER] Error creating order document: {str(order_err)}")
             logger.error(f"[HOTEL_ORDER] Order creation error traceback: {traceback.format_exc()}")
@@ -3291,6 +4078,7 @@ def create_hotel_order(current_user):
             # Get user details for bill
             hotel_name = ''
             email = ''
+            phone = ''
             address = ''
             try:
                 user_doc = firestore_client.collection('users').document(str(user_id)).get()
@@ -3298,6 +4086,7 @@ def create_hotel_order(current_user):
                     user_data = user_doc.to_dict()
                     hotel_name = user_data.get('hotel_name', '')
                     email = user_data.get('email', '')
+                    phone = user_data.get('phone', '')
                     address = user_data.get('address', '')
                     logger.info(f"[HOTEL_ORDER] User details fetched for bill: {hotel_name}")
             except Exception as user_err:
@@ -3308,6 +4097,7 @@ def create_hotel_order(current_user):
                 'user_id': user_id,
                 'hotel_name': hotel_name,
                 'email': email,
+                'phone': phone,
                 'address': address,
                 'bill_date': datetime.now(timezone.utc).strftime('%Y-%m-%d'),
                 'total_amount': total_amount,
@@ -3317,9 +4107,15 @@ def create_hotel_order(current_user):
                 'created_at': datetime.now(timezone.utc).isoformat(),
                 'updated_at': datetime.now(timezone.utc).isoformat()
             }
+            bill_data['bill_date_key'] = to_ist_date_key(bill_data['bill_date'])
+            bill_data['due_date_key'] = to_ist_date_key(bill_data['due_date'])
             
-            firestore_client.collection('bills').document(str(bill_id)).set(bill_data)
+            batch = firestore_client.batch()
+            batch.set(firestore_client.collection('bills').document(str(bill_id)), bill_data)
+            changed_days = queue_analytics_change(batch, {}, bill_analytics_contributions(bill_data))
+            batch.commit()
             logger.info(f"[HOTEL_ORDER] Bill {bill_id} created for order {order_id}")
+            finish_analytics_change(changed_days, f"added bill {bill_id}")
             
         except Exception as bill_err:
             logger.error(f"[HOTEL_ORDER] Error creating bill: {str(bill_err)}")
@@ -3408,6 +4204,7 @@ def create_product(current_user):
         
         product_ref = get_firestore_client().collection('products').document()
         product_ref.set(product_data)
+        invalidate_product_cache(product_ref.id)
         
         return jsonify({
             'message': 'Product created successfully',
@@ -3545,6 +4342,7 @@ def update_product(current_user, product_id):
         
         update_data['updated_at'] = datetime.now().isoformat()
         product_ref.update(update_data)
+        invalidate_product_cache(product_id)
         
         return jsonify({'message': 'Product updated successfully', 'success': True}), 200
     except Exception as e:
@@ -3564,6 +4362,7 @@ def delete_product(current_user, product_id):
             return jsonify({'error': 'Product not found'}), 404
         
         product_ref.delete()
+        invalidate_product_cache(product_id)
         
         return jsonify({
             'message': 'Product deleted successfully',
@@ -3787,6 +4586,13 @@ def update_user(current_user, user_id):
         firestore_db.collection('users').document(user_id).update(update_data)
         logger.info(f"[UPDATE_USER] Successfully updated user: {user_id}")
         
+        # Refresh the hotel identity embedded on orders, bills and tickets
+        if any(field in update_data for field in HOTEL_IDENTITY_FIELDS):
+            try:
+                fan_out_hotel_identity(user_id, hotel_identity_from_user({**user_doc.to_dict(), **update_data}))
+            except Exception as fan_out_err:
+                logger.error(f"[UPDATE_USER] Hotel identity fan-out failed for {user_id}: {str(fan_out_err)}")
+        
         return jsonify({'message': 'User updated successfully', 'success': True})
     except Exception as e:
         logger.error(f"[UPDATE_USER] Update user error: {str(e)}")
@@ -3827,15 +4633,153 @@ def delete_user(current_user, user_id):
 # ===================================================================
 # ADMIN ANALYTICS & DASHBOARD (Part 2)
 # ===================================================================
+def compute_admin_analytics_summary(firestore_client, today) -> Dict:
+    """Build the dashboard analytics payload from the analytics_counters documents"""
+    # Last 12 months (oldest first), which also cover the last 30 days
+    month_keys = []
+    year, month = today.year, today.month
+    for _ in range(12):
+        month_keys.append(f'{year:04d}-{month:02d}')
+        year, month = (year, month - 1) if month > 1 else (year - 1, 12)
+    month_keys.reverse()
+    
+    # One batched read for every counter document the response needs
+    counters_ref = firestore_client.collection(ANALYTICS_COUNTERS_COLLECTION)
+    counter_refs = [counters_ref.document(f'month_{key}') for key in month_keys]
+    counter_refs += [counters_ref.document(f'year_{today.year}'), counters_ref.document('hotels')]
+    counters = {doc.id: doc.to_dict() or {} for doc in firestore_client.get_all(counter_refs) if doc.exists}
+    months = {key: counters.get(f'month_{key}', {}) for key in month_keys}
+    
+    def day_counts(day):
+        return months.get(day.strftime('%Y-%m'), {}).get('days', {}).get(day.strftime('%d'), {})
+    
+    # Revenue
+    yesterday_revenue = float(day_counts(today - timedelta(days=1)).get('revenue', 0) or 0)
+    month_revenue = float(months[month_keys[-1]].get('revenue', 0) or 0)
+    year_revenue = float(counters.get(f'year_{today.year}', {}).get('revenue', 0) or 0)
+    
+    # Daily trends (last 30 days, days with orders)
+    daily_trends_list = []
+    for offset in range(29, -1, -1):
+        day = today - timedelta(days=offset)
+        counts = day_counts(day)
+        if counts.get('orders'):
+            daily_trends_list.append({'date': day.isoformat(), 'revenue': float(counts.get('revenue', 0) or 0)})
+    
+    # Monthly trends (last 12 months, months with orders) with readable month names
+    month_names = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+    monthly_trends_list = [
+        {'month': month_names[int(key[5:]) - 1], 'revenue': float(months[key].get('revenue', 0) or 0)}
+        for key in month_keys
+        if months[key].get('orders')
+    ]
+    
+    # Hotels: revenue and unpaid totals, names resolved with one batched read
+    hotel_counters = counters.get('hotels', {}).get('hotels', {})
+    identities = get_hotel_identities(hotel_counters.keys())
+    unpaid_hotels_list = []
+    revenue_by_hotel_list = []
+    for user_id, counts in hotel_counters.items():
+        identity = identities.get(str(user_id))
+        if identity is None:
+            continue
+        hotel_name = identity.get('hotel_name') or 'Unknown'
+        unpaid_total = float(counts.get('unpaid_total', 0) or 0)
+        if counts.get('unpaid_count', 0) > 0 and unpaid_total > 0:
+            unpaid_hotels_list.append({
+                'hotel_name': hotel_name,
+                'email': identity.get('email', ''),
+                'phone': identity.get('phone', ''),
+                'unpaid_bills_count': int(counts.get('unpaid_count', 0)),
+                'unpaid_total': unpaid_total
+            })
+        if counts.get('orders', 0) > 0:
+            total_revenue = float(counts.get('revenue', 0) or 0)
+            revenue_by_hotel_list.append({
+                'hotel_name': hotel_name,
+                'total_orders': int(counts.get('orders', 0)),
+                'total_revenue': total_revenue,
+                'unpaid_amount': unpaid_total,
+                'paid_amount': total_revenue - unpaid_total
+            })
+    
+    # Sort and limit
+    revenue_by_hotel_list.sort(key=lambda x: x['total_revenue'], reverse=True)
+    revenue_by_hotel_list = revenue_by_hotel_list[:10]
+    unpaid_hotels_list.sort(key=lambda x: x['unpaid_total'], reverse=True)
+    
+    # Top products over the same 12 months
+    top_products = {}
+    for key in month_keys:
+        for product_id, counts in months[key].get('products', {}).items():
+            entry = top_products.setdefault(product_id, {'name': counts.get('name', 'Unknown'), 'quantity': 0.0, 'revenue': 0.0})
+            entry['quantity'] += float(counts.get('quantity', 0) or 0)
+            entry['revenue'] += float(counts.get('revenue', 0) or 0)
+    
+    top_products_list = []
+    try:
+        # Top 5 by revenue (or quantity if revenue is 0)
+        sorted_products = top_k(
+            {product_id: data for product_id, data in top_products.items() if data['quantity'] > 0},
+            5, 'revenue', fallback='quantity'
+        )
+        
+        # Get categories for the winners from the product catalog cache
+        products = get_products_by_ids(product_id for product_id, _ in sorted_products)
+        
+        for product_id, data in sorted_products:
+            product_data = products.get(str(product_id)) or {}
+            top_products_list.append({
+                'product_id': product_id,
+                'product_name': data.get('name', 'Unknown'),
+                'category': product_data.get('category') or product_data.get('category_name') or 'N/A',
+                'total_quantity': data.get('quantity', 0),
+                'total_revenue': data.get('revenue', 0)
+            })
+    except Exception as e:
+        logger.warning(f"Error building top products: {str(e)}")
+    
+    # Count total hotels (aggregation query, no document reads)
+    total_hotels = 0
+    try:
+        count_result = firestore_client.collection('users').where('role', '==', 'hotel').count().get()
+        total_hotels = int(count_result[0][0].value)
+    except Exception as e:
+        logger.warning(f"Error counting hotels: {str(e)}")
+    
+    logger.info(f"[ANALYTICS] Computed summary from {len(counters)} counter documents")
+    
+    return {
+        'revenue': {
+            'yesterday': yesterday_revenue,
+            'month': month_revenue,
+            'year': year_revenue
+        },
+        'hotels': {
+            'total_hotels': total_hotels,
+            'unpaid_hotels_count': len(unpaid_hotels_list),
+            'unpaid_hotels': unpaid_hotels_list,
+            'revenue_by_hotel': revenue_by_hotel_list
+        },
+        'trends': {
+            'daily': daily_trends_list,
+            'monthly': monthly_trends_list
+        },
+        'top_products': top_products_list
+    }
+
 @app.route('/api/admin/analytics', methods=['GET'])
 @token_required
 @admin_required
 def get_admin_analytics(current_user):
-    """Get comprehensive analytics with proper structure for frontend - using Firestore"""
+    """
+    Get admin analytics from the pre-aggregated analytics_counters documents.
+    
+    Without parameters this returns the dashboard summary. With any of from,
+    to (YYYY-MM-DD, inclusive), granularity (day/week/month) or group_by
+    (hotel/product/category) it returns a revenue series for that range.
+    """
     try:
-        from datetime import datetime, timedelta, timezone
-        
-        # Initialize Firestore client
         firestore_client = get_firestore_client()
         if firestore_client is None:
             logger.error("Firestore database client not initialized")
@@ -3847,314 +4791,24 @@ def get_admin_analytics(current_user):
                 'success': True
             })
         
-        # Initialize accumulators
-        yesterday_revenue = 0
-        month_revenue = 0
-        year_revenue = 0
-        daily_trends = {}
-        monthly_trends = {}
-        hotel_revenue = {}
-        top_products = {}
-        unpaid_hotels_dict = {}
-        
-        now = datetime.now(timezone.utc)
-        yesterday = now - timedelta(days=1)
-        month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        year_start = now.replace(month=1, day=1, hour=0, minute=0, second=0, microsecond=0)
-        
-        logger.info(f"🔍 Analytics Debug - Current time (UTC): {now}")
-        logger.info(f"🔍 Querying Firestore collections...")
-        logger.info(f"✅ Firestore client ready")
-        
-        # Query all orders from Firestore
-        try:
-            orders_list = list(firestore_client.collection('orders').stream())
-            logger.info(f"📦 Found {len(orders_list)} total orders in Firestore")
-            
-            for order_doc in orders_list:
-                order = order_doc.to_dict()
-                order_id = order_doc.id
-                
-                # Log order details for debugging
-                logger.info(f"📄 Processing order {order_id}: status={order.get('status')}, date={order.get('order_date')}, amount={order.get('total_amount')}")
-                
-                # Skip cancelled orders (accept delivered, completed, pending, etc.)
-                order_status = order.get('status', '').lower()
-                if order_status in ['cancelled', 'rejected']:
-                    logger.info(f"⏭️  Skipping cancelled/rejected order {order_id}")
-                    continue
-                
-                # Get order date - handle multiple formats
-                order_date = order.get('order_date')
-                
-                # Handle Firestore Timestamp
-                if hasattr(order_date, 'to_pydatetime'):
-                    order_date = order_date.to_pydatetime()
-                # Handle string date formats
-                elif isinstance(order_date, str):
-                    try:
-                        # Try ISO format with timezone
-                        order_date = datetime.fromisoformat(order_date.replace('Z', '+00:00'))
-                    except:
-                        try:
-                            # Try simple date format: "2025-11-11"
-                            order_date = datetime.strptime(order_date, '%Y-%m-%d')
-                        except:
-                            try:
-                                # Try with time: "2025-11-11 10:30:00"
-                                order_date = datetime.strptime(order_date, '%Y-%m-%d %H:%M:%S')
-                            except:
-                                logger.warning(f"Could not parse order_date: {order_date}")
-                                continue
-                # Handle datetime object
-                elif isinstance(order_date, datetime):
-                    pass
-                else:
-                    logger.warning(f"Unknown order_date type: {type(order_date)}")
-                    continue
-                
-                # Ensure order_date is timezone-aware
-                if order_date.tzinfo is None:
-                    order_date = order_date.replace(tzinfo=timezone.utc)
-                
-                amount = float(order.get('total_amount', 0) or 0)
-                # Try multiple field names for user_id
-                user_id = order.get('user_id') or order.get('hotel_id') or order.get('customer_id') or order_doc.id
-                
-                logger.info(f"✅ Parsed order {order_id}: date={order_date}, amount={amount}, user_id={user_id}")
-                
-                # Log date comparisons
-                logger.info(f"   Dates: now={now.date()}, yesterday={yesterday.date()}, order_date={order_date.date()}")
-                logger.info(f"   Yesterday check: {order_date.date()} == {yesterday.date()} ? {order_date.date() == yesterday.date()}")
-                logger.info(f"   Month check: {order_date.year}=={now.year} and {order_date.month}=={now.month} ? {order_date.year == now.year and order_date.month == now.month}")
-                
-                # Yesterday's revenue
-                if order_date.date() == yesterday.date():
-                    yesterday_revenue += amount
-                
-                # This month's revenue
-                if order_date.year == now.year and order_date.month == now.month:
-                    month_revenue += amount
-                
-                # This year's revenue
-                if order_date.year == now.year:
-                    year_revenue += amount
-                
-                # Daily trends (last 30 days)
-                date_key = order_date.date().isoformat()
-                if order_date >= now - timedelta(days=30):
-                    daily_trends[date_key] = daily_trends.get(date_key, 0) + amount
-                
-                # Monthly trends (last 12 months)
-                month_key = order_date.strftime('%Y-%m')
-                if order_date >= now - timedelta(days=365):
-                    monthly_trends[month_key] = monthly_trends.get(month_key, 0) + amount
-                
-                # Revenue by hotel/user
-                if user_id:
-                    if user_id not in hotel_revenue:
-                        hotel_revenue[user_id] = {'revenue': 0, 'orders': 0}
-                    hotel_revenue[user_id]['revenue'] += amount
-                    hotel_revenue[user_id]['orders'] += 1
-                
-                # Top products
-                try:
-                    items_query = order_doc.reference.collection('order_items').stream()
-                    for item_doc in items_query:
-                        item = item_doc.to_dict()
-                        product_id = item.get('product_id', '')
-                        quantity = float(item.get('quantity', 0) or 0)
-                        # Try multiple field names for price
-                        price = float(item.get('price') or item.get('unit_price') or item.get('price_per_unit') or 0)
-                        item_revenue = quantity * price
-                        
-                        if product_id and quantity > 0:
-                            if product_id not in top_products:
-                                top_products[product_id] = {
-                                    'quantity': 0,
-                                    'revenue': 0,
-                                    'name': item.get('product_name', 'Unknown'),
-                                    'category': None
-                                }
-                            top_products[product_id]['quantity'] += quantity
-                            top_products[product_id]['revenue'] += item_revenue
-                except Exception as e:
-                    logger.warning(f"Error processing order items: {str(e)}")
-        
-        except Exception as e:
-            logger.error(f"Error querying orders: {str(e)}")
-        
-        # Query bills for unpaid hotels
-        try:
-            bills_query = firestore_client.collection('bills').stream()
-            
-            for bill_doc in bills_query:
-                bill = bill_doc.to_dict()
-                
-                # Check for unpaid bills - handle both 'status' and 'paid' fields
-                bill_status = bill.get('status', '').lower()
-                bill_paid = bill.get('paid', False)
-                
-                # Bill is unpaid if:
-                # 1. status field exists and is not 'paid' or 'cancelled', OR
-                # 2. paid field exists and is explicitly False, OR
-                # 3. Both fields indicate unpaid
-                is_unpaid = False
-                if bill_status and bill_status not in ['paid', 'cancelled']:
-                    is_unpaid = True
-                elif bill_paid is False and 'paid' in bill:
-                    is_unpaid = True
-                
-                if is_unpaid:
-                    user_id = bill.get('user_id') or bill.get('hotel_id') or bill.get('customer_id')
-                    if user_id:
-                        # Try multiple field names for amount
-                        amount = float(bill.get('total_amount') or bill.get('amount') or bill.get('bill_amount') or 0)
-                        if amount > 0:
-                            if user_id not in unpaid_hotels_dict:
-                                unpaid_hotels_dict[user_id] = {'total': 0, 'count': 0}
-                            unpaid_hotels_dict[user_id]['total'] += amount
-                            unpaid_hotels_dict[user_id]['count'] += 1
-                            logger.info(f"💰 Unpaid bill: user={user_id}, amount={amount}, status={bill_status}")
-        except Exception as e:
-            logger.warning(f"Error querying bills: {str(e)}")
-        
-        # Get hotel user details for unpaid hotels
-        unpaid_hotels_list = []
-        try:
-            users_query = firestore_client.collection('users').where('role', '==', 'hotel').stream()
-            
-            for user_doc in users_query:
-                user_id = user_doc.id
-                user = user_doc.to_dict()
-                
-                if user_id in unpaid_hotels_dict:
-                    unpaid_hotels_list.append({
-                        'hotel_name': user.get('hotel_name', user.get('username', 'Unknown')),
-                        'email': user.get('email', ''),
-                        'phone': user.get('phone', ''),
-                        'unpaid_bills_count': unpaid_hotels_dict[user_id]['count'],
-                        'unpaid_total': unpaid_hotels_dict[user_id]['total']
-                    })
-        except Exception as e:
-            logger.warning(f"Error querying hotel users: {str(e)}")
-        
-        # Build revenue by hotel list
-        revenue_by_hotel_list = []
-        try:
-            users_query = firestore_client.collection('users').where('role', '==', 'hotel').stream()
-            
-            for user_doc in users_query:
-                user_id = user_doc.id
-                user = user_doc.to_dict()
-                
-                if user_id in hotel_revenue:
-                    revenue_by_hotel_list.append({
-                        'hotel_name': user.get('hotel_name', user.get('username', 'Unknown')),
-                        'total_orders': hotel_revenue[user_id]['orders'],
-                        'total_revenue': hotel_revenue[user_id]['revenue'],
-                        'unpaid_amount': unpaid_hotels_dict.get(user_id, {}).get('total', 0),
-                        'paid_amount': hotel_revenue[user_id]['revenue'] - unpaid_hotels_dict.get(user_id, {}).get('total', 0)
-                    })
-        except Exception as e:
-            logger.warning(f"Error building revenue by hotel: {str(e)}")
-        
-        # Sort and limit
-        revenue_by_hotel_list.sort(key=lambda x: x['total_revenue'], reverse=True)
-        revenue_by_hotel_list = revenue_by_hotel_list[:10]
-        unpaid_hotels_list.sort(key=lambda x: x['unpaid_total'], reverse=True)
-        
-        # Build top products list with category lookup
-        top_products_list = []
-        try:
-            # Sort by revenue (or quantity if revenue is 0)
-            sorted_products = sorted(top_products.items(), 
-                                    key=lambda x: x[1]['revenue'] if x[1]['revenue'] > 0 else x[1]['quantity'], 
-                                    reverse=True)[:5]
-            
-            for product_id, data in sorted_products:
-                category = 'N/A'
-                # Try to get category from products collection
-                try:
-                    product_doc = firestore_client.collection('products').document(str(product_id)).get()
-                    if product_doc.exists:
-                        product_data = product_doc.to_dict()
-                        category = product_data.get('category') or product_data.get('category_name') or 'N/A'
-                except Exception as e:
-                    logger.warning(f"Could not fetch product {product_id}: {str(e)}")
-                
-                top_products_list.append({
-                    'product_id': product_id,
-                    'product_name': data.get('name', 'Unknown'),
-                    'category': category,
-                    'total_quantity': data.get('quantity', 0),
-                    'total_revenue': data.get('revenue', 0)
-                })
-        except Exception as e:
-            logger.warning(f"Error building top products: {str(e)}")
-        
-        # Convert trends to list format
-        daily_trends_list = [
-            {'date': date, 'revenue': revenue}
-            for date, revenue in sorted(daily_trends.items())
-        ]
+        today = datetime.now(IST).date()
         
-        # Convert monthly trends with readable month names
-        month_names = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
-        monthly_trends_list = []
-        for month_key, revenue in sorted(monthly_trends.items()):
+        # Range query: ?from=&to=&granularity=&group_by= (cached result sets)
+        if any(param in request.args for param in ('from', 'to', 'granularity', 'group_by')):
             try:
-                # month_key format is 'YYYY-MM'
-                year, month_num = month_key.split('-')
-                month_idx = int(month_num) - 1
-                month_name = month_names[month_idx] if 0 <= month_idx < 12 else month_key
-                monthly_trends_list.append({
-                    'month': month_name,
-                    'revenue': revenue
-                })
-            except Exception as e:
-                logger.warning(f"Error processing monthly trend {month_key}: {str(e)}")
-                monthly_trends_list.append({
-                    'month': month_key,
-                    'revenue': revenue
-                })
-        
-        # Count total hotels
-        total_hotels = 0
-        try:
-            total_hotels = len(list(firestore_client.collection('users').where('role', '==', 'hotel').stream()))
-        except Exception as e:
-            logger.warning(f"Error counting hotels: {str(e)}")
-        
-        # Log final totals
-        logger.info(f"📊 Analytics Summary:")
-        logger.info(f"   Yesterday Revenue: ₹{yesterday_revenue}")
-        logger.info(f"   Month Revenue: ₹{month_revenue}")
-        logger.info(f"   Year Revenue: ₹{year_revenue}")
-        logger.info(f"   Hotels: {total_hotels}")
-        logger.info(f"   Daily Trends: {len(daily_trends_list)} records")
-        logger.info(f"   Monthly Trends: {len(monthly_trends_list)} records")
-        logger.info(f"   Top Products: {len(top_products_list)} items")
-        logger.info(f"   Unpaid Hotels: {len(unpaid_hotels_list)}")
-        logger.info(f"   Revenue by Hotel: {len(revenue_by_hotel_list)}")
-        
+                query_key = parse_analytics_range_args(request.args, today)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            result, cached = get_analytics_range(firestore_client, query_key, today)
+            return jsonify({**result, 'cached': cached, 'success': True})
+        
+        # Dashboard summary: served from the stale-while-revalidate snapshot
+        payload, generated_at, stale = get_admin_analytics_snapshot(firestore_client)
         return jsonify({
-            'revenue': {
-                'yesterday': float(yesterday_revenue),
-                'month': float(month_revenue),
-                'year': float(year_revenue)
-            },
-            'hotels': {
-                'total_hotels': total_hotels,
-                'unpaid_hotels_count': len(unpaid_hotels_list),
-                'unpaid_hotels': unpaid_hotels_list,
-                'revenue_by_hotel': revenue_by_hotel_list
-            },
-            'trends': {
-                'daily': daily_trends_list,
-                'monthly': monthly_trends_list
-            },
-            'top_products': top_products_list,
+            **payload,
+            'generated_at': generated_at.isoformat(),
+            'data_age_seconds': round(_analytics_snapshot_age_seconds(generated_at), 1),
+            'stale': stale,
             'success': True
         })
     
@@ -4170,6 +4824,62 @@ def get_admin_analytics(current_user):
             'error_type': type(e).__name__
         }), 500
 
+ANALYTICS_TOP_ENTITIES = {'products': 'product', 'hotels': 'hotel', 'categories': 'category'}
+
+@app.route('/api/admin/analytics/top/<entity>', methods=['GET'])
+@token_required
+@admin_required
+def get_admin_analytics_top(current_user, entity):
+    """
+    Top K products, hotels or categories for a date range.
+    
+    Query params: k (default 10), metric (revenue, or quantity/orders), from, to.
+    Shares the range query cache with /api/admin/analytics.
+    """
+    try:
+        group_by = ANALYTICS_TOP_ENTITIES.get(entity)
+        if group_by is None:
+            return jsonify({'error': f"Unknown entity, expected one of: {', '.join(ANALYTICS_TOP_ENTITIES)}"}), 400
+        
+        firestore_client = get_firestore_client()
+        if firestore_client is None:
+            return jsonify({'error': 'Database not initialized'}), 500
+        
+        try:
+            k = int(request.args.get('k') or 10)
+        except ValueError:
+            k = 0
+        if not 1 <= k <= ANALYTICS_MAX_TOP_K:
+            return jsonify({'error': f"'k' must be a whole number between 1 and {ANALYTICS_MAX_TOP_K}"}), 400
+        
+        today = datetime.now(IST).date()
+        args = {
+            'from': request.args.get('from'),
+            'to': request.args.get('to'),
+            'group_by': group_by,
+            'metric': request.args.get('metric'),
+            'limit': k
+        }
+        try:
+            query_key = parse_analytics_range_args(args, today)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        result, cached = get_analytics_range(firestore_client, query_key, today)
+        return jsonify({
+            'entity': entity,
+            'metric': query_key[4],
+            'k': query_key[5],
+            'range': {'from': query_key[0], 'to': query_key[1]},
+            'items': result.get('groups', []),
+            'computed_at': result.get('computed_at'),
+            'cached': cached,
+            'success': True
+        })
+    except Exception as e:
+        logger.error(f"[ANALYTICS_TOP] Error ranking {entity}: {str(e)}")
+        return jsonify({'error': f'Failed to rank {entity}: {str(e)}'}), 500
+
 # ===================================================================
 # ADMIN SUPPLIERS MANAGEMENT
 # ===================================================================
@@ -4334,6 +5044,7 @@ def update_product_stock(current_user, product_id):
             'stock_quantity': stock_quantity,
             'updated_at': datetime.now().isoformat()
         })
+        invalidate_product_cache(product_id)
         
         return jsonify({
             'message': 'Stock updated successfully',
@@ -4610,17 +5321,18 @@ def get_support_tickets(current_user):
             ticket_data = doc.to_dict()
             ticket_data['id'] = doc.id
             
-            # Get user info if user_id exists
+            # Get user info if user_id exists and the ticket predates embedded hotel identity
             if ticket_data.get('user_id'):
-                try:
-                    user_doc = get_firestore_client().collection('users').document(str(ticket_data['user_id'])).get()
-                    if user_doc.exists:
-                        user_data = user_doc.to_dict()
-                        ticket_data['hotel_name'] = user_data.get('hotel_name', '')
-                        ticket_data['email'] = user_data.get('email', '')
-                except:
-                    ticket_data['hotel_name'] = 'Unknown'
-                    ticket_data['email'] = 'Unknown'
+                if not has_hotel_identity(ticket_data):
+                    try:
+                        user_doc = get_firestore_client().collection('users').document(str(ticket_data['user_id'])).get()
+                        if user_doc.exists:
+                            user_data = user_doc.to_dict()
+                            ticket_data['hotel_name'] = user_data.get('hotel_name', '')
+                            ticket_data['email'] = user_data.get('email', '')
+                    except:
+                        ticket_data['hotel_name'] = 'Unknown'
+                        ticket_data['email'] = 'Unknown'
             else:
                 ticket_data['hotel_name'] = 'Admin'
                 ticket_data['email'] = 'admin@bvs.com'
@@ -4652,8 +5364,8 @@ def get_support_ticket(current_user, ticket_id):
         ticket_data = ticket_doc.to_dict()
         ticket_data['id'] = ticket_doc.id
         
-        # Get user info if user_id exists
-        if ticket_data.get('user_id'):
+        # Get user info if user_id exists and the ticket predates embedded hotel identity
+        if ticket_data.get('user_id') and not has_hotel_identity(ticket_data):
             try:
                 user_doc = get_firestore_client().collection('users').document(str(ticket_data['user_id'])).get()
                 if user_doc.exists:
@@ -4852,6 +5564,13 @@ def update_hotel_profile(current_user):
         if user_doc.exists:
             profile = user_doc.to_dict()
             profile['id'] = user_doc.id
+            
+            # Refresh the hotel identity embedded on orders, bills and tickets
+            if any(field in update_data for field in HOTEL_IDENTITY_FIELDS):
+                try:
+                    fan_out_hotel_identity(user_id, hotel_identity_from_user(profile))
+                except Exception as fan_out_err:
+                    logger.error(f"Hotel identity fan-out failed for {user_id}: {str(fan_out_err)}")
             return jsonify({
                 'message': 'Profile updated successfully',
                 'user': profile
@@ -4944,6 +5663,10 @@ def create_hotel_support_ticket(current_user):
             'created_at': datetime.utcnow().isoformat() + 'Z',
             'updated_at': datetime.utcnow().isoformat() + 'Z'
         }
+        try:
+            ticket_data.update(get_hotel_identities([current_user['id']]).get(str(current_user['id']), {}))
+        except Exception as user_err:
+            logger.warning(f"Could not fetch hotel identity for ticket: {str(user_err)}")
         
         get_firestore_client().collection('support_tickets').document(str(ticket_id)).set(ticket_data)
         
@@ -4996,6 +5719,37 @@ def get_admin_dashboard(current_user):
         logger.error(f"Dashboard error: {str(e)}")
         return jsonify({'error': 'Failed to load dashboard'}), 500
 
+# ===================================================================
+# ADMIN ORDERS PAGINATION
+# ===================================================================
+ORDERS_PAGE_MAX_LIMIT = 500
+
+def encode_orders_cursor(order_date, order_id: str) -> str:
+    """Build an opaque page token from the last order's sort keys"""
+    if isinstance(order_date, datetime):
+        order_date = {'ts': order_date.isoformat()}
+    payload = json.dumps({'order_date': order_date, 'id': str(order_id)})
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+def decode_orders_cursor(cursor: str):
+    """
+    Decode a page token from encode_orders_cursor().
+    
+    Returns:
+        (order_date, order_id) tuple
+    
+    Raises:
+        ValueError: If the token is malformed
+    """
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8'))
+        order_date = payload['order_date']
+        if isinstance(order_date, dict):
+            order_date = datetime.fromisoformat(order_date['ts'])
+        return order_date, str(payload['id'])
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {str(e)}")
+
 @app.route('/api/admin/orders', methods=['GET'])
 @token_required
 @admin_required
@@ -5003,76 +5757,83 @@ def get_all_orders(current_user):
     """Get all orders for admin from Firestore"""
     try:
         user_id_filter = request.args.get('user_id')
-        limit = int(request.args.get('limit', 100))  # Default to 100 orders
-        offset = int(request.args.get('offset', 0))
+        status_filter = request.args.get('status')
+        cursor = request.args.get('cursor')
+        try:
+            limit = min(max(int(request.args.get('limit', 100)), 1), ORDERS_PAGE_MAX_LIMIT)  # Default to 100 orders
+        except ValueError:
+            return jsonify({'error': 'limit must be an integer'}), 400
         
-        logger.info(f"[ORDERS] Fetching orders with limit={limit}, offset={offset}")
+        logger.info(f"[ORDERS] Fetching orders with limit={limit}, cursor={'yes' if cursor else 'no'}")
         
         orders_list = []
+        orders_ref = get_firestore_client().collection('orders')
         
-        # Add .limit() to optimize query
-        orders_query = get_firestore_client().collection('orders').limit(limit + offset).stream()
-        logger.info(f"[ORDERS] Query started")
+        # Filters run in the query so every page comes back full.
+        # order_by('order_date') skips orders without the field; backfill_order_date.py fills it in
+        orders_query = orders_ref
+        if user_id_filter:
+            orders_query = orders_query.where('user_id', '==', user_id_filter)
+        if status_filter:
+            orders_query = orders_query.where('status', '==', status_filter)
+        orders_query = orders_query.order_by('order_date', direction=firestore.Query.DESCENDING).order_by(
+            '__name__', direction=firestore.Query.DESCENDING
+        )
         
-        count = 0
-        for order_doc in orders_query:
-            # Skip offset items
-            if count < offset:
-                count += 1
-                continue
-            
-            if len(orders_list) >= limit:
-                break
-            
+        if cursor:
+            try:
+                cursor_order_date, cursor_order_id = decode_orders_cursor(cursor)
+            except ValueError:
+                return jsonify({'error': 'Invalid cursor'}), 400
+            orders_query = orders_query.start_after({
+                'order_date': cursor_order_date,
+                '__name__': orders_ref.document(cursor_order_id)
+            })
+        
+        # Fetch one extra doc to know whether another page exists
+        order_docs = list(orders_query.limit(limit + 1).stream())
+        has_more = len(order_docs) > limit
+        order_docs = order_docs[:limit]
+        
+        # Orders carry the hotel identity; look up only older orders without it, in one batch
+        identities = {}
+        missing_user_ids = {
+            order_doc.to_dict().get('user_id') for order_doc in order_docs
+            if order_doc.to_dict().get('user_id') and not has_hotel_identity(order_doc.to_dict())
+        }
+        if missing_user_ids:
+            try:
+                identities = get_hotel_identities(missing_user_ids)
+            except Exception as user_err:
+                logger.warning(f"Error fetching users for orders page: {str(user_err)}")
+        
+        # Fetch every order's items subcollection concurrently
+        items_per_order = fetch_order_items_concurrently(order_doc.reference for order_doc in order_docs)
+        
+        for order_doc, item_docs in zip(order_docs, items_per_order):
             try:
                 order = order_doc.to_dict()
                 order['id'] = order_doc.id
                 order['order_id'] = order_doc.id
                 
-                # Filter by user_id if provided
-                if user_id_filter and order.get('user_id') != user_id_filter:
-                    continue
-                
                 # Get user details
                 user_id = order.get('user_id')
-                if user_id:
-                    try:
-                        user_id_str = str(user_id)  # Convert to string for Firestore
-                        user_doc = get_firestore_client().collection('users').document(user_id_str).get()
-                        if user_doc.exists:
-                            user = user_doc.to_dict()
-                            order['hotel_name'] = user.get('hotel_name', 'N/A')
-                            order['phone'] = user.get('phone', 'N/A')
-                            order['email'] = user.get('email', 'N/A')
-                    except Exception as user_err:
-                        logger.warning(f"Error fetching user {user_id}: {str(user_err)}")
-                        order['hotel_name'] = 'N/A'
-                        order['phone'] = 'N/A'
-                        order['email'] = 'N/A'
+                if user_id and not has_hotel_identity(order):
+                    identity = identities.get(str(user_id), {})
+                    order['hotel_name'] = identity.get('hotel_name') or 'N/A'
+                    order['phone'] = identity.get('phone') or 'N/A'
+                    order['email'] = identity.get('email') or 'N/A'
                 
                 # Get order items
                 items_list = []
                 try:
-                    items_query = order_doc.reference.collection('order_items').stream()
-                    for item_doc in items_query:
+                    if item_docs is None:
+                        raise RuntimeError("order_items read failed")
+                    for item_doc in item_docs:
                         item = item_doc.to_dict()
                         item['id'] = item_doc.id
                         item['product_id'] = str(item.get('product_id', ''))
                         
-                        # Get product details
-                        product_id = item.get('product_id')
-                        if product_id:
-                            try:
-                                product_doc = get_firestore_client().collection('products').document(str(product_id)).get()
-                                if product_doc.exists:
-                                    product = product_doc.to_dict()
-                                    item['product_name'] = product.get('name', f'Product {product_id}')
-                                    item['unit_type'] = product.get('unit_type', 'kg')
-                            except Exception as prod_err:
-                                logger.warning(f"Error fetching product {product_id}: {str(prod_err)}")
-                                item['product_name'] = f'Product {product_id}'
-                                item['unit_type'] = 'kg'
-                        
                         # Ensure numeric fields are serializable
                         if 'quantity' in item:
                             item['quantity'] = float(item['quantity']) if item['quantity'] is not None else 0
@@ -5094,10 +5855,29 @@ def get_all_orders(current_user):
                 logger.error(f"Error processing order {order_doc.id}: {str(order_err)}")
                 continue
         
-        # Sort by order_date descending
-        orders_list.sort(key=lambda x: str(x.get('order_date', '')), reverse=True)
+        # Get product details for every item on the page in one cached lookup
+        products = get_products_by_ids(
+            item['product_id'] for order in orders_list for item in order['items'] if item.get('product_id')
+        )
+        for order in orders_list:
+            for item in order['items']:
+                product_id = item.get('product_id')
+                if not product_id:
+                    continue
+                product = products.get(product_id)
+                if product:
+                    item['product_name'] = product.get('name', f'Product {product_id}')
+                    item['unit_type'] = product.get('unit_type', 'kg')
+                elif product_id not in products:
+                    item['product_name'] = f'Product {product_id}'
+                    item['unit_type'] = 'kg'
+        
+        next_cursor = None
+        if has_more and order_docs:
+            last_doc = order_docs[-1]
+            next_cursor = encode_orders_cursor(last_doc.to_dict().get('order_date'), last_doc.id)
         
-        logger.info(f"[ORDERS] Returning {len(orders_list)} orders")
+        logger.info(f"[ORDERS] Returning {len(orders_list)} orders, has_more={has_more}")
         
         # Serialize all data for JSON compatibility
         serialized_orders = [serialize_for_json(order) for order in orders_list]
@@ -5105,6 +5885,8 @@ def get_all_orders(current_user):
         return jsonify({
             'orders': serialized_orders,
             'total_orders': len(serialized_orders),
+            'next_cursor': next_cursor,
+            'has_more': has_more,
             'success': True
         }), 200
     except Exception as e:
@@ -5132,10 +5914,47 @@ def update_order_status(current_user, order_id):
         if not order_doc.exists:
             return jsonify({'error': 'Order not found'}), 404
         
-        order_ref.update({
-            'status': new_status,
-            'updated_at': datetime.now().isoformat()
-        })
+        order = order_doc.to_dict()
+        old_status = order.get('status')
+        
+        items = [item_doc.to_dict() for item_doc in order_ref.collection('order_items').stream()]
+        changed_days = []
+        
+        # Update the order, the status copied onto its items and the analytics counters together.
+        # The counter delta comes from the order as read in this transaction, so two concurrent
+        # status changes (e.g. a double cancel) are counted once.
+        def write_status(transaction):
+            current_order = order_ref.get(transaction=transaction).to_dict() or {}
+            current_item_docs = list(transaction.get(order_ref.collection('order_items').select(ANALYTICS_ITEM_FIELDS)))
+            current_items = [item_doc.to_dict() for item_doc in current_item_docs]
+            changed_days[:] = queue_analytics_change(
+                transaction,
+                order_analytics_contributions(current_order, current_items),
+                order_analytics_contributions({**current_order, 'status': new_status}, current_items)
+            )
+            transaction.update(order_ref, {
+                'status': new_status,
+                'updated_at': datetime.now().isoformat()
+            })
+            for item_doc in current_item_docs:
+                transaction.update(item_doc.reference, {'status': new_status})
+        
+        # Cancellations also change the delivery date's rollup, in the same transaction
+        if new_status == 'cancelled' and old_status != 'cancelled':
+            remove_order_from_daily_rollup(order.get('delivery_date_key'), order_id, write_docs=write_status)
+        elif old_status == 'cancelled' and new_status != 'cancelled':
+            add_order_to_daily_rollup(
+                order.get('delivery_date_key'),
+                order_id,
+                order.get('user_id'),
+                [(item.get('product_id'), item.get('quantity')) for item in items],
+                order.get('total_amount', order.get('total_price', 0)),
+                write_docs=write_status
+            )
+        else:
+            firestore.transactional(write_status)(get_firestore_client().transaction())
+        
+        finish_analytics_change(changed_days, f"order {order_id} status {old_status} -> {new_status}")
         
         return jsonify({
             'message': 'Order status updated successfully',
@@ -5225,21 +6044,37 @@ def create_order(current_user):
             'status': 'pending',
             'total_price': total_price,
             'order_date': datetime.now().isoformat(),
+            'order_date_key': datetime.now(IST).strftime('%Y-%m-%d'),
             'created_at': datetime.now().isoformat(),
             'updated_at': datetime.now().isoformat(),
             'notes': data.get('notes', ''),
-            'payment_method': data.get('payment_method', 'cash')
+            'payment_method': data.get('payment_method', 'cash'),
+            **hotel_identity_from_user(user_doc.to_dict())
         }
         
-        # Add order to Firestore with sequential ID
-        get_firestore_client().collection('orders').document(order_id).set(order_data)
-        logger.info(f"[ORDER] Order document created with ID: {order_id}")
+        if data.get('delivery_date'):
+            order_data['delivery_date'] = data.get('delivery_date')
+            order_data['delivery_date_key'] = to_ist_date_key(data.get('delivery_date'))
         
-        # Add order items as subcollection
-        for idx, item in enumerate(order_items):
-            get_firestore_client().collection('orders').document(order_id).collection('order_items').document(f'item_{idx}').set(item)
+        # Add the order and its items with sequential ID, in one transaction with the rollup change
+        order_ref = get_firestore_client().collection('orders').document(order_id)
+        item_order_fields = order_item_denormalized_fields(order_id, order_data)
         
-        logger.info(f"[ORDER] Added {len(order_items)} items to order")
+        changed_days = []
+        
+        def write_order(transaction):
+            transaction.set(order_ref, order_data)
+            for idx, item in enumerate(order_items):
+                transaction.set(order_ref.collection('order_items').document(f'item_{idx}'), {**item, **item_order_fields})
+            changed_days[:] = queue_analytics_change(transaction, {}, order_analytics_contributions(order_data, order_items))
+        
+        add_order_to_daily_rollup(
+            order_data.get('delivery_date_key'), order_id, str(user_id),
+            [(item['product_id'], item['quantity']) for item in order_items],
+            total_price, write_docs=write_order
+        )
+        logger.info(f"[ORDER] Order {order_id} created with {len(order_items)} items")
+        finish_analytics_change(changed_days, f"added order {order_id}")
         
         # Update product stock
         for item in order_items:
@@ -5252,6 +6087,7 @@ def create_order(current_user):
                     'stock_quantity': new_stock,
                     'updated_at': datetime.now().isoformat()
                 })
+                invalidate_product_cache(product_id)
         
         logger.info(f"[ORDER] Updated stock for {len(order_items)} products")
         
@@ -5261,10 +6097,17 @@ def create_order(current_user):
             'user_id': str(user_id),
             'total_amount': total_price,
             'bill_date': datetime.now().isoformat(),
+            'bill_date_key': datetime.now(IST).strftime('%Y-%m-%d'),
             'bill_status': 'unpaid',
-            'created_at': datetime.now().isoformat()
+            'created_at': datetime.now().isoformat(),
+            **hotel_identity_from_user(user_doc.to_dict())
         }
-        get_firestore_client().collection('bills').document().set(bill_data)
+        bill_ref = get_firestore_client().collection('bills').document()
+        batch = get_firestore_client().batch()
+        batch.set(bill_ref, bill_data)
+        changed_days = queue_analytics_change(batch, {}, bill_analytics_contributions(bill_data))
+        batch.commit()
+        finish_analytics_change(changed_days, f"added bill {bill_ref.id}")
         
         # Update counter
         counter_ref.set({'count': next_id}, merge=True)
@@ -5461,44 +6304,60 @@ def get_unpaid_bills(current_user):
                             bill_date = bill_date.split('T')[0]
                         bill_data['bill_date'] = bill_date
                     
-                    # Get order and user details
-                    order_id = bill_data.get('order_id')
-                    if order_id:
-                        order_doc = firestore_db.collection('orders').document(str(order_id)).get()
-                        if order_doc.exists:
-                            order_data = order_doc.to_dict()
-                            
-                            # Get user/hotel details
-                            user_id = order_data.get('user_id')
-                            if user_id:
-                                user_doc = firestore_db.collection('users').document(str(user_id)).get()
-                                if user_doc.exists:
-                                    user_data = user_doc.to_dict()
-                                    hotel_name = user_data.get('hotel_name', 'Unknown')
-                                    bill_data['hotelName'] = hotel_name
-                                    bill_data['hotelId'] = str(user_id)
-                                    
-                                    # Track hotel breakdown
-                                    if hotel_name not in hotel_breakdown:
-                                        hotel_breakdown[hotel_name] = {
-                                            'hotelName': hotel_name,
-                                            'totalAmount': 0,
-                                            'billCount': 0
-                                        }
-                                    
-                                    total_amount = float(bill_data.get('total_amount', 0))
-                                    hotel_breakdown[hotel_name]['totalAmount'] += total_amount
-                                    hotel_breakdown[hotel_name]['billCount'] += 1
-                                    total_unpaid += total_amount
-                    
                     unpaid_bills.append(bill_data)
-                    logger.info(f"[UNPAID_BILLS] Bill {doc.id} is unpaid: {bill_data.get('hotelName', 'Unknown')}")
                     
                 except Exception as e:
                     logger.warning(f"[UNPAID_BILLS] Error processing bill {doc.id}: {str(e)}")
                     # Still add the bill even if enrichment fails
                     unpaid_bills.append(bill_data)
         
+        # Bills carry user_id and hotel identity; older bills are resolved through
+        # their orders and users with batched reads instead of two reads per bill
+        try:
+            missing_order_ids = {str(bill['order_id']) for bill in unpaid_bills if not bill.get('user_id') and bill.get('order_id')}
+            order_users = {}
+            if missing_order_ids:
+                order_refs = [firestore_db.collection('orders').document(order_id) for order_id in missing_order_ids]
+                for order_doc in firestore_db.get_all(order_refs):
+                    if order_doc.exists and order_doc.to_dict().get('user_id'):
+                        order_users[order_doc.id] = str(order_doc.to_dict()['user_id'])
+            for bill in unpaid_bills:
+                if not bill.get('user_id') and str(bill.get('order_id')) in order_users:
+                    bill['user_id'] = order_users[str(bill.get('order_id'))]
+            
+            identities = get_hotel_identities(
+                bill['user_id'] for bill in unpaid_bills if bill.get('user_id') and not has_hotel_identity(bill)
+            )
+        except Exception as e:
+            logger.warning(f"[UNPAID_BILLS] Error resolving hotels for older bills: {str(e)}")
+            identities = {}
+        
+        for bill_data in unpaid_bills:
+            user_id = bill_data.get('user_id')
+            if not user_id:
+                continue
+            if has_hotel_identity(bill_data):
+                hotel_name = bill_data['hotel_name']
+            elif str(user_id) in identities:
+                hotel_name = identities[str(user_id)].get('hotel_name') or 'Unknown'
+            else:
+                continue
+            bill_data['hotelName'] = hotel_name
+            bill_data['hotelId'] = str(user_id)
+            
+            # Track hotel breakdown
+            if hotel_name not in hotel_breakdown:
+                hotel_breakdown[hotel_name] = {
+                    'hotelName': hotel_name,
+                    'totalAmount': 0,
+                    'billCount': 0
+                }
+            
+            total_amount = float(bill_data.get('total_amount', 0))
+            hotel_breakdown[hotel_name]['totalAmount'] += total_amount
+            hotel_breakdown[hotel_name]['billCount'] += 1
+            total_unpaid += total_amount
+        
         # Sort bills by date (newest first)
         # Convert bill_date to ISO string for proper sorting
         def get_sort_date(bill):
@@ -5577,6 +6436,7 @@ def create_bill(current_user):
         # Get user details for hotel_name and fetch order items
         hotel_name = ''
         email = ''
+        phone = ''
         address = ''
         bill_items = []
         
@@ -5586,6 +6446,7 @@ def create_bill(current_user):
                 user_data = user_doc.to_dict()
                 hotel_name = user_data.get('hotel_name', '')
                 email = user_data.get('email', '')
+                phone = user_data.get('phone', '')
                 address = user_data.get('address', '')
         except Exception as e:
             logger.warning(f"[CREATE_BILL] Could not fetch user details for user {user_id}: {str(e)}")
@@ -5613,9 +6474,11 @@ def create_bill(current_user):
             'user_id': str(user_id),
             'hotel_name': hotel_name,
             'email': email,
+            'phone': phone,
             'address': address,
             'items': bill_items,
             'bill_date': bill_date,
+            'bill_date_key': to_ist_date_key(bill_date),
             'amount': float(data['amount']),
             'tax_rate': float(data.get('tax_rate', 5)),
             'discount': float(data.get('discount', 0)),
@@ -5623,6 +6486,7 @@ def create_bill(current_user):
             'paid': data.get('paid', False),
             'payment_method': data.get('payment_method', ''),
             'due_date': due_date,
+            'due_date_key': to_ist_date_key(due_date),
             'comments': data.get('comments', ''),
             'bill_status': data.get('bill_status', 'pending'),
             'created_at': datetime.now(timezone.utc).isoformat(),
@@ -5642,7 +6506,11 @@ def create_bill(current_user):
         logger.info(f"[CREATE_BILL] Assigning bill ID: {bill_id}")
         
         # Create bill document
-        get_firestore_client().collection('bills').document(bill_id).set(bill_data)
+        batch = get_firestore_client().batch()
+        batch.set(get_firestore_client().collection('bills').document(bill_id), bill_data)
+        changed_days = queue_analytics_change(batch, {}, bill_analytics_contributions(bill_data))
+        batch.commit()
+        finish_analytics_change(changed_days, f"added bill {bill_id}")
         
         # Update counter
         counter_ref.set({'count': next_id}, merge=True)
@@ -5685,9 +6553,21 @@ def update_bill(current_user, bill_id):
         if len(update_data) == 1:  # Only has updated_at
             return jsonify({'error': 'No valid fields to update'}), 400
         
-        # Update bill
-        bill_ref.set(update_data, merge=True)
+        # Update bill and its unpaid totals together, from the bill as read in the transaction
+        @firestore.transactional
+        def write_bill(transaction):
+            old_bill = bill_ref.get(transaction=transaction).to_dict() or {}
+            changed_days = queue_analytics_change(
+                transaction,
+                bill_analytics_contributions(old_bill),
+                bill_analytics_contributions({**old_bill, **update_data})
+            )
+            transaction.set(bill_ref, update_data, merge=True)
+            return changed_days
+        
+        changed_days = write_bill(db.transaction())
         logger.info(f"[UPDATE_BILL] Bill {bill_id} updated successfully")
+        finish_analytics_change(changed_days, f"updated bill {bill_id}")
         
         return jsonify({'message': 'Bill updated successfully'}), 200
     except Exception as e:
@@ -5711,6 +6591,7 @@ def debug_vegetables_history(selected_date):
         # Query orders
         vegetables = {}
         category_totals = {}
+        order_lines = []
         
         orders_query = get_firestore_client().collection('orders').stream()
         order_count = 0
@@ -5752,32 +6633,32 @@ def debug_vegetables_history(selected_date):
             items_query = get_firestore_client().collection('orders').document(order_doc.id).collection('order_items').stream()
             for item_doc in items_query:
                 item = item_doc.to_dict()
-                product_id = item.get('product_id')
-                quantity = float(item.get('quantity', 0))
+                order_lines.append((item.get('product_id'), float(item.get('quantity', 0))))
+        
+        # Get product details for all lines in one cached lookup
+        products = get_products_by_ids(product_id for product_id, _ in order_lines)
+        for product_id, quantity in order_lines:
+            product = products.get(str(product_id))
+            if product:
+                category = product.get('category', 'Other')
+                product_name = product.get('name', f'Product {product_id}')
+                unit_type = product.get('unit_type', 'kg')
                 
-                # Get product details
-                product_doc = get_firestore_client().collection('products').document(str(product_id)).get()
-                if product_doc.exists:
-                    product = product_doc.to_dict()
-                    category = product.get('category', 'Other')
-                    product_name = product.get('name', f'Product {product_id}')
-                    unit_type = product.get('unit_type', 'kg')
-                    
-                    key = f"{product_id}:{product_name}"
-                    if key not in vegetables:
-                        vegetables[key] = {
-                            'product_id': product_id,
-                            'product_name': product_name,
-                            'category': category,
-                            'unit_type': unit_type,
-                            'total_quantity': 0
-                        }
-                    vegetables[key]['total_quantity'] += quantity
-                    
-                    if category not in category_totals:
-                        category_totals[category] = {'count': 0, 'total_quantity': 0}
-                    category_totals[category]['count'] += 1
-                    category_totals[category]['total_quantity'] += quantity
+                key = f"{product_id}:{product_name}"
+                if key not in vegetables:
+                    vegetables[key] = {
+                        'product_id': product_id,
+                        'product_name': product_name,
+                        'category': category,
+                        'unit_type': unit_type,
+                        'total_quantity': 0
+                    }
+                vegetables[key]['total_quantity'] += quantity
+                
+                if category not in category_totals:
+                    category_totals[category] = {'count': 0, 'total_quantity': 0}
+                category_totals[category]['count'] += 1
+                category_totals[category]['total_quantity'] += quantity
         
         logger.info(f"[DEBUG_VEG_HISTORY] Summary: {order_count} orders, {len(vegetables)} vegetables")
         
@@ -5925,26 +6806,34 @@ def debug_all_orders():
 @token_required
 @admin_required
 def get_analytics_trends(current_user):
-    """Get daily revenue trends for analytics"""
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
+    """
+    Get revenue trends from the analytics counter rollups.
+    
+    Query params: bucket (day/week/month, default day) and window (number of
+    buckets ending with the current one; default 30 days, 12 weeks or 12 months).
+    """
     try:
-        cursor.execute("""
-            SELECT 
-                DATE(order_date) as date,
-                SUM(total_amount) as revenue
-            FROM orders 
-            WHERE status != 'cancelled'
-            GROUP BY DATE(order_date)
-            ORDER BY date DESC LIMIT 30
-        """)
-        trends = cursor.fetchall()
-        return jsonify({'trends': trends})
+        bucket = (request.args.get('bucket') or 'day').lower()
+        if bucket not in ANALYTICS_TREND_WINDOWS:
+            return jsonify({'error': f"bucket must be one of: {', '.join(ANALYTICS_TREND_WINDOWS)}"}), 400
+        default_window, max_window = ANALYTICS_TREND_WINDOWS[bucket]
+        try:
+            window = int(request.args.get('window') or default_window)
+        except ValueError:
+            window = 0
+        if not 1 <= window <= max_window:
+            return jsonify({'error': f'window must be a whole number between 1 and {max_window} for {bucket} buckets'}), 400
+        
+        firestore_client = get_firestore_client()
+        if firestore_client is None:
+            return jsonify({'error': 'Database not initialized'}), 500
+        
+        trend, reads = load_revenue_trend(firestore_client, bucket, window, datetime.now(IST).date())
+        logger.info(f"[ANALYTICS_TRENDS] {window} {bucket} buckets from {reads} counter documents")
+        return jsonify({'trends': trend, 'bucket': bucket, 'window': window})
     except Exception as e:
+        logger.error(f"[ANALYTICS_TRENDS] Error: {str(e)}")
         return jsonify({'error': str(e)}), 500
-    finally:
-        cursor.close()
-        conn.close()
 
 
 # ===================================================================
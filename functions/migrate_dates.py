@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+# ===================================================================
+# BHAIRAVNATH VEGETABLE SUPPLIER - DATE NORMALIZATION MIGRATION
+# Backfills canonical YYYY-MM-DD (IST) date keys on orders and bills
+# ===================================================================
+"""
+Backfill normalized date keys on existing orders and bills.
+
+Orders and bills were written over time with ISO strings, Firestore
+Timestamps, RFC-2822 strings and 'DD Mon YYYY' strings. This tool streams
+each collection in document-id order, page by page, and writes the
+canonical *_date_key fields with batched writes. The raw date fields are
+left untouched.
+
+Progress is checkpointed to _migrations/normalize_dates_<collection> after
+every committed page, so an interrupted run resumes where it stopped.
+
+Usage:
+    python migrate_dates.py                       # migrate orders and bills
+    python migrate_dates.py --collection orders   # one collection only
+    python migrate_dates.py --dry-run             # report changes, write nothing
+    python migrate_dates.py --reset               # ignore checkpoint, start over
+"""
+
+import argparse
+import logging
+import sys
+import time
+from datetime import datetime, timezone
+
+from google.cloud.firestore_v1 import FieldPath
+
+from main import get_firestore_client, to_ist_date_key
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s %(message)s')
+logger = logging.getLogger('migrate_dates')
+
+# Raw field -> canonical key field, per collection
+DATE_FIELDS = {
+    'orders': {
+        'delivery_date': 'delivery_date_key',
+        'order_date': 'order_date_key',
+    },
+    'bills': {
+        'bill_date': 'bill_date_key',
+        'due_date': 'due_date_key',
+    },
+}
+
+# Firestore batches are limited to 500 writes
+MAX_BATCH_SIZE = 500
+
+
+def checkpoint_ref(firestore_client, checkpoint_name: str):
+    """Return the checkpoint document for a migration"""
+    return firestore_client.collection('_migrations').document(checkpoint_name)
+
+
+def run_checkpointed_migration(firestore_client, collection_name: str, checkpoint_name: str, page_size: int,
+                               dry_run: bool, reset: bool, process_doc) -> dict:
+    """
+    Stream a collection page by page in document-id order, resuming from a checkpoint.
+
+    process_doc(doc, queue_update, stats) is called for every document and
+    queues writes with queue_update(ref, updates). Writes are committed in
+    batches of at most MAX_BATCH_SIZE, and the checkpoint is saved after each
+    page once its writes are committed. In dry-run mode queued updates are
+    logged and nothing is written.
+
+    Returns:
+        Stats dict with 'scanned', 'updated' and any counters process_doc adds
+    """
+    ckpt_ref = checkpoint_ref(firestore_client, checkpoint_name)
+    stats = {'scanned': 0, 'updated': 0}
+    last_doc_id = None
+
+    if not reset:
+        ckpt_doc = ckpt_ref.get()
+        if ckpt_doc.exists:
+            ckpt = ckpt_doc.to_dict()
+            if ckpt.get('completed'):
+                logger.info(f"[MIGRATE] {checkpoint_name}: already completed (use --reset to run again)")
+                return stats
+            last_doc_id = ckpt.get('last_doc_id')
+            stats.update({name: value for name, value in ckpt.items() if isinstance(value, int) and not isinstance(value, bool)})
+            logger.info(f"[MIGRATE] {checkpoint_name}: resuming after document {last_doc_id}")
+
+    batch = None
+    pending_writes = 0
+
+    def queue_update(ref, updates):
+        nonlocal batch, pending_writes
+        stats['updated'] += 1
+        if dry_run:
+            logger.info(f"[MIGRATE] (dry run) {ref.path}: {updates}")
+            return
+        if batch is None:
+            batch = firestore_client.batch()
+        batch.update(ref, updates)
+        pending_writes += 1
+        if pending_writes >= MAX_BATCH_SIZE:
+            flush()
+
+    def flush():
+        nonlocal batch, pending_writes
+        if batch is not None and pending_writes:
+            batch.commit()
+        batch = None
+        pending_writes = 0
+
+    def save_checkpoint(completed: bool):
+        if dry_run:
+            return
+        ckpt_ref.set({
+            'last_doc_id': last_doc_id,
+            'completed': completed,
+            'updated_at': datetime.now(timezone.utc).isoformat(),
+            **stats
+        })
+
+    collection_ref = firestore_client.collection(collection_name)
+    base_query = collection_ref.order_by(FieldPath.document_id()).limit(page_size)
+    started = time.monotonic()
+    run_scanned = 0
+
+    while True:
+        query = base_query
+        if last_doc_id is not None:
+            query = query.start_after({FieldPath.document_id(): collection_ref.document(last_doc_id)})
+        page = list(query.stream())
+        if not page:
+            break
+
+        for doc in page:
+            process_doc(doc, queue_update, stats)
+        flush()
+
+        stats['scanned'] += len(page)
+        run_scanned += len(page)
+        last_doc_id = page[-1].id
+        save_checkpoint(False)
+
+        elapsed = time.monotonic() - started
+        rate = run_scanned / elapsed if elapsed > 0 else 0.0
+        logger.info(f"[MIGRATE] {checkpoint_name}: scanned {stats['scanned']}, updated {stats['updated']}, {rate:.1f} docs/sec")
+
+        if len(page) < page_size:
+            break
+
+    save_checkpoint(True)
+
+    elapsed = time.monotonic() - started
+    rate = run_scanned / elapsed if elapsed > 0 else 0.0
+    summary = ', '.join(f"{name} {value}" for name, value in stats.items())
+    logger.info(f"[MIGRATE] {checkpoint_name}: done - {summary} ({run_scanned} docs this run in {elapsed:.1f}s, {rate:.1f} docs/sec)")
+    return stats
+
+
+def build_updates(collection_name: str, data: dict) -> tuple:
+    """
+    Compute the key fields that need writing for one document.
+
+    Returns:
+        (updates dict, list of raw fields that could not be parsed)
+    """
+    updates = {}
+    unparsed = []
+    for raw_field, key_field in DATE_FIELDS[collection_name].items():
+        raw_value = data.get(raw_field)
+        if raw_value is None or raw_value == '':
+            continue
+        key = to_ist_date_key(raw_value)
+        if key is None:
+            unparsed.append(raw_field)
+            continue
+        if data.get(key_field) != key:
+            updates[key_field] = key
+    return updates, unparsed
+
+
+def migrate_collection(firestore_client, collection_name: str, page_size: int, dry_run: bool, reset: bool) -> dict:
+    """Backfill the date keys of one collection"""
+    def process_doc(doc, queue_update, stats):
+        updates, unparsed = build_updates(collection_name, doc.to_dict() or {})
+        if unparsed:
+            stats['unparsed'] = stats.get('unparsed', 0) + 1
+            logger.warning(f"[MIGRATE_DATES] {collection_name}/{doc.id}: could not parse {', '.join(unparsed)}")
+        if updates:
+            queue_update(doc.reference, updates)
+
+    return run_checkpointed_migration(
+        firestore_client, collection_name, f'normalize_dates_{collection_name}',
+        page_size, dry_run, reset, process_doc
+    )
+
+
+def page_size(value: str) -> int:
+    """argparse type for --page-size: a whole number from 1 to MAX_BATCH_SIZE"""
+    try:
+        size = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'{value!r} is not a whole number')
+    if not 1 <= size <= MAX_BATCH_SIZE:
+        raise argparse.ArgumentTypeError(f'must be between 1 and {MAX_BATCH_SIZE}')
+    return size
+
+
+def add_common_arguments(parser: argparse.ArgumentParser):
+    """Add the paging / dry-run / reset flags shared by the migration scripts"""
+    parser.add_argument('--page-size', type=page_size, default=300,
+                        help=f'documents per page (max {MAX_BATCH_SIZE})')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='report the changes without writing documents or checkpoints')
+    parser.add_argument('--reset', action='store_true',
+                        help='ignore any saved checkpoint and start from the beginning')
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Backfill normalized date keys on orders and bills')
+    parser.add_argument('--collection', choices=sorted(DATE_FIELDS) + ['all'], default='all',
+                        help='collection to migrate (default: all)')
+    add_common_arguments(parser)
+    args = parser.parse_args(argv)
+
+    firestore_client = get_firestore_client()
+    if firestore_client is None:
+        logger.error("[MIGRATE_DATES] Firestore client not initialized")
+        return 1
+
+    collections = sorted(DATE_FIELDS) if args.collection == 'all' else [args.collection]
+    for collection_name in collections:
+        migrate_collection(firestore_client, collection_name, args.page_size, args.dry_run, args.reset)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
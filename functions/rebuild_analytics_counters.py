@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# ===================================================================
+# BHAIRAVNATH VEGETABLE SUPPLIER - ANALYTICS COUNTER REBUILD
+# Recomputes the analytics_counters documents from orders and bills
+# ===================================================================
+"""
+Rebuild the pre-aggregated analytics_counters documents from scratch.
+
+/api/admin/analytics reads analytics_counters, which order and bill writes
+keep current with Increment deltas committed together with the document.
+Run this once to backfill the counters for existing data, and again whenever
+they may have drifted (e.g. after a manual edit in the console or a change
+to the contribution rules). It streams every
+order, its order items (one collection_group query) and every bill, sums
+their contributions in memory and overwrites each counter document.
+Counter documents that no longer have any data are deleted.
+
+Writes made while the rebuild runs can be lost from the counters, so run
+it when order traffic is low.
+
+Usage:
+    python rebuild_analytics_counters.py             # rebuild all counters
+    python rebuild_analytics_counters.py --dry-run   # report totals, write nothing
+"""
+
+import argparse
+import logging
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+
+from main import (
+    ANALYTICS_COUNTERS_COLLECTION,
+    bill_analytics_contributions,
+    get_firestore_client,
+    order_analytics_contributions,
+)
+from migrate_dates import MAX_BATCH_SIZE
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s %(message)s')
+logger = logging.getLogger('rebuild_analytics_counters')
+
+
+def merge_contributions(totals: dict, contributions: dict):
+    """Add one document's contributions into the running totals, in place"""
+    for key, value in contributions.items():
+        if isinstance(value, dict):
+            merge_contributions(totals.setdefault(key, {}), value)
+        elif isinstance(value, str):
+            totals[key] = value
+        else:
+            totals[key] = totals.get(key, 0) + value
+
+
+def compute_counters(firestore_client) -> dict:
+    """Stream orders, order items and bills and return counter doc id -> document data"""
+    items_by_order = defaultdict(list)
+    item_count = 0
+    for item_doc in firestore_client.collection_group('order_items').stream():
+        order_ref = item_doc.reference.parent.parent
+        if order_ref is not None:
+            items_by_order[order_ref.id].append(item_doc.to_dict() or {})
+            item_count += 1
+    logger.info(f"[REBUILD_COUNTERS] Loaded {item_count} order items for {len(items_by_order)} orders")
+
+    counters = {}
+    order_count = 0
+    for order_doc in firestore_client.collection('orders').stream():
+        contributions = order_analytics_contributions(order_doc.to_dict(), items_by_order.get(order_doc.id, []))
+        merge_contributions(counters, contributions)
+        order_count += 1
+    logger.info(f"[REBUILD_COUNTERS] Aggregated {order_count} orders")
+
+    bill_count = 0
+    for bill_doc in firestore_client.collection('bills').stream():
+        merge_contributions(counters, bill_analytics_contributions(bill_doc.to_dict()))
+        bill_count += 1
+    logger.info(f"[REBUILD_COUNTERS] Aggregated {bill_count} bills")
+
+    return counters
+
+
+def write_counters(firestore_client, counters: dict, dry_run: bool) -> dict:
+    """Overwrite every counter document and delete the ones with no data left"""
+    counters_ref = firestore_client.collection(ANALYTICS_COUNTERS_COLLECTION)
+    stale_ids = [doc.id for doc in counters_ref.stream() if doc.id not in counters]
+    stats = {'written': len(counters), 'deleted': len(stale_ids)}
+
+    if dry_run:
+        for doc_id in sorted(counters):
+            counter = counters[doc_id]
+            if 'revenue' in counter:
+                logger.info(f"[REBUILD_COUNTERS] (dry run) {doc_id}: revenue {counter['revenue']:.2f}, orders {counter.get('orders', 0)}")
+            else:
+                logger.info(f"[REBUILD_COUNTERS] (dry run) {doc_id}: {len(counter.get('hotels', {}))} hotels")
+        for doc_id in stale_ids:
+            logger.info(f"[REBUILD_COUNTERS] (dry run) delete {doc_id}")
+        return stats
+
+    updated_at = datetime.now(timezone.utc).isoformat()
+    batch = firestore_client.batch()
+    pending_writes = 0
+    for doc_id, counter in counters.items():
+        batch.set(counters_ref.document(doc_id), {**counter, 'updated_at': updated_at})
+        pending_writes += 1
+        if pending_writes >= MAX_BATCH_SIZE:
+            batch.commit()
+            batch = firestore_client.batch()
+            pending_writes = 0
+    for doc_id in stale_ids:
+        batch.delete(counters_ref.document(doc_id))
+        pending_writes += 1
+        if pending_writes >= MAX_BATCH_SIZE:
+            batch.commit()
+            batch = firestore_client.batch()
+            pending_writes = 0
+    if pending_writes:
+        batch.commit()
+    return stats
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Recompute the analytics_counters documents from orders and bills')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='report the recomputed totals without writing documents')
+    args = parser.parse_args(argv)
+
+    firestore_client = get_firestore_client()
+    if firestore_client is None:
+        logger.error("[REBUILD_COUNTERS] Firestore client not initialized")
+        return 1
+
+    started = time.monotonic()
+    counters = compute_counters(firestore_client)
+    stats = write_counters(firestore_client, counters, args.dry_run)
+    logger.info(
+        f"[REBUILD_COUNTERS] done - {stats['written']} counter docs written, "
+        f"{stats['deleted']} deleted in {time.monotonic() - started:.1f}s"
+    )
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,11 @@
+-- Composite indexes for the date-range report and dashboard queries.
+-- Report predicates are half-open ranges on the raw columns
+-- (order_date >= start AND order_date < end), so these indexes apply.
+
+CREATE INDEX idx_orders_order_date_status ON orders (order_date, status);
+
+CREATE INDEX idx_orders_user_order_date ON orders (user_id, order_date);
+
+CREATE INDEX idx_order_items_order_id ON order_items (order_id);
+
+CREATE INDEX idx_bills_order_bill_date ON bills (order_id, bill_date);
@@ -0,0 +1,143 @@
+# ======================
+# REPORT QUERIES
+# SQL shared by the combine_api.py reports and the db_migrate.py plan check
+# ======================
+"""
+Report SQL that filters orders, order items or bills by date or order id.
+
+combine_api.py runs these statements and `db_migrate.py --explain` runs
+EXPLAIN on the same constants, so the plan check always covers the SQL the
+endpoints execute. Date filters are half-open (col >= %s AND col < %s) on
+the raw column so the indexes in migrations/ can be used; see day_range(),
+month_range() and trend_range() in combine_api.py.
+"""
+
+# Products ordered on one day, summed (params: day_range)
+DAY_VEGETABLES_SQL = """
+    SELECT
+        p.id as product_id,
+        p.name as product_name,
+        p.category,
+        p.unit_type,
+        SUM(oi.quantity) as total_quantity,
+        COUNT(DISTINCT o.id) as order_count,
+        DATE(o.order_date) as order_date
+    FROM orders o
+    JOIN order_items oi ON o.id = oi.order_id
+    JOIN products p ON oi.product_id = p.id
+    WHERE o.order_date >= %s AND o.order_date < %s
+    AND o.status != 'cancelled'
+    GROUP BY p.id, p.name, p.category, p.unit_type, DATE(o.order_date)
+    ORDER BY p.category, p.name
+"""
+
+# Orders placed on one day with their hotel (params: day_range)
+DAY_HOTEL_ORDERS_SQL = """
+    SELECT
+        o.id as order_id,
+        o.order_date,
+        o.delivery_date,
+        o.total_amount,
+        o.status,
+        o.pricing_status,
+        o.special_instructions,
+        u.id as hotel_id,
+        u.hotel_name,
+        u.email,
+        u.phone,
+        u.address
+    FROM orders o
+    JOIN users u ON o.user_id = u.id
+    WHERE o.order_date >= %s AND o.order_date < %s
+    AND o.status != 'cancelled'
+    ORDER BY u.hotel_name, o.id
+"""
+
+# Same as DAY_HOTEL_ORDERS_SQL without the order amount, for the history view (params: day_range)
+DAY_HOTEL_ORDERS_HISTORY_SQL = """
+    SELECT
+        o.id as order_id,
+        o.order_date,
+        o.delivery_date,
+        o.status,
+        o.pricing_status,
+        o.special_instructions,
+        u.id as hotel_id,
+        u.hotel_name,
+        u.email,
+        u.phone,
+        u.address
+    FROM orders o
+    JOIN users u ON o.user_id = u.id
+    WHERE o.order_date >= %s AND o.order_date < %s
+    AND o.status != 'cancelled'
+    ORDER BY u.hotel_name, o.id
+"""
+
+# Hotels with orders on one day, for the filling matrix (params: day_range)
+DAY_FILLING_HOTELS_SQL = """
+    SELECT DISTINCT
+        u.id as hotel_id,
+        u.hotel_name
+    FROM orders o
+    JOIN users u ON o.user_id = u.id
+    WHERE o.order_date >= %s AND o.order_date < %s
+    AND o.status != 'cancelled'
+    ORDER BY u.hotel_name
+"""
+
+# Quantity per product and hotel on one day, for the filling matrix (params: day_range)
+DAY_FILLING_ITEMS_SQL = """
+    SELECT
+        p.id as product_id,
+        p.name as product_name,
+        p.unit_type,
+        p.category,
+        u.id as hotel_id,
+        SUM(oi.quantity) as quantity
+    FROM orders o
+    JOIN users u ON o.user_id = u.id
+    JOIN order_items oi ON o.id = oi.order_id
+    JOIN products p ON oi.product_id = p.id
+    WHERE o.order_date >= %s AND o.order_date < %s
+    AND o.status != 'cancelled'
+    GROUP BY p.id, p.name, p.unit_type, p.category, u.id
+    ORDER BY p.category, p.name
+"""
+
+# One hotel's order total for a month (params: user_id, *month_range)
+HOTEL_MONTH_TOTAL_SQL = """
+    SELECT SUM(total_amount) as this_month_total
+    FROM orders
+    WHERE user_id = %s AND order_date >= %s AND order_date < %s
+"""
+
+# Daily revenue over a window, newest day first (params: trend_range)
+REVENUE_TRENDS_SQL = """
+    SELECT
+        DATE(order_date) as date,
+        SUM(total_amount) as revenue
+    FROM orders
+    WHERE order_date >= %s AND order_date < %s
+    AND status != 'cancelled'
+    GROUP BY DATE(order_date)
+    ORDER BY date DESC
+"""
+
+# Default SELECT list of ORDER_ITEMS_BATCH_SQL
+ORDER_ITEM_COLUMNS = "oi.*, p.name as product_name, p.unit_type"
+
+# Items of a chunk of orders; format with columns, placeholders and order_by (params: order ids)
+ORDER_ITEMS_BATCH_SQL = """
+    SELECT oi.order_id AS batch_order_id, {columns}
+    FROM order_items oi
+    JOIN products p ON oi.product_id = p.id
+    WHERE oi.order_id IN ({placeholders})
+    ORDER BY oi.order_id, {order_by}
+"""
+
+# Copy a recomputed order total onto its non-draft bills (params: total, total, order_id)
+BILL_TOTAL_SYNC_SQL = """
+    UPDATE bills SET total_amount = %s, amount = %s
+    WHERE order_id = %s AND bill_status != 'draft'
+"""